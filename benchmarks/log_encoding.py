@@ -0,0 +1,75 @@
+"""Compare the JSON and the binary (msgpack) log encodings.
+
+The same records are written once through a `PersistentLogHandler` and once through a
+`BinaryLogHandler`. The script reports the time spent in each handler and the size of each
+file. Requires msgpack.
+
+Usage:
+    CONFIG_PATH=.configs python benchmarks/log_encoding.py --records 100000
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+from utils import logs
+
+
+def make_records(count: int) -> list[logging.LogRecord]:
+    return [
+        logs.LogRecord(
+            "benchmark",
+            logging.INFO,
+            __file__,
+            i,
+            "processed item %d of job %s",
+            (i, "job-42"),
+            None,
+        )
+        for i in range(count)
+    ]
+
+
+def write(handler: logging.Handler, records: list[logging.LogRecord]) -> float:
+    started_at = time.perf_counter()
+    for record in records:
+        handler.handle(record)
+    handler.close()
+    return time.perf_counter() - started_at
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        json_file = os.path.join(directory, "service.log")
+        binary_file = os.path.join(directory, "service.log.bin")
+
+        results = {
+            "json": (
+                write(logs.PersistentLogHandler(json_file), make_records(args.records)),
+                json_file,
+            ),
+            "binary": (
+                write(logs.BinaryLogHandler(binary_file), make_records(args.records)),
+                binary_file,
+            ),
+        }
+        for mode, (duration, file_name) in results.items():
+            size = os.path.getsize(file_name)
+            print(
+                f"{mode:<8} {duration:8.3f}s {args.records / duration:10.0f} records/s "
+                f"{size / args.records:8.1f} bytes/record"
+            )
+
+        started_at = time.perf_counter()
+        logs.binary_log_to_json(binary_file, os.path.join(directory, "converted.log"))
+        print(f"convert  {time.perf_counter() - started_at:8.3f}s")
+
+
+if __name__ == "__main__":
+    main()
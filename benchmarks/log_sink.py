@@ -0,0 +1,106 @@
+"""Compare per-process file handlers with the single-writer log sink.
+
+Every worker process logs the same number of records, either straight to the shared log file
+through its own `PersistentLogHandler`, or through a `SocketSinkHandler` to one `SinkServer`.
+The script reports the throughput and the number of corrupted lines of each mode.
+
+Usage:
+    CONFIG_PATH=.configs python benchmarks/log_sink.py --workers 8 --records 20000
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+
+from utils import logs
+
+
+def log_records(handler: logging.Handler, records: int, payload: str):
+    logger = logging.Logger("benchmark")
+    logger.addHandler(handler)
+    for i in range(records):
+        logger.warning("record %d %s", i, payload)
+    handler.close()
+
+
+def file_worker(file_name: str, records: int, payload: str):
+    log_records(logs.PersistentLogHandler(file_name), records, payload)
+
+
+def sink_worker(address: str, records: int, payload: str):
+    handler = logs.SocketSinkHandler(address)
+    handler.setFormatter(logs.JSONFormatter())
+    log_records(handler, records, payload)
+
+
+def run_workers(
+    target, argument: str, workers: int, records: int, payload: str
+) -> float:
+    context = multiprocessing.get_context("fork")
+    processes = [
+        context.Process(target=target, args=(argument, records, payload))
+        for _ in range(workers)
+    ]
+    started_at = time.perf_counter()
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    return time.perf_counter() - started_at
+
+
+def count_lines(file_name: str) -> tuple[int, int]:
+    valid = corrupted = 0
+    with open(file_name, encoding="utf-8") as file:
+        for line in file:
+            try:
+                json.loads(line)
+            except ValueError:
+                corrupted += 1
+            else:
+                valid += 1
+    return valid, corrupted
+
+
+def report(mode: str, duration: float, file_name: str, expected: int):
+    valid, corrupted = count_lines(file_name)
+    print(
+        f"{mode:<8} {duration:8.3f}s {expected / duration:12.0f} records/s "
+        f"{valid:>9} valid {corrupted:>6} corrupted {expected - valid:>6} missing"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--records", type=int, default=20_000)
+    parser.add_argument(
+        "--payload", type=int, default=200, help="bytes of payload per record"
+    )
+    args = parser.parse_args()
+
+    payload = "x" * args.payload
+    expected = args.workers * args.records
+
+    with tempfile.TemporaryDirectory() as directory:
+        file_name = os.path.join(directory, "file.log")
+        duration = run_workers(
+            file_worker, file_name, args.workers, args.records, payload
+        )
+        report("file", duration, file_name, expected)
+
+        file_name = os.path.join(directory, "sink.log")
+        address = os.path.join(directory, "sink.sock")
+        with logs.SinkServer(address, logs.LogFileWriter(file_name)):
+            duration = run_workers(
+                sink_worker, address, args.workers, args.records, payload
+            )
+        report("sink", duration, file_name, expected)
+
+
+if __name__ == "__main__":
+    main()
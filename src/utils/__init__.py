@@ -1,6 +1,10 @@
 from .configuration import *
 from .creational import *
 from .dictionary import *
+from .histogram import *
 from .io import *
 from .logs import *
+from .instrumentation import *
+from .metrics import *
+from .profiling import *
 from .values import *
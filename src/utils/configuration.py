@@ -1,8 +1,9 @@
 import os
 import pathlib
 import logging
+import time
 from typing import Any
-from utils import creational, io, dictionary
+from utils import creational, io, dictionary, metrics
 import yaml
 
 logger = logging.getLogger(__file__)
@@ -10,6 +11,18 @@ logger = logging.getLogger(__file__)
 
 DEFAULT_PATH = "/etc/config"
 
+_registry = metrics.get_registry()
+_loads = _registry.counter(
+    "utils_config_loads_total", "Loads of the configuration files"
+)
+_files = _registry.gauge(
+    "utils_config_files", "Configuration files read by the last load"
+)
+_last_load = _registry.gauge(
+    "utils_config_last_load_timestamp_seconds",
+    "Unix time of the last configuration load",
+)
+
 
 def get_config_path():
     path = os.environ.get("CONFIG_PATH", DEFAULT_PATH)
@@ -53,6 +66,7 @@ def load_config(config_path: str = None) -> dict[str, Any]:
     # remove all existing configuration settings
     config.clear()
 
+    file_count = 0
     for root, _, files in os.walk(config_path):
         for file in files:
             if file.endswith(".yaml") or file.endswith(".yml"):
@@ -61,7 +75,11 @@ def load_config(config_path: str = None) -> dict[str, Any]:
 
                 data = io.yaml_to_dict(filepath)
                 config = dictionary.merge_dicts(config, data)
+                file_count += 1
     logger.debug(f"Load config from: {config}")
+    _loads.inc()
+    _files.set(file_count)
+    _last_load.set(time.time())
     return config
 
 
@@ -1 +1,8 @@
-from .singleton import singleton
+from .pool import Pool, PoolClosedError, PoolMetrics, PoolTimeoutError
+from .singleton import (
+    MultitonMeta,
+    SingletonMeta,
+    multiton,
+    reset_singletons,
+    singleton,
+)
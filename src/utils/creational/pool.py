@@ -0,0 +1,433 @@
+import asyncio
+import collections
+import contextlib
+import dataclasses
+import logging
+import threading
+import time
+from typing import AsyncIterator, Callable, Generic, Iterator, TypeVar
+
+logger = logging.getLogger(__file__)
+
+T = TypeVar("T")
+
+
+class PoolTimeoutError(TimeoutError):
+    """Raised when no object becomes available before the acquire timeout."""
+
+
+class PoolClosedError(RuntimeError):
+    """Raised when acquiring from a closed pool."""
+
+
+@dataclasses.dataclass
+class PoolMetrics:
+    """Counters describing the activity of a `Pool`.
+
+    Attributes:
+        created (int): Objects built by the factory.
+        destroyed (int): Objects discarded, whatever the reason.
+        acquired (int): Successful acquisitions.
+        reused (int): Acquisitions served from an idle object.
+        invalidated (int): Idle objects rejected by the validate hook.
+        evicted (int): Idle objects discarded after `max_idle_time`.
+        waits (int): Acquisitions that had to wait for a release.
+        wait_time (float): Total seconds spent waiting.
+        timeouts (int): Acquisitions that timed out.
+    """
+
+    created: int = 0
+    destroyed: int = 0
+    acquired: int = 0
+    reused: int = 0
+    invalidated: int = 0
+    evicted: int = 0
+    waits: int = 0
+    wait_time: float = 0.0
+    timeouts: int = 0
+
+
+class Pool(Generic[T]):
+    """A bounded, thread-safe pool of reusable objects.
+
+    Objects are built lazily by `factory`, up to `max_size` alive at once. Idle objects are handed
+    out most recently used first, so rarely needed ones age out through `max_idle_time`.
+
+    Args:
+        factory (Callable[[], T]): Builds a new object.
+        max_size (int): The maximum number of objects alive at once, idle or in use.
+        validate (Callable[[T], bool], optional): Called before handing out an idle object;
+            the object is destroyed when it returns False.
+        reset (Callable[[T], None], optional): Called when an object is released; the object is
+            destroyed when it raises.
+        destroy (Callable[[T], None], optional): Called when an object is discarded.
+        max_idle_time (float, optional): Seconds after which an idle object is discarded.
+        timeout (float, optional): Default number of seconds `acquire` waits for an object.
+            Waits forever when None.
+
+    Usage:
+        pool = Pool(httpx.Client, max_size=4, destroy=httpx.Client.close)
+        with pool.acquire() as client:
+            client.get(url)
+        async with pool.aacquire() as client:
+            ...
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], T],
+        max_size: int = 8,
+        validate: Callable[[T], bool] | None = None,
+        reset: Callable[[T], None] | None = None,
+        destroy: Callable[[T], None] | None = None,
+        max_idle_time: float | None = None,
+        timeout: float | None = None,
+    ):
+        if max_size <= 0:
+            raise ValueError("max_size must be positive")
+
+        self.factory = factory
+        self.max_size = max_size
+        self.validate = validate
+        self.reset = reset
+        self.destroy = destroy
+        self.max_idle_time = max_idle_time
+        self.timeout = timeout
+
+        self._metrics = PoolMetrics()
+        self._idle: collections.deque[tuple[T, float]] = collections.deque()
+        self._size = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        # futures of the tasks waiting in `acheckout`, with their event loop
+        self._waiters: list[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+    @property
+    def metrics(self) -> PoolMetrics:
+        """A snapshot of the pool counters."""
+        with self._condition:
+            return dataclasses.replace(self._metrics)
+
+    @property
+    def size(self) -> int:
+        """The number of objects alive, idle or in use."""
+        return self._size
+
+    @property
+    def idle(self) -> int:
+        """The number of idle objects."""
+        return len(self._idle)
+
+    @contextlib.contextmanager
+    def acquire(self, timeout: float | None = None) -> Iterator[T]:
+        """Borrow an object for the duration of a `with` block.
+
+        Args:
+            timeout (float, optional): Seconds to wait for an object. Defaults to `self.timeout`.
+
+        Raises:
+            PoolTimeoutError: If no object becomes available in time.
+            PoolClosedError: If the pool is closed.
+        """
+        obj = self.checkout(timeout)
+        try:
+            yield obj
+        finally:
+            self.release(obj)
+
+    @contextlib.asynccontextmanager
+    async def aacquire(self, timeout: float | None = None) -> AsyncIterator[T]:
+        """Borrow an object for the duration of an `async with` block.
+
+        Waiting for a release happens on the event loop, so a cancelled wait never takes an
+        object out of the pool; building a new object happens in a worker thread.
+
+        Args:
+            timeout (float, optional): Seconds to wait for an object. Defaults to `self.timeout`.
+
+        Raises:
+            PoolTimeoutError: If no object becomes available in time.
+            PoolClosedError: If the pool is closed.
+        """
+        obj = await self.acheckout(timeout)
+        try:
+            yield obj
+        finally:
+            self.release(obj)
+
+    def checkout(self, timeout: float | None = None) -> T:
+        """Take an object out of the pool; it must be given back with `release`.
+
+        Args:
+            timeout (float, optional): Seconds to wait for an object. Defaults to `self.timeout`.
+
+        Returns:
+            T: The borrowed object.
+
+        Raises:
+            PoolTimeoutError: If no object becomes available in time.
+            PoolClosedError: If the pool is closed.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        started_at = time.monotonic()
+        waited = False
+
+        while True:
+            create = False
+            expired: list[T] = []
+            with self._condition:
+                while True:
+                    if self._closed:
+                        raise PoolClosedError("Pool is closed")
+                    expired += self._evict_idle()
+                    if self._idle:
+                        obj, _ = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        create = True
+                        break
+
+                    if not waited:
+                        waited = True
+                        self._metrics.waits += 1
+                    remaining = None
+                    if timeout is not None:
+                        remaining = timeout - (time.monotonic() - started_at)
+                        if remaining <= 0:
+                            self._metrics.timeouts += 1
+                            self._metrics.wait_time += time.monotonic() - started_at
+                            raise PoolTimeoutError(
+                                f"No object available after {timeout}s"
+                            )
+                    self._condition.wait(remaining)
+
+            for item in expired:
+                self._destroy(item)
+
+            if create:
+                obj = self._create()
+                break
+            if self.validate is None or self._is_valid(obj):
+                with self._condition:
+                    self._metrics.reused += 1
+                break
+
+            with self._condition:
+                self._metrics.invalidated += 1
+            self._discard(obj)
+
+        with self._condition:
+            self._metrics.acquired += 1
+            if waited:
+                self._metrics.wait_time += time.monotonic() - started_at
+        return obj
+
+    async def acheckout(self, timeout: float | None = None) -> T:
+        """Asynchronous version of `checkout` that does not block the event loop.
+
+        Args:
+            timeout (float, optional): Seconds to wait for an object. Defaults to `self.timeout`.
+
+        Returns:
+            T: The borrowed object.
+
+        Raises:
+            PoolTimeoutError: If no object becomes available in time.
+            PoolClosedError: If the pool is closed.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        loop = asyncio.get_running_loop()
+        started_at = time.monotonic()
+        waited = False
+
+        while True:
+            obj = None
+            create = False
+            waiter = None
+            with self._condition:
+                if self._closed:
+                    raise PoolClosedError("Pool is closed")
+                expired = self._evict_idle()
+                if self._idle:
+                    obj, _ = self._idle.pop()
+                elif self._size < self.max_size:
+                    self._size += 1
+                    create = True
+                else:
+                    if not waited:
+                        waited = True
+                        self._metrics.waits += 1
+                    remaining = None
+                    if timeout is not None:
+                        remaining = timeout - (time.monotonic() - started_at)
+                        if remaining <= 0:
+                            self._metrics.timeouts += 1
+                            self._metrics.wait_time += time.monotonic() - started_at
+                            raise PoolTimeoutError(
+                                f"No object available after {timeout}s"
+                            )
+                    waiter = loop.create_future()
+                    self._waiters.append((loop, waiter))
+
+            for item in expired:
+                self._destroy(item)
+
+            if waiter is not None:
+                try:
+                    await asyncio.wait_for(waiter, remaining)
+                except TimeoutError:
+                    pass
+                finally:
+                    with self._condition:
+                        if (loop, waiter) in self._waiters:
+                            self._waiters.remove((loop, waiter))
+                continue
+
+            if create:
+                future = loop.run_in_executor(None, self._create)
+                try:
+                    obj = await asyncio.shield(future)
+                except asyncio.CancelledError:
+                    # the object is still built, give it back once it is
+                    future.add_done_callback(self._release_abandoned)
+                    raise
+                break
+            if self.validate is None or self._is_valid(obj):
+                with self._condition:
+                    self._metrics.reused += 1
+                break
+
+            with self._condition:
+                self._metrics.invalidated += 1
+            self._discard(obj)
+
+        with self._condition:
+            self._metrics.acquired += 1
+            if waited:
+                self._metrics.wait_time += time.monotonic() - started_at
+        return obj
+
+    def _release_abandoned(self, future: asyncio.Future):
+        if not future.cancelled() and future.exception() is None:
+            self.release(future.result())
+
+    def release(self, obj: T):
+        """Give a borrowed object back to the pool.
+
+        Args:
+            obj (T): The object returned by `checkout`.
+        """
+        if self.reset is not None:
+            try:
+                self.reset(obj)
+            except Exception:
+                logger.exception("Failed to reset pooled object, discarding it")
+                self._discard(obj)
+                return
+
+        with self._condition:
+            if not self._closed:
+                self._idle.append((obj, time.monotonic()))
+                self._notify()
+                return
+        self._discard(obj)
+
+    def evict_idle(self) -> int:
+        """Discard the objects idle for longer than `max_idle_time`.
+
+        Returns:
+            int: The number of discarded objects.
+        """
+        with self._condition:
+            expired = self._evict_idle()
+        for obj in expired:
+            self._destroy(obj)
+        return len(expired)
+
+    def close(self):
+        """Destroy the idle objects; borrowed ones are destroyed when released."""
+        with self._condition:
+            self._closed = True
+            idle = [obj for obj, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+            self._metrics.destroyed += len(idle)
+            self._notify(None)
+        for obj in idle:
+            self._destroy(obj)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _evict_idle(self) -> list[T]:
+        """Pop the expired idle objects; the caller holds the lock and destroys them."""
+        if self.max_idle_time is None:
+            return []
+        deadline = time.monotonic() - self.max_idle_time
+        expired = []
+        while self._idle and self._idle[0][1] <= deadline:
+            expired.append(self._idle.popleft()[0])
+        self._size -= len(expired)
+        self._metrics.evicted += len(expired)
+        self._metrics.destroyed += len(expired)
+        if expired:
+            self._notify(len(expired))
+        return expired
+
+    def _notify(self, n: int | None = 1):
+        """Wake `n` threads waiting in `checkout`, every thread when None, and every task
+        waiting in `acheckout`; the caller holds the lock."""
+        if n is None:
+            self._condition.notify_all()
+        else:
+            self._condition.notify(n)
+        for loop, waiter in self._waiters:
+            try:
+                loop.call_soon_threadsafe(_wake, waiter)
+            except RuntimeError:
+                # the loop of the waiter is closed
+                pass
+        self._waiters.clear()
+
+    def _create(self) -> T:
+        try:
+            obj = self.factory()
+        except BaseException:
+            with self._condition:
+                self._size -= 1
+                self._notify()
+            raise
+        with self._condition:
+            self._metrics.created += 1
+        return obj
+
+    def _is_valid(self, obj: T) -> bool:
+        try:
+            return bool(self.validate(obj))
+        except Exception:
+            logger.exception("Failed to validate pooled object, discarding it")
+            return False
+
+    def _discard(self, obj: T):
+        with self._condition:
+            self._size -= 1
+            self._metrics.destroyed += 1
+            self._notify()
+        self._destroy(obj)
+
+    def _destroy(self, obj: T):
+        if self.destroy is None:
+            return
+        try:
+            self.destroy(obj)
+        except Exception:
+            logger.exception("Failed to destroy pooled object")
+
+
+def _wake(waiter: asyncio.Future):
+    if not waiter.done():
+        waiter.set_result(None)
@@ -1,14 +1,209 @@
+import functools
+import inspect
+import threading
+import warnings
+from typing import Any, Hashable, Iterator
+
+_registry_lock = threading.Lock()
+_classes: list[type] = []
+
+
+def _bind_arguments(
+    cls: type, args: tuple, kwargs: dict[str, Any]
+) -> tuple[tuple, tuple]:
+    """Normalize constructor arguments, so a default passed explicitly matches its omission."""
+    try:
+        signature = cls.__dict__["_init_signature"]
+    except KeyError:
+        signature = inspect.signature(cls.__init__)
+        parameters = list(signature.parameters.values())[1:]
+        signature = cls._init_signature = signature.replace(parameters=parameters)
+    try:
+        bound = signature.bind(*args, **kwargs)
+    except TypeError:
+        # the constructor raises the error
+        return args, tuple(sorted(kwargs.items()))
+    bound.apply_defaults()
+    return bound.args, tuple(sorted(bound.kwargs.items()))
+
+
+def _make_key(arguments: tuple[tuple, tuple]) -> Hashable:
+    try:
+        hash(arguments)
+    except TypeError as ex:
+        raise TypeError(
+            f"Multiton arguments must be hashable, got {arguments!r}"
+        ) from ex
+    return arguments
+
+
+def _call(cls: type, args: tuple, kwargs: dict[str, Any]) -> Any:
+    return cls(*args, **kwargs)
+
+
+def _reduce_instance(self) -> tuple:
+    """Pickle an instance as a call of its class, so unpickling returns the instance of the
+    process, built from the original arguments if it does not exist yet."""
+    cls = type(self)
+    for key, instance in list(cls._instances.items()):
+        if instance is self:
+            args, kwargs = cls._instance_args[key]
+            return _call, (cls, args, kwargs)
+    # a dropped instance is pickled as a plain object
+    return object.__reduce_ex__(self, 2)
+
+
+class SingletonMeta(type):
+    """Metaclass creating at most one instance per class.
+
+    The instance is built lazily on the first call, under a per-class lock with double-checked
+    locking, so concurrent first calls never construct it twice. Calling the class again with
+    different arguments returns the existing instance and emits a `RuntimeWarning`.
+    """
+
+    def __init__(cls, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        cls._instances: dict[Hashable, Any] = {}
+        cls._instance_args: dict[Hashable, tuple[tuple, dict[str, Any]]] = {}
+        cls._instances_lock = threading.RLock()
+        with _registry_lock:
+            _classes.append(cls)
+
+    def _instance_key(cls, args: tuple, kwargs: dict[str, Any]) -> Hashable:
+        return None
+
+    def _get_or_create(
+        cls, key: Hashable, args: tuple, kwargs: dict[str, Any]
+    ) -> tuple[Any, bool]:
+        """Return the instance of `key` and whether this call built it."""
+        try:
+            return cls._instances[key], False
+        except KeyError:
+            with cls._instances_lock:
+                if key in cls._instances:
+                    return cls._instances[key], False
+                instance = super(SingletonMeta, cls).__call__(*args, **kwargs)
+                cls._instances[key] = instance
+                cls._instance_args[key] = (args, kwargs)
+                return instance, True
+
+    def __call__(cls, *args, **kwargs):
+        instance, created = cls._get_or_create(None, args, kwargs)
+        if not created and (args or kwargs):
+            instance_args, instance_kwargs = cls._instance_args.get(None, ((), {}))
+            if _bind_arguments(cls, args, kwargs) != _bind_arguments(
+                cls, instance_args, instance_kwargs
+            ):
+                warnings.warn(
+                    f"{cls.__name__} is a singleton, arguments of this call are ignored",
+                    RuntimeWarning,
+                    stacklevel=2,
+                )
+        return instance
+
+    def reset_instances(cls):
+        """Drop the cached instances so the next call builds a new one."""
+        with cls._instances_lock:
+            cls._instances.clear()
+            cls._instance_args.clear()
+
+
+class MultitonMeta(SingletonMeta):
+    """Metaclass creating one instance per class and per set of constructor arguments.
+
+    Arguments must be hashable. They are bound to the constructor signature first, so keyword
+    arguments are matched regardless of their order and defaults whether or not they are passed.
+    """
+
+    def _instance_key(cls, args: tuple, kwargs: dict[str, Any]) -> Hashable:
+        return _make_key(_bind_arguments(cls, args, kwargs))
+
+    def __call__(cls, *args, **kwargs):
+        return cls._get_or_create(cls._instance_key(args, kwargs), args, kwargs)[0]
+
+
+def _functions(value: Any) -> Iterator[Any]:
+    """Yield the functions behind a class attribute: methods, class and static methods, and the
+    accessors of properties."""
+    if isinstance(value, property):
+        yield from (
+            func for func in (value.fget, value.fset, value.fdel) if func is not None
+        )
+    elif isinstance(value, functools.cached_property):
+        yield value.func
+    else:
+        yield getattr(value, "__func__", value)
+
+
+def _with_metaclass(cls: type, metaclass: type) -> type:
+    base_metaclass = type(cls)
+    if not issubclass(metaclass, base_metaclass):
+        metaclass = type(
+            f"{metaclass.__name__}{base_metaclass.__name__}",
+            (metaclass, base_metaclass),
+            {},
+        )
+
+    namespace = dict(cls.__dict__)
+    namespace.pop("__dict__", None)
+    namespace.pop("__weakref__", None)
+    for slot in namespace.get("__slots__", ()):
+        namespace.pop(slot, None)
+    if not any("__reduce__" in vars(base) for base in cls.__mro__[:-1]):
+        namespace["__reduce__"] = _reduce_instance
+    new_cls = metaclass(cls.__name__, cls.__bases__, namespace)
+
+    # methods using zero-argument super() close over the original class
+    for value in namespace.values():
+        for func in _functions(value):
+            closure = getattr(func, "__closure__", None) or ()
+            freevars = getattr(getattr(func, "__code__", None), "co_freevars", ())
+            for name, cell in zip(freevars, closure):
+                if name == "__class__" and cell.cell_contents is cls:
+                    cell.cell_contents = new_cls
+    return new_cls
+
+
 def singleton(cls):
-    """singleton.
+    """Class decorator making `cls` a thread-safe, lazily built singleton.
+
+    The decorated object is still a class, so `isinstance` checks and pickling keep working.
+
+    Args:
+        cls: The class to decorate.
+
+    Examples:
+        >>> @singleton
+        ... class Settings(dict): ...
+        >>> Settings() is Settings()
+        True
+        >>> Settings.reset_instances()
+    """
+    return _with_metaclass(cls, SingletonMeta)
+
+
+def multiton(cls):
+    """Class decorator keeping one thread-safe, lazily built instance per constructor arguments.
 
     Args:
-        cls:
+        cls: The class to decorate.
+
+    Examples:
+        >>> @multiton
+        ... class Connection:
+        ...     def __init__(self, host: str):
+        ...         self.host = host
+        >>> Connection("a") is Connection("a")
+        True
+        >>> Connection("a") is Connection("b")
+        False
     """
-    instances = {}
+    return _with_metaclass(cls, MultitonMeta)
 
-    def _singleton(*args, **kwargs):
-        if cls not in instances:
-            instances[cls] = cls(*args, **kwargs)
-        return instances[cls]
 
-    return _singleton
+def reset_singletons():
+    """Drop the instances of every singleton and multiton class, mostly useful in tests."""
+    with _registry_lock:
+        classes = list(_classes)
+    for cls in classes:
+        cls.reset_instances()
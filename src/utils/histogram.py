@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+__all__ = ["LatencyHistogram"]
+
+from typing import Any
+
+DEFAULT_PERCENTILES = (50.0, 90.0, 95.0, 99.0, 99.9)
+
+
+class LatencyHistogram:
+    """An HDR-style histogram of non-negative integer values, such as latencies in microseconds.
+
+    Values below `2 ** sub_bucket_bits` are counted exactly. Larger values fall in log-linear
+    buckets whose width grows with their magnitude, keeping the relative error of every
+    percentile under `2 ** (1 - sub_bucket_bits)` (1.6% with the default 7 bits) whatever the
+    range of the recorded values. Buckets are stored sparsely, so memory only grows with the
+    number of distinct buckets hit.
+
+    Args:
+        sub_bucket_bits (int): The precision of the histogram.
+
+    Note:
+        - Recording is not thread-safe; use one histogram per thread and `merge` them, or guard
+          `record` with a lock.
+
+    Examples:
+        >>> histogram = LatencyHistogram()
+        >>> for value in range(1, 1001):
+        ...     histogram.record(value)
+        >>> histogram.percentile(50)
+        503
+        >>> histogram.count
+        1000
+    """
+
+    def __init__(self, sub_bucket_bits: int = 7):
+        if sub_bucket_bits < 2:
+            raise ValueError("sub_bucket_bits must be at least 2")
+
+        self.sub_bucket_bits = sub_bucket_bits
+        self._half = 1 << (sub_bucket_bits - 1)
+        self._exact_limit = 1 << sub_bucket_bits
+        self.counts: dict[int, int] = {}
+        self.count = 0
+        self.total = 0
+        self.min: int | None = None
+        self.max = 0
+
+    def _index(self, value: int) -> int:
+        if value < self._exact_limit:
+            return value
+        shift = value.bit_length() - self.sub_bucket_bits
+        return (shift * self._half) + (value >> shift)
+
+    def _bounds(self, index: int) -> tuple[int, int]:
+        if index < self._exact_limit:
+            return index, index
+        shift = index // self._half - 1
+        sub_bucket = index - shift * self._half
+        return sub_bucket << shift, ((sub_bucket + 1) << shift) - 1
+
+    def record(self, value: int, count: int = 1):
+        """Record a value.
+
+        Args:
+            value (int): The value, negative values are clamped to 0.
+            count (int): How many times the value was observed.
+        """
+        value = max(0, int(value))
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + count
+        self.count += count
+        self.total += value * count
+        if self.min is None or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def record_many(self, values: list[int]):
+        """Record a batch of values, faster than calling `record` for each of them.
+
+        Args:
+            values (list[int]): The values, negative values are clamped to 0.
+        """
+        if not values:
+            return
+        values = [value if value > 0 else 0 for value in map(int, values)]
+        counts = self.counts
+        exact_limit = self._exact_limit
+        bits = self.sub_bucket_bits
+        half = self._half
+        for value in values:
+            if value < exact_limit:
+                index = value
+            else:
+                shift = value.bit_length() - bits
+                index = shift * half + (value >> shift)
+            counts[index] = counts.get(index, 0) + 1
+
+        self.count += len(values)
+        self.total += sum(values)
+        low = min(values)
+        if self.min is None or low < self.min:
+            self.min = low
+        self.max = max(self.max, max(values))
+
+    def merge(self, other: LatencyHistogram):
+        """Add the values of another histogram of the same precision to this one.
+
+        Args:
+            other (LatencyHistogram): The histogram to merge.
+        """
+        if other.sub_bucket_bits != self.sub_bucket_bits:
+            raise ValueError("Cannot merge histograms of different precisions")
+
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        self.max = max(self.max, other.max)
+
+    def percentile(self, percentile: float) -> int:
+        """Return the value below which `percentile` percent of the recorded values fall.
+
+        Args:
+            percentile (float): The percentile, between 0 and 100.
+
+        Returns:
+            int: The upper bound of the bucket holding the percentile, 0 when empty.
+        """
+        if self.count == 0:
+            return 0
+
+        rank = max(1, round(percentile / 100 * self.count))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(self._bounds(index)[1], self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def summary(
+        self, percentiles: tuple[float, ...] = DEFAULT_PERCENTILES
+    ) -> dict[str, Any]:
+        """Summarize the histogram.
+
+        Args:
+            percentiles (tuple[float, ...]): The percentiles to report, as `p<percentile>` keys.
+
+        Returns:
+            dict[str, Any]: The count, min, max, mean and percentiles.
+        """
+        summary = {
+            "count": self.count,
+            "min": self.min or 0,
+            "max": self.max,
+            "mean": round(self.mean, 3),
+        }
+        for percentile in percentiles:
+            summary[f"p{percentile:g}".replace(".", "_")] = self.percentile(percentile)
+        return summary
+
+    def buckets(self) -> list[tuple[int, int, int]]:
+        """Return the non-empty buckets as `(lower bound, upper bound, count)` tuples."""
+        return [
+            (*self._bounds(index), self.counts[index]) for index in sorted(self.counts)
+        ]
+
+    def reset(self):
+        """Remove every recorded value."""
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
@@ -0,0 +1,345 @@
+from __future__ import annotations
+
+__all__ = [
+    "Span",
+    "timed",
+    "current_span",
+    "get_histograms",
+]
+
+import atexit
+import contextvars
+import functools
+import inspect
+import logging
+import threading
+import time
+from typing import Any, Callable
+
+from . import configuration, logs
+from .histogram import LatencyHistogram
+
+DEFAULT_INSTRUMENTATION_CONFIG = {
+    "enabled": False,
+    "flush_interval": 60.0,
+    "logger": "utils.instrumentation",
+    "level": "INFO",
+}
+
+_settings: dict[str, Any] = dict(DEFAULT_INSTRUMENTATION_CONFIG)
+_enabled = False
+
+_current_span: contextvars.ContextVar[Span | None] = contextvars.ContextVar(
+    "current_span",
+    default=None,
+)
+# (span, previous entry) per running `with timed(...)` block, the span being None for the blocks
+# entered while instrumentation was disabled, so each `__exit__` closes its own `__enter__` span
+_entered: contextvars.ContextVar[
+    tuple[Span | None, Any] | None
+] = contextvars.ContextVar(
+    "entered_spans",
+    default=None,
+)
+
+
+class Span:
+    """A running `timed` block.
+
+    Attributes:
+        name (str): The name of the block, the key of its histogram.
+        parent (Span | None): The span that was running when this one started.
+        started_ns (int): The `perf_counter_ns` value at the start of the block.
+    """
+
+    __slots__ = ("name", "parent", "started_ns", "_token")
+
+    def __init__(self, name: str, parent: Span | None):
+        self.name = name
+        self.parent = parent
+        self._token: contextvars.Token | None = None
+        self.started_ns = time.perf_counter_ns()
+
+    @property
+    def path(self) -> str:
+        """The names of the enclosing spans and of this one, joined by `/`."""
+        return (
+            f"{self.parent.path}/{self.name}" if self.parent is not None else self.name
+        )
+
+    @property
+    def elapsed_ns(self) -> int:
+        return time.perf_counter_ns() - self.started_ns
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.path!r})"
+
+
+class _ThreadHistograms:
+    """Durations recorded by one thread, buffered per name then folded into histograms."""
+
+    __slots__ = ("lock", "histograms", "pending", "thread")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms: dict[str, LatencyHistogram] = {}
+        self.pending: dict[str, list[int]] = {}
+        self.thread = threading.current_thread()
+
+    def fold(self):
+        """Move the buffered durations into the histograms; the lock must be held."""
+        for name, durations in self.pending.items():
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = LatencyHistogram()
+            histogram.record_many(durations)
+        self.pending = {}
+
+
+_local = threading.local()
+_all_histograms: list[_ThreadHistograms] = []
+_all_histograms_lock = threading.Lock()
+_flusher: threading.Thread | None = None
+_flusher_lock = threading.Lock()
+_stopped = threading.Event()
+# `_shutdown` is registered with the first flusher, so merely importing the module leaves no hook
+_shutdown_registered = False
+
+# number of durations buffered per name before they are folded into the histogram
+_FOLD_SIZE = 4096
+
+
+def _get_thread_histograms() -> _ThreadHistograms:
+    try:
+        return _local.histograms
+    except AttributeError:
+        histograms = _local.histograms = _ThreadHistograms()
+        with _all_histograms_lock:
+            _all_histograms.append(histograms)
+        _start_flusher()
+        return histograms
+
+
+def _record(name: str, duration_ns: int):
+    try:
+        histograms = _local.histograms
+    except AttributeError:
+        histograms = _get_thread_histograms()
+
+    with histograms.lock:
+        durations = histograms.pending.get(name)
+        if durations is None:
+            durations = histograms.pending[name] = []
+        durations.append(duration_ns)
+        if len(durations) >= _FOLD_SIZE:
+            histograms.fold()
+
+
+class timed:
+    """Measure the duration of a function or a block into the histogram of `name`.
+
+    Works as a decorator, of sync and async functions, and as a context manager yielding the
+    running `Span`. Spans nest through `contextvars`, across threads and asyncio tasks alike.
+    Durations are measured with `perf_counter_ns` and aggregated in memory, then logged
+    periodically by `flush`. When instrumentation is disabled, a timed call costs a flag check.
+
+    Args:
+        name (str, optional): The name of the histogram. Defaults to the qualified name of the
+            decorated function.
+
+    Usage:
+        @timed()
+        def handle(request): ...
+
+        with timed("db.query") as span:
+            ...
+    """
+
+    __slots__ = ("name",)
+
+    def __init__(self, name: str | None = None):
+        self.name = name
+
+    def __enter__(self) -> Span | None:
+        span = None
+        if _enabled:
+            span = Span(self.name, _current_span.get())
+            span._token = _current_span.set(span)
+        _entered.set((span, _entered.get()))
+        return span
+
+    def __exit__(self, *exc_info):
+        entered = _entered.get()
+        if entered is None:
+            return
+        span, previous = entered
+        _entered.set(previous)
+        if span is None:
+            return
+        duration_ns = time.perf_counter_ns() - span.started_ns
+        _current_span.reset(span._token)
+        _record(span.name, duration_ns)
+
+    def __call__(self, func: Callable) -> Callable:
+        # per decorated function, the instance may decorate several ones
+        name = self.name or f"{func.__module__}.{func.__qualname__}"
+
+        if inspect.iscoroutinefunction(func):
+            timer = timed(name)
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not _enabled:
+                    return await func(*args, **kwargs)
+                with timer:
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            # inlined `with self:`, the hot path of instrumented functions
+            span = Span(name, _current_span.get())
+            token = _current_span.set(span)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                duration_ns = time.perf_counter_ns() - span.started_ns
+                _current_span.reset(token)
+                _record(name, duration_ns)
+
+        return wrapper
+
+
+def current_span() -> Span | None:
+    """Return the innermost running span of the current context."""
+    return _current_span.get()
+
+
+def get_histograms(reset: bool = False) -> dict[str, LatencyHistogram]:
+    """Return the durations recorded by every thread, merged per name.
+
+    Args:
+        reset (bool): Whether to clear the recorded durations.
+
+    Returns:
+        dict[str, LatencyHistogram]: The histograms of durations in nanoseconds.
+    """
+    merged: dict[str, LatencyHistogram] = {}
+    with _all_histograms_lock:
+        all_histograms = list(_all_histograms)
+        if reset:
+            # the storage of finished threads is dropped once collected
+            _all_histograms[:] = [
+                item for item in _all_histograms if item.thread.is_alive()
+            ]
+
+    for thread_histograms in all_histograms:
+        with thread_histograms.lock:
+            thread_histograms.fold()
+            for name, histogram in thread_histograms.histograms.items():
+                merged.setdefault(name, LatencyHistogram()).merge(histogram)
+            if reset:
+                thread_histograms.histograms = {}
+    return merged
+
+
+def flush():
+    """Log one record per name with the durations recorded since the last flush.
+
+    The summary of every histogram is in the `data` field of the JSON records, with durations in
+    nanoseconds.
+    """
+    histograms = get_histograms(reset=True)
+    if not histograms:
+        return
+
+    logger = logs.get_logger(_settings["logger"])
+    level = logging._checkLevel(_settings["level"])
+    for name, histogram in sorted(histograms.items()):
+        summary = histogram.summary()
+        logger.log(
+            level,
+            "span %s: %d calls, p50 %d ns, p99 %d ns",
+            name,
+            summary["count"],
+            summary["p50"],
+            summary["p99"],
+            extra={"data": {"span": name, "unit": "ns", **summary}},
+        )
+
+
+def _flush_periodically():
+    while not _stopped.wait(_settings["flush_interval"]):
+        try:
+            flush()
+        except Exception:  # pylint: disable=broad-exception-caught
+            logging.getLogger(__name__).exception("Failed to flush the span histograms")
+
+
+def _start_flusher():
+    global _flusher, _shutdown_registered
+    if _flusher is not None and _flusher.is_alive():
+        return
+    with _flusher_lock:
+        if _flusher is None or not _flusher.is_alive():
+            _stopped.clear()
+            _flusher = threading.Thread(
+                target=_flush_periodically,
+                name="instrumentation-flusher",
+                daemon=True,
+            )
+            _flusher.start()
+            if not _shutdown_registered:
+                atexit.register(_shutdown)
+                _shutdown_registered = True
+
+
+def configure(
+    enabled: bool | None = None,
+    flush_interval: float | None = None,
+    logger: str | None = None,
+    level: str | int | None = None,
+) -> dict[str, Any]:
+    """Override the settings of the `instrumentation` config section.
+
+    Args:
+        enabled (bool, optional): Whether durations are recorded.
+        flush_interval (float, optional): The number of seconds between two flushes.
+        logger (str, optional): The name of the logger the records are logged with.
+        level (str | int, optional): The level of the records.
+
+    Returns:
+        dict[str, Any]: The settings in effect.
+    """
+    global _enabled
+    overrides = {
+        "enabled": enabled,
+        "flush_interval": flush_interval,
+        "logger": logger,
+        "level": level,
+    }
+    _settings.update(
+        {key: value for key, value in overrides.items() if value is not None}
+    )
+    _enabled = bool(_settings["enabled"])
+    return dict(_settings)
+
+
+def load_config() -> dict[str, Any]:
+    """Load the settings from the `instrumentation` config section."""
+    _settings.clear()
+    _settings.update(DEFAULT_INSTRUMENTATION_CONFIG)
+    _settings.update(configuration.get_config().get("instrumentation", {}) or {})
+    return configure()
+
+
+def _shutdown():
+    _stopped.set()
+    if _enabled:
+        flush()
+
+
+load_config()
@@ -1,5 +1,18 @@
+import itertools
+import json
+import os
+import pathlib
+import re
+from typing import Any, Iterable, Iterator
+
 import yaml
 
+CHUNK_SIZE = 64 * 1024
+
+_STRUCTURAL_BYTES = re.compile(rb'[\[\]{}",]')
+_STRING_BYTES = re.compile(rb'["\\]')
+_WHITESPACE = b" \t\r\n"
+
 
 def yaml_to_dict(file_path: str):
     """yaml_to_dict.
@@ -8,6 +21,140 @@ def yaml_to_dict(file_path: str):
         file_path (str): file_path
     """
     with open(file_path, "r", encoding="utf-8") as file:
-
         d = yaml.load(file, Loader=yaml.FullLoader)
         return d
+
+
+def iter_records(file_path: str | os.PathLike) -> Iterator[dict[str, Any]]:
+    """Iterate over the records stored in a YAML, JSON or JSON lines file.
+
+    A YAML file may hold several documents, each one a record or a list of records. A JSON file
+    holds a record or a list of records, a list being read lazily with `iter_json_array`. A JSON
+    lines file (`.jsonl`) holds one record per line and is read lazily, line by line.
+
+    Args:
+        file_path (str | os.PathLike): The path of the file.
+
+    Yields:
+        dict[str, Any]: The records, in file order.
+
+    Raises:
+        ValueError: If the file extension is not supported.
+    """
+    suffix = pathlib.Path(file_path).suffix
+    if suffix not in {".yaml", ".yml", ".json", ".jsonl"}:
+        raise ValueError(f"Unsupported records file: {file_path}")
+
+    if suffix == ".json":
+        yield from _iter_json_records(file_path)
+        return
+
+    with open(file_path, "r", encoding="utf-8") as file:
+        if suffix == ".jsonl":
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+            return
+
+        for document in yaml.load_all(file, Loader=yaml.FullLoader):
+            if isinstance(document, list):
+                yield from document
+            elif document is not None:
+                yield document
+
+
+def iter_json_array(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Split a JSON array, received as chunks of bytes, into the raw JSON of its items.
+
+    Only the item being read is buffered, so memory stays bounded by the size of one item
+    whatever the size of the array. Items are not decoded, which lets callers hand them straight
+    to a decoder or a validator working on bytes.
+
+    Args:
+        chunks (Iterable[bytes]): The chunks of the JSON document, for instance from
+            `httpx.Response.iter_bytes()`.
+
+    Yields:
+        bytes: The JSON encoding of every item, in order.
+
+    Raises:
+        ValueError: If the document is not a JSON array or is truncated.
+
+    Examples:
+        >>> list(iter_json_array([b'[{"a": [1, 2]}, "x,', b'y", 3]']))
+        [b'{"a": [1, 2]}', b'"x,y"', b'3']
+    """
+    pending = bytearray()
+    depth = 0
+    in_string = escaped = False
+
+    for chunk in chunks:
+        item_start = 0
+        position = 0
+        while position < len(chunk):
+            if escaped:
+                escaped = False
+                position += 1
+                continue
+
+            if in_string:
+                match = _STRING_BYTES.search(chunk, position)
+                if match is None:
+                    break
+                position = match.start()
+                if chunk[position] == ord("\\"):
+                    escaped = True
+                else:
+                    in_string = False
+                position += 1
+                continue
+
+            match = _STRUCTURAL_BYTES.search(chunk, position)
+            if match is None:
+                break
+            position = match.start()
+            byte = chunk[position]
+
+            if depth == 0:
+                if byte != ord("[") or chunk[:position].strip(_WHITESPACE) or pending:
+                    raise ValueError("Expected a JSON array")
+                depth = 1
+                item_start = position + 1
+            elif byte == ord('"'):
+                in_string = True
+            elif byte in b"[{":
+                depth += 1
+            elif byte in b"]}":
+                depth -= 1
+                if depth == 0:
+                    item = bytes(pending + chunk[item_start:position]).strip(
+                        _WHITESPACE
+                    )
+                    if item:
+                        yield item
+                    return
+            elif byte == ord(",") and depth == 1:
+                item = bytes(pending + chunk[item_start:position]).strip(_WHITESPACE)
+                pending.clear()
+                yield item
+                item_start = position + 1
+            position += 1
+
+        if depth > 0:
+            pending += chunk[item_start:]
+        elif chunk.strip(_WHITESPACE):
+            pending += chunk
+
+    raise ValueError("Truncated JSON array")
+
+
+def _iter_json_records(file_path: str | os.PathLike) -> Iterator[Any]:
+    with open(file_path, "rb") as file:
+        head = file.read(CHUNK_SIZE)
+        if not head.lstrip(_WHITESPACE).startswith(b"["):
+            yield json.loads(head + file.read())
+            return
+
+        chunks = itertools.chain([head], iter(lambda: file.read(CHUNK_SIZE), b""))
+        for item in iter_json_array(chunks):
+            yield json.loads(item)
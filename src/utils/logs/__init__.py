@@ -0,0 +1,824 @@
+__all__ = [
+    "LogSource",
+    "LogMetadata",
+    "LogContext",
+    "ContextBinding",
+    "bind_context",
+    "get_context",
+    "LogFilter",
+    "LogRecord",
+    "InlineLogFormatter",
+    "JSONFormatter",
+    "PersistentLogHandler",
+    "TemporaryLogHandler",
+    "BinaryLogHandler",
+    "iter_binary_log",
+    "binary_log_to_json",
+    "LogIndex",
+    "LogReader",
+    "LogFileWriter",
+    "SinkServer",
+    "QueueSinkListener",
+    "SocketSinkHandler",
+    "QueueSinkHandler",
+    "get_persistent_handler",
+    "get_temporary_handler",
+    "get_binary_handler",
+    "get_sink_handler",
+    "get_queue_sink_handler",
+    "start_sink_server",
+    "start_queue_sink",
+    "get_handlers",
+    "attach_root_handlers",
+    "close_handlers",
+    "flush_suppressed",
+    "Logger",
+    "BoundLogger",
+    "bootstrap",
+    "get_logger",
+]
+import contextvars
+import dataclasses
+import json
+import logging
+import os
+import sys
+import threading
+from typing import Any
+
+from .. import configuration, dictionary
+from ..values import parsers
+from .binary import BinaryLogHandler, binary_log_to_json, iter_binary_log
+from .filters import LogFilter
+from .reader import LogIndex, LogReader
+from .sinks import (
+    LogFileWriter,
+    QueueSinkHandler,
+    QueueSinkListener,
+    SinkServer,
+    SocketSinkHandler,
+)
+
+lib_config = configuration.load_config()
+
+DEFAULT_LOG_CONFIG = {
+    "format": {
+        "inline": "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        "datatime": "%Y-%m-%d %H:%M:%S",
+    },
+    "metadata": {
+        "fixed_keys": {
+            "application",
+            "environment",
+            "host",
+        },
+        "keys": {},
+    },
+    "logger": {
+        "file_name": f"{os.environ.get('SERVICE', '')}.log",
+        "file_mode": "a",
+        "binary_file_name": None,
+        "level": "INFO",
+        "verbose": False,
+        "outputs": [
+            "stdout",
+            "file",
+        ],
+    },
+    "sink": {
+        "address": None,
+        "max_bytes": 0,
+        "backup_count": 5,
+        "batch_size": 1000,
+        "flush_interval": 0.2,
+        "max_frame_size": 1 << 24,
+    },
+    "filters": {
+        "sampling": {
+            "loggers": {},
+            "levels": {},
+        },
+        "rate_limit": {},
+        "duplicates": {},
+        "max_sites": 10000,
+    },
+}
+
+_log_filter: LogFilter | None = None
+
+
+def get_config() -> dict[str, Any]:
+    return lib_config.get("log", {})
+
+
+def load_config() -> dict[str, Any]:
+    global lib_config
+
+    lib_config["log"] = dictionary.merge_dicts(
+        DEFAULT_LOG_CONFIG,
+        lib_config.get("log", {}),
+    )
+
+    lib_config["log"]["metadata"]["keys"] = set(
+        lib_config["log"]["metadata"].get("keys", set())
+    ).union(lib_config["log"]["metadata"]["fixed_keys"])
+
+    global _log_filter
+    _log_filter = LogFilter.from_config(lib_config["log"].get("filters"))
+    return lib_config["log"]
+
+
+load_config()
+
+LOG_KEY_MAPPERS = {
+    "levelname": "level_name",
+    "filename": "file_name",
+    "levelno": "level_no",
+    "lineno": "line_no",
+    "thread_name": "MainThread",
+    "pathname": "path_name",
+}
+
+LOG_CONTEXT_KEYS = {
+    "file_name",
+    "func_name",
+    "line_no",
+    "module",
+    "level_no",
+}
+
+_standard_keys: dict[str, str] = {}
+
+
+def _standardize_key(key: str) -> str:
+    standard_key = _standard_keys.get(key)
+    if standard_key is None:
+        standard_key = parsers.string_to_snake_case(LOG_KEY_MAPPERS.get(key, key))
+        _standard_keys[key] = standard_key
+    return standard_key
+
+
+def standardize_log_record(d: dict[str, Any]) -> dict[str, Any]:
+    d_ = {_standardize_key(key): val for key, val in d.items()}
+
+    return d_
+
+
+class DynamicObjectMixin:
+    def __init__(self, **kwargs) -> None:
+        for key, val in kwargs.items():
+            setattr(self, key, val)
+
+    def __repr__(self) -> str:
+        attributes = ", ".join([f"{k}={v!r}" for k, v in self.__dict__.items()])
+
+        return f"{self.__class__.__name__}({attributes})"
+
+
+@dataclasses.dataclass
+class LogSource(DynamicObjectMixin):
+    file_name: str
+    func_name: str
+    line_no: int
+    module: str
+    level_no: int
+
+    def __init__(self, **kwargs) -> None:
+        init_kwargs = {}
+
+        for key, val in kwargs.items():
+            standardized_key = _standardize_key(key)
+            if standardized_key not in LOG_CONTEXT_KEYS:
+                continue
+
+            init_kwargs[standardized_key] = val
+
+        super().__init__(**init_kwargs)
+
+    @property
+    def json(self):
+        return self.__dict__
+
+    def __repr__(self) -> str:
+        return super().__repr__()
+
+
+@dataclasses.dataclass(init=False)
+class LogMetadata(DynamicObjectMixin):
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+
+        for key in get_config().get("metadata", {}).get("keys", set()):
+            val = os.environ.get(key.upper())
+            if val is not None:
+                setattr(self, key, val)
+
+    @property
+    def json(self):
+        return self.__dict__
+
+    def __repr__(self) -> str:
+        return super().__repr__()
+
+
+class LogContext:
+    """Immutable set of fields attached to every record logged while it is bound.
+
+    The fields are JSON-encoded once, when the context is created, and spliced as is into the
+    output of `JSONFormatter`.
+
+    Args:
+        fields (dict[str, Any]): The fields.
+    """
+
+    __slots__ = ("fields", "encoded", "_combined")
+
+    def __init__(self, fields: dict[str, Any]) -> None:
+        self.fields = fields
+        self.encoded = json.dumps(fields, cls=parsers.JSONEncoder)
+        # (outer, combined), read and replaced as a whole so threads never mix two entries
+        self._combined: tuple[LogContext, LogContext] | None = None
+
+    def bind(self, **fields) -> "LogContext":
+        """Return a new context with `fields` added to these ones."""
+        return LogContext({**self.fields, **fields})
+
+    def combine(self, outer: "LogContext | None") -> "LogContext":
+        """Return this context layered on top of `outer`, cached for the last `outer` seen."""
+        if outer is None:
+            return self
+        cached = self._combined
+        if cached is not None and cached[0] is outer:
+            return cached[1]
+        combined = outer.bind(**self.fields)
+        self._combined = (outer, combined)
+        return combined
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.fields!r})"
+
+
+_log_context: contextvars.ContextVar[LogContext | None] = contextvars.ContextVar(
+    "log_context",
+    default=None,
+)
+
+
+class ContextBinding:
+    """Handle of a `bind_context` call, restoring the previous context when reset or exited."""
+
+    def __init__(self, token: contextvars.Token) -> None:
+        self._token = token
+
+    def reset(self):
+        _log_context.reset(self._token)
+
+    def __enter__(self) -> "ContextBinding":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.reset()
+
+
+def bind_context(**fields) -> ContextBinding:
+    """Bind fields to the records logged in the current context.
+
+    The context is a `contextvars` context: every thread and asyncio task sees its own fields,
+    and tasks inherit the fields bound when they were created.
+
+    Args:
+        **fields: The fields, added to the ones already bound.
+
+    Returns:
+        ContextBinding: The binding, usable as a context manager to unbind the fields on exit.
+
+    Usage:
+        with bind_context(request_id=request.id, tenant=tenant):
+            logger.info("handling request")
+    """
+    context = _log_context.get()
+    context = context.bind(**fields) if context is not None else LogContext(fields)
+    return ContextBinding(_log_context.set(context))
+
+
+def get_context() -> dict[str, Any]:
+    """Return the fields bound in the current context."""
+    context = _log_context.get()
+    return dict(context.fields) if context is not None else {}
+
+
+@dataclasses.dataclass
+class LogRecord(logging.LogRecord):
+    source: LogSource
+    metadata: LogMetadata
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+
+        self.source = LogSource(**self.__dict__)
+        self.metadata = LogMetadata()
+        self._context = _log_context.get()
+
+    @property
+    def context(self) -> LogContext | None:
+        """The context bound when the record was created, under the fields of a `context` passed
+        with `extra`, which `makeRecord` stores in the record's `__dict__`."""
+        extra = self.__dict__.pop("context", None)
+        if extra is not None:
+            if not isinstance(extra, LogContext):
+                extra = LogContext(dict(extra))
+            self._context = extra.combine(self._context)
+        return self._context
+
+    @context.setter
+    def context(self, context: LogContext | None):
+        self.__dict__.pop("context", None)
+        self._context = context
+
+    @property
+    def json(self):
+        d = {
+            "name": self.name,
+            "created": self.created,
+            "source": self.source.json,
+            "metadata": self.metadata.json,
+            "args": self.args,
+            "message": self.getMessage(),
+            "exc_info": self.exc_info,
+            "stack_info": self.stack_info,
+        }
+        # structured payload passed with `extra={"data": {...}}`
+        data = self.__dict__.get("data")
+        if data is not None:
+            d["data"] = data
+        return d
+
+    def __str__(self) -> str:
+        return parsers.prettier_dict(self.json)
+
+
+class InlineLogFormatter(logging.Formatter):
+    def __init__(
+        self,
+        fmt=get_config().get("format", {}).get("inline"),
+        datefmt=get_config().get("format", {}).get("datatime"),
+        style="%",
+    ):
+        super().__init__(fmt, datefmt, style)
+        self.timestamp_formatter = parsers.get_timestamp_formatter(
+            datefmt or self.default_time_format
+        )
+
+    def formatTime(self, record: logging.LogRecord, datefmt: str = None) -> str:
+        """Format the creation time of a record, re-rendering it once per second only."""
+        if datefmt is not None and datefmt != self.datefmt:
+            return super().formatTime(record, datefmt)
+
+        formatted = self.timestamp_formatter.format_timestamp(
+            record.created, self.converter
+        )
+        if datefmt is None and self.default_msec_format:
+            formatted = self.default_msec_format % (formatted, record.msecs)
+        return formatted
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        output = json.dumps(self.to_dict(record), cls=parsers.JSONEncoder)
+
+        context = getattr(record, "context", None)
+        if context is not None and context.fields:
+            output = f'{output[:-1]}, "context": {context.encoded}}}'
+        return output
+
+    def to_dict(self, record: logging.LogRecord) -> dict[str, Any]:
+        """Return the fields of a record, without its bound context."""
+        record.message = record.getMessage()
+
+        if record.exc_info:
+            record.exc_info = self.formatException(record.exc_info)
+        else:
+            record.exc_info = ""
+
+        if record.stack_info:
+            record.stack_info = self.formatStack(record.stack_info)
+
+        d = {}
+        try:
+            d = record.json
+        except AttributeError:
+            d = record.__dict__
+
+        d = standardize_log_record(d)
+        d.pop("context", None)
+        return d
+
+
+class PersistentLogHandler(logging.FileHandler):
+    def __init__(
+        self,
+        file_name: str = get_config().get("logger", {}).get("file_name"),
+        mode: str = "a",
+        encoding: str = None,
+        delay: str = False,
+        errors: str = None,
+        *args,
+        **kwargs,
+    ):
+        super().__init__(file_name, mode, encoding, delay, errors, *args, **kwargs)
+        json_formatter = JSONFormatter()
+        self.setFormatter(json_formatter)
+
+
+class TemporaryLogHandler(logging.StreamHandler):
+    def __init__(
+        self,
+        *args,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        inline_formatter = InlineLogFormatter()
+        self.setFormatter(inline_formatter)
+
+
+_handlers: dict[tuple, logging.Handler] = {}
+_handlers_lock = threading.Lock()
+
+
+def _get_or_create_handler(key: tuple, factory) -> logging.Handler:
+    handler = _handlers.get(key)
+    if handler is None:
+        with _handlers_lock:
+            handler = _handlers.get(key)
+            if handler is None:
+                handler = factory()
+                _handlers[key] = handler
+    return handler
+
+
+def get_persistent_handler(
+    file_name: str = get_config().get("logger", {}).get("file_name"),
+    mode: str = "a",
+    encoding: str = None,
+) -> PersistentLogHandler:
+    """Return the process-wide file handler of a log file, opening it on first use.
+
+    Every logger writing to the same path shares this handler, so the file is opened once and
+    records go through a single buffer and lock instead of interleaving.
+
+    Args:
+        file_name (str): The path of the log file.
+        mode (str): The mode the file is opened with.
+        encoding (str, optional): The encoding of the file.
+
+    Returns:
+        PersistentLogHandler: The shared handler.
+    """
+    key = ("file", os.path.abspath(file_name), mode, encoding)
+    return _get_or_create_handler(
+        key,
+        lambda: PersistentLogHandler(file_name, mode=mode, encoding=encoding),
+    )
+
+
+def get_temporary_handler(stream=None) -> TemporaryLogHandler:
+    """Return the process-wide handler of a stream, stderr by default.
+
+    Args:
+        stream (optional): The stream to write to.
+
+    Returns:
+        TemporaryLogHandler: The shared handler.
+    """
+    stream = stream or sys.stderr
+    return _get_or_create_handler(
+        ("stream", id(stream)), lambda: TemporaryLogHandler(stream)
+    )
+
+
+def get_binary_handler(file_name: str | None = None) -> BinaryLogHandler:
+    """Return the process-wide handler writing msgpack records to a log file.
+
+    Args:
+        file_name (str, optional): The path of the log file. Defaults to the
+            `log.logger.binary_file_name` config, or `<log file>.bin`.
+
+    Returns:
+        BinaryLogHandler: The shared handler.
+    """
+    logger_config = get_config().get("logger", {})
+    file_name = (
+        file_name
+        or logger_config.get("binary_file_name")
+        or f"{logger_config.get('file_name')}.bin"
+    )
+    key = ("binary", os.path.abspath(file_name))
+    return _get_or_create_handler(key, lambda: BinaryLogHandler(file_name))
+
+
+def _get_sink_address(address: str | None = None) -> str:
+    sink_config = get_config().get("sink", {})
+    file_name = get_config().get("logger", {}).get("file_name")
+    return address or sink_config.get("address") or f"{file_name}.sock"
+
+
+def get_sink_handler(address: str | None = None) -> SocketSinkHandler:
+    """Return the process-wide handler sending JSON records to the `SinkServer` at `address`.
+
+    Args:
+        address (str, optional): The Unix socket of the server. Defaults to the `log.sink.address`
+            config, or `<log file>.sock`.
+
+    Returns:
+        SocketSinkHandler: The shared handler.
+    """
+    address = os.path.abspath(_get_sink_address(address))
+
+    def create() -> SocketSinkHandler:
+        handler = SocketSinkHandler(address)
+        handler.setFormatter(JSONFormatter())
+        return handler
+
+    return _get_or_create_handler(("sink", address), create)
+
+
+def get_queue_sink_handler(queue: Any) -> QueueSinkHandler:
+    """Return the process-wide handler putting JSON records on the queue of a `QueueSinkListener`.
+
+    Args:
+        queue (Any): The queue.
+
+    Returns:
+        QueueSinkHandler: The shared handler.
+    """
+
+    def create() -> QueueSinkHandler:
+        handler = QueueSinkHandler(queue)
+        handler.setFormatter(JSONFormatter())
+        return handler
+
+    return _get_or_create_handler(("queue", id(queue)), create)
+
+
+def _get_writer(file_name: str | None = None) -> tuple[LogFileWriter, dict[str, Any]]:
+    sink_config = get_config().get("sink", {})
+    writer = LogFileWriter(
+        file_name or get_config().get("logger", {}).get("file_name"),
+        max_bytes=sink_config.get("max_bytes", 0),
+        backup_count=sink_config.get("backup_count", 5),
+    )
+    options = {
+        "batch_size": sink_config.get("batch_size", 1000),
+        "flush_interval": sink_config.get("flush_interval", 0.2),
+    }
+    return writer, options
+
+
+def start_sink_server(
+    file_name: str | None = None, address: str | None = None
+) -> SinkServer:
+    """Start the single writer of a log file, fed by the `sink` output of every process.
+
+    Call it once, in the process that outlives the others, such as the gunicorn master.
+
+    Args:
+        file_name (str, optional): The log file. Defaults to the `log.logger.file_name` config.
+        address (str, optional): The Unix socket to listen on. Defaults to the
+            `log.sink.address` config, or `<log file>.sock`.
+
+    Returns:
+        SinkServer: The started server, to `stop()` on shutdown.
+
+    Usage:
+        # gunicorn.conf.py
+        def on_starting(server):
+            server.log_sink = logs.start_sink_server()
+
+        def on_exit(server):
+            server.log_sink.stop()
+    """
+    writer, options = _get_writer(file_name)
+    server = SinkServer(
+        os.path.abspath(_get_sink_address(address)),
+        writer,
+        max_frame_size=get_config().get("sink", {}).get("max_frame_size", 1 << 24),
+        **options,
+    )
+    server.start()
+    return server
+
+
+def start_queue_sink(queue: Any, file_name: str | None = None) -> QueueSinkListener:
+    """Start the single writer of a log file, fed by `get_queue_sink_handler(queue)` handlers.
+
+    Args:
+        queue (Any): The queue, typically a `multiprocessing.Queue`.
+        file_name (str, optional): The log file. Defaults to the `log.logger.file_name` config.
+
+    Returns:
+        QueueSinkListener: The started listener, to `stop()` on shutdown.
+    """
+    writer, options = _get_writer(file_name)
+    listener = QueueSinkListener(queue, writer, **options)
+    listener.start()
+    return listener
+
+
+def get_handlers(
+    file_name: str = get_config().get("logger", {}).get("file_name"),
+    file_mode: str = "a",
+) -> list[logging.Handler]:
+    """Return the shared handlers of the outputs listed in the `log.logger.outputs` config.
+
+    Args:
+        file_name (str): The path of the log file of the `file` output.
+        file_mode (str): The mode the log file is opened with.
+
+    Returns:
+        list[logging.Handler]: The handlers, in the order of the outputs.
+    """
+    handlers = []
+    for output in get_config().get("logger", {}).get("outputs", []):
+        if output == "stdout":
+            handlers.append(get_temporary_handler())
+        elif output == "file":
+            handlers.append(get_persistent_handler(file_name, mode=file_mode))
+        elif output == "sink":
+            handlers.append(get_sink_handler())
+        elif output == "binary":
+            handlers.append(get_binary_handler())
+    return handlers
+
+
+def flush_suppressed():
+    """Log the "repeated N times" summaries of the call sites whose dropped calls were not
+    reported yet, because they did not log again since."""
+    if _log_filter is None:
+        return
+    for name, level, msg, suppressed in _log_filter.flush():
+        logger = logging.getLogger(name)
+        if isinstance(logger, Logger):
+            logger._log_suppressed(level, msg, suppressed)
+
+
+def close_handlers():
+    """Close the shared handlers and detach them from the existing loggers.
+
+    The pending "repeated N times" summaries are logged first. Loggers created afterwards open
+    new handlers.
+    """
+    flush_suppressed()
+    with _handlers_lock:
+        handlers = set(_handlers.values())
+        _handlers.clear()
+
+    loggers = [logging.getLogger(), *logging.Logger.manager.loggerDict.values()]
+    for logger in loggers:
+        if not isinstance(logger, logging.Logger):
+            continue
+        for handler in list(logger.handlers):
+            if handler in handlers:
+                logger.removeHandler(handler)
+    for handler in handlers:
+        handler.close()
+
+
+_srcfiles = {logging._srcfile, os.path.normcase(__file__)}
+
+
+def _find_call_site() -> tuple[str, int]:
+    """Return the file and line of the first frame outside of the logging modules."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        file_name = os.path.normcase(frame.f_code.co_filename)
+        if file_name not in _srcfiles:
+            return file_name, frame.f_lineno
+        frame = frame.f_back
+    return "", 0
+
+
+def attach_root_handlers():
+    """Attach the shared handlers of the configured outputs to the root logger, once.
+
+    Loggers propagate their records to it, so each record reaches every handler once.
+    """
+    root = logging.getLogger()
+    for handler in get_handlers():
+        root.addHandler(handler)
+
+
+class Logger(logging.Logger):
+    """Logger of the configured outputs.
+
+    By default the logger has no handler of its own: the shared handlers are attached to the root
+    logger, see `attach_root_handlers`, and records propagate to them. A logger given its own
+    `file_name` or `file_mode` writes to its own outputs instead, and does not propagate.
+
+    Args:
+        name (str): The name of the logger.
+        file_name (str, optional): The log file of the `file` output of this logger.
+        file_mode (str, optional): The mode the log file is opened with.
+        attach_handlers (bool): Whether to attach any handler.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        file_name: str | None = None,
+        file_mode: str | None = None,
+        attach_handlers: bool = True,
+    ):
+        super().__init__(name)
+
+        if not attach_handlers:
+            return
+        if file_name is None and file_mode is None:
+            attach_root_handlers()
+            return
+
+        file_name = file_name or get_config().get("logger", {}).get("file_name")
+        for handler in get_handlers(file_name, file_mode or "a"):
+            self.addHandler(handler)
+        # propagating would also write the records to the outputs of the root logger
+        self.propagate = False
+
+    def _log(
+        self,
+        level: int,
+        msg: str,
+        args: tuple,
+        exc_info=None,
+        extra=None,
+        stack_info=False,
+        stacklevel=2,
+        **kwargs,
+    ):
+        if _log_filter is not None:
+            site = _find_call_site() if _log_filter.tracks_sites else ()
+            suppressed = _log_filter.check(self.name, level, msg, args, site)
+            if suppressed < 0:
+                return
+            if suppressed:
+                self._log_suppressed(level, msg, suppressed, stacklevel + 1)
+
+        super()._log(
+            level, msg, args, exc_info, extra, stack_info, stacklevel, **kwargs
+        )
+
+    def _log_suppressed(
+        self, level: int, msg: str, suppressed: int, stacklevel: int = 1
+    ):
+        if self.isEnabledFor(level):
+            super()._log(
+                level,
+                "Previous message repeated %d times: %s",
+                (suppressed, msg),
+                stacklevel=stacklevel,
+            )
+
+    def bind(self, **fields) -> "BoundLogger":
+        """Return a logger adding `fields` to the context of every record it logs.
+
+        Args:
+            **fields: The fields.
+
+        Returns:
+            BoundLogger: The bound logger, propagating to this one.
+        """
+        return BoundLogger(self, LogContext(fields))
+
+
+class BoundLogger(Logger):
+    """Logger with bound context fields, created by `Logger.bind`.
+
+    It has no handler of its own and propagates to the logger it was bound from. Its fields take
+    precedence over the ones bound with `bind_context`.
+    """
+
+    def __init__(self, logger: logging.Logger, context: LogContext):
+        super().__init__(logger.name, attach_handlers=False)
+        self.parent = logger
+        self.context = context
+
+    def bind(self, **fields) -> "BoundLogger":
+        return BoundLogger(self.parent, self.context.bind(**fields))
+
+    def makeRecord(self, *args, **kwargs) -> logging.LogRecord:
+        record = super().makeRecord(*args, **kwargs)
+        record.context = self.context.combine(getattr(record, "context", None))
+        return record
+
+
+def bootstrap():
+    logging.setLoggerClass(Logger)
+    logging.setLogRecordFactory(LogRecord)
+
+    load_config()
+
+
+def get_logger(name: str = None) -> Logger:
+    name = name or os.environ.get("HOSTNAME", "local")
+    return logging.getLogger(name)
+
+
+bootstrap()
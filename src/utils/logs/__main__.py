@@ -0,0 +1,3 @@
+from .reader import main
+
+main()
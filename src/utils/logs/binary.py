@@ -0,0 +1,213 @@
+__all__ = [
+    "BinaryLogHandler",
+    "iter_binary_log",
+    "binary_log_to_json",
+]
+
+import json
+import logging
+import struct
+from typing import Any, BinaryIO, Iterator
+
+from ..values import parsers
+
+MAGIC = b"ULOGMP\x00\x01"
+
+KEYS_FRAME = 0
+RECORD_FRAME = 1
+RESET_FRAME = 2
+
+_HEADER = struct.Struct(">I")
+
+
+def _import_msgpack():
+    try:
+        import msgpack
+    except ImportError as ex:
+        raise ImportError(
+            "The binary log format requires msgpack, installed with the `binary` extra: "
+            'pip install "tex-corver-utils[binary]"'
+        ) from ex
+    return msgpack
+
+
+class KeyDictionary:
+    """Maps the keys of encoded records to small integers, assigned in order of appearance."""
+
+    def __init__(self):
+        self.ids: dict[str, int] = {}
+        self.keys: list[str] = []
+        # keys of a dict -> their ids
+        self._shapes: dict[tuple, tuple[int, ...]] = {}
+
+    def _key_id(self, key: Any, new_keys: list[str]) -> int:
+        key = key if isinstance(key, str) else str(key)
+        key_id = self.ids.get(key)
+        if key_id is None:
+            key_id = self.ids[key] = len(self.keys)
+            self.keys.append(key)
+            new_keys.append(key)
+        return key_id
+
+    def encode(self, value: dict[str, Any], new_keys: list[str]) -> dict[int, Any]:
+        """Replace the keys of `value` and of the dicts nested in it, appending the unseen keys to
+        `new_keys`.
+
+        Every map of an encoded record has its keys replaced, so `decode` reads every map key as
+        an id. Keys are converted to strings, as in JSON. Records share a handful of shapes, so
+        the ids of a whole tuple of keys are looked up at once.
+        """
+        shape = tuple(value)
+        ids = self._shapes.get(shape)
+        if ids is None:
+            ids = self._shapes[shape] = tuple(
+                self._key_id(key, new_keys) for key in shape
+            )
+        return dict(
+            zip(ids, [self._encode_value(item, new_keys) for item in value.values()])
+        )
+
+    def _encode_value(self, value: Any, new_keys: list[str]) -> Any:
+        if isinstance(value, dict):
+            return self.encode(value, new_keys)
+        if isinstance(value, (list, tuple)):
+            return [self._encode_value(item, new_keys) for item in value]
+        return value
+
+    def decode(self, value: Any) -> Any:
+        if isinstance(value, dict):
+            keys = self.keys
+            return {keys[key]: self.decode(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self.decode(item) for item in value]
+        return value
+
+
+class BinaryLogHandler(logging.FileHandler):
+    """Handler writing records as length-prefixed msgpack frames.
+
+    Record keys are written once per file, in key dictionary frames, and records refer to them
+    by number, so the file holds little more than the values. The fields are the ones of
+    `JSONFormatter`, and `binary_log_to_json` converts a file back to the JSON lines it would
+    have written.
+
+    The dictionary lives in the handler, so a file must only have one writer at a time, such as a
+    single process or the writer of a log sink. Appending to an existing file starts a new
+    dictionary.
+
+    Requires `msgpack`.
+
+    Args:
+        file_name (str): The path of the log file.
+    """
+
+    def __init__(self, file_name: str):
+        self._msgpack = _import_msgpack()
+        super().__init__(file_name, mode="ab", delay=True)
+        # values msgpack cannot write are converted as in the JSON lines
+        self._packer = self._msgpack.Packer(
+            default=parsers.JSONEncoder().default,
+            use_bin_type=True,
+        )
+        self._keys = KeyDictionary()
+
+        from . import JSONFormatter
+
+        self.setFormatter(JSONFormatter())
+
+    def _open(self):
+        stream = super()._open()
+        if stream.tell() == 0:
+            stream.write(MAGIC)
+        else:
+            stream.write(self._frame([RESET_FRAME, None]))
+        self._keys = KeyDictionary()
+        return stream
+
+    def _frame(self, payload: list[Any]) -> bytes:
+        data = self._packer.pack(payload)
+        return _HEADER.pack(len(data)) + data
+
+    def emit(self, record: logging.LogRecord):
+        if self.stream is None:
+            if self.mode != "w" or not self._closed:
+                self.stream = self._open()
+            else:
+                return
+        try:
+            fields = self.formatter.to_dict(record)
+            context = getattr(record, "context", None)
+            if context is not None and context.fields:
+                fields["context"] = context.fields
+
+            new_keys: list[str] = []
+            encoded = self._keys.encode(fields, new_keys)
+            data = self._frame([RECORD_FRAME, encoded])
+            if new_keys:
+                data = self._frame([KEYS_FRAME, new_keys]) + data
+            self.stream.write(data)
+            self.flush()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+
+def iter_binary_log(file: str | BinaryIO) -> Iterator[dict[str, Any]]:
+    """Stream the records of a file written by `BinaryLogHandler`.
+
+    A truncated last frame, left by a writer that was killed, ends the iteration.
+
+    Args:
+        file (str | BinaryIO): The path of the file, or the file opened in binary mode.
+
+    Returns:
+        Iterator[dict[str, Any]]: The records, with the fields of `JSONFormatter`.
+
+    Raises:
+        ValueError: The file is not a binary log file.
+    """
+    msgpack = _import_msgpack()
+    if isinstance(file, str):
+        with open(file, "rb") as binary_file:
+            yield from iter_binary_log(binary_file)
+        return
+
+    if file.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Not a binary log file")
+
+    keys = KeyDictionary()
+    while True:
+        header = file.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            return
+        (length,) = _HEADER.unpack(header)
+        data = file.read(length)
+        if len(data) < length:
+            return
+
+        kind, body = msgpack.unpackb(data, raw=False, strict_map_key=False)
+        if kind == RECORD_FRAME:
+            yield keys.decode(body)
+        elif kind == KEYS_FRAME:
+            keys.keys.extend(body)
+        elif kind == RESET_FRAME:
+            keys = KeyDictionary()
+
+
+def binary_log_to_json(source: str | BinaryIO, destination: str) -> int:
+    """Convert a file written by `BinaryLogHandler` to JSON lines.
+
+    Args:
+        source (str | BinaryIO): The binary log file.
+        destination (str): The path of the JSON lines file, readable by `LogReader`.
+
+    Returns:
+        int: The number of records converted.
+    """
+    count = 0
+    with open(destination, "w", encoding="utf-8") as file:
+        for record in iter_binary_log(source):
+            file.write(json.dumps(record, cls=parsers.JSONEncoder) + "\n")
+            count += 1
+    return count
@@ -0,0 +1,230 @@
+__all__ = [
+    "LogFilter",
+]
+
+import collections
+import logging
+import random
+import threading
+import time
+from typing import Any
+
+from .. import metrics
+
+_dropped = metrics.get_registry().counter(
+    "utils_log_records_dropped_total",
+    "Log records dropped, by reason",
+    ["reason"],
+)
+_sampled_out = _dropped.labels(reason="sampled")
+_rate_limited = _dropped.labels(reason="rate_limited")
+_duplicates = _dropped.labels(reason="duplicate")
+
+
+def _fingerprint(args: tuple) -> Any:
+    """Return a value equal for equal log arguments, without keeping the arguments alive nor
+    relying on their `__eq__`, which is ambiguous for array-likes."""
+    try:
+        return hash(repr(args))
+    except Exception:  # pylint: disable=broad-exception-caught
+        # never equal to another fingerprint, so the call is not taken for a duplicate
+        return object()
+
+
+class LogFilter:
+    """Decides whether a log call goes through, before its record is even built.
+
+    Three independent mechanisms, each disabled unless configured:
+
+    - sampling: a call is kept with the probability configured for its logger, or for the
+      closest configured parent logger, or else for its level.
+    - rate limiting: a token bucket per call site, keyed by (logger, message template, file,
+      line), refilled at `rate` tokens per second up to `burst` tokens.
+    - duplicate suppression: a call whose arguments have the same `repr` as the ones of the last
+      call emitted from its call site less than `window` seconds ago is dropped.
+
+    Calls dropped by rate limiting or duplicate suppression are counted per call site, and the
+    count is handed back with the next call that goes through, for the logger to log a
+    "repeated N times" summary. The counts of the call sites that never log again are returned
+    by `flush`.
+
+    At most `max_sites` call sites are tracked, the least recently used ones being forgotten
+    first; their counts are kept for `flush`.
+
+    Args:
+        sampling (dict, optional): `loggers` and `levels` mappings of keep probabilities.
+        rate_limit (dict, optional): `rate` and `burst` of the token buckets.
+        duplicates (dict, optional): `window` of the duplicate suppression, in seconds.
+        max_sites (int): The number of call sites tracked.
+
+    Usage:
+        log:
+          filters:
+            sampling:
+              loggers: {noisy.module: 0.1}
+              levels: {DEBUG: 0.01}
+            rate_limit: {rate: 10, burst: 100}
+            duplicates: {window: 5}
+    """
+
+    def __init__(
+        self,
+        sampling: dict[str, Any] | None = None,
+        rate_limit: dict[str, Any] | None = None,
+        duplicates: dict[str, Any] | None = None,
+        max_sites: int = 10_000,
+    ):
+        sampling = sampling or {}
+        rate_limit = rate_limit or {}
+        duplicates = duplicates or {}
+
+        self.logger_rates: dict[str, float] = dict(sampling.get("loggers") or {})
+        self.level_rates: dict[int, float] = {
+            logging._checkLevel(level): rate
+            for level, rate in (sampling.get("levels") or {}).items()
+        }
+        self.rate = rate_limit.get("rate")
+        self.burst = rate_limit.get("burst")
+        if self.rate and self.burst is None:
+            # a bucket holding less than a token would never let a call through again
+            self.burst = max(1.0, self.rate)
+        if self.rate and self.burst < 1:
+            raise ValueError(f"rate_limit burst must be at least 1, got {self.burst}")
+        self.window = duplicates.get("window")
+        self.max_sites = max_sites
+
+        self._sample_rates: dict[tuple[str, int], float] = {}
+        # call site -> [tokens, last refill, fingerprint of the last args, last emitted at,
+        # suppressed, last level]
+        self._sites: collections.OrderedDict[tuple, list] = collections.OrderedDict()
+        # (logger, level, message template, suppressed) of the forgotten call sites, the oldest
+        # ones being dropped when `flush` is never called
+        self._pending: collections.deque[tuple[str, int, Any, int]] = collections.deque(
+            maxlen=max_sites
+        )
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: dict[str, Any] | None) -> "LogFilter | None":
+        """Build the filter of the `log.filters` config section.
+
+        Returns:
+            LogFilter | None: The filter, None when no mechanism is enabled.
+        """
+        log_filter = cls(**(config or {}))
+        return log_filter if log_filter.enabled else None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.logger_rates or self.level_rates or self.rate or self.window)
+
+    @property
+    def tracks_sites(self) -> bool:
+        return bool(self.rate or self.window)
+
+    def sample_rate(self, name: str, level: int) -> float:
+        """Return the probability of keeping a call of a logger at a level."""
+        key = (name, level)
+        rate = self._sample_rates.get(key)
+        if rate is None:
+            rate = self.level_rates.get(level, 1.0)
+            logger_name = name
+            while logger_name:
+                if logger_name in self.logger_rates:
+                    rate = self.logger_rates[logger_name]
+                    break
+                logger_name = logger_name.rpartition(".")[0]
+            self._sample_rates[key] = rate
+        return rate
+
+    def check(
+        self, name: str, level: int, msg: Any, args: tuple, site: tuple = ()
+    ) -> int:
+        """Tell whether a log call goes through.
+
+        Args:
+            name (str): The name of the logger.
+            level (int): The level of the call.
+            msg (Any): The message template.
+            args (tuple): The arguments of the message.
+            site (tuple): The file and line of the caller, used when `tracks_sites`.
+
+        Returns:
+            int: -1 when the call is dropped, else the number of calls dropped from the same call
+            site since the last one that went through.
+        """
+        rate = self.sample_rate(name, level)
+        if rate < 1.0 and random.random() >= rate:
+            _sampled_out.inc()
+            return -1
+        if not self.tracks_sites:
+            return 0
+
+        key = (name, msg, *site)
+        fingerprint = _fingerprint(args) if self.window else None
+        now = time.monotonic()
+        with self._lock:
+            state = self._sites.get(key)
+            if state is None:
+                self._sites[key] = [self.burst, now, fingerprint, now, 0, level]
+                if self.rate:
+                    self._sites[key][0] -= 1
+                if len(self._sites) > self.max_sites:
+                    (old_name, old_msg, *_), old_state = self._sites.popitem(last=False)
+                    if old_state[4]:
+                        self._pending.append(
+                            (old_name, old_state[5], old_msg, old_state[4])
+                        )
+                return 0
+
+            self._sites.move_to_end(key)
+            state[5] = level
+
+            if self.window and now - state[3] < self.window and fingerprint == state[2]:
+                state[4] += 1
+                _duplicates.inc()
+                return -1
+
+            if self.rate:
+                tokens = min(self.burst, state[0] + (now - state[1]) * self.rate)
+                state[1] = now
+                if tokens < 1:
+                    state[0] = tokens
+                    state[4] += 1
+                    _rate_limited.inc()
+                    return -1
+                state[0] = tokens - 1
+
+            suppressed = state[4]
+            state[2] = fingerprint
+            state[3] = now
+            state[4] = 0
+            return suppressed
+
+    def flush(self) -> list[tuple[str, int, Any, int]]:
+        """Return the calls dropped since the last one that went through, and reset their counts.
+
+        Returns:
+            list[tuple[str, int, Any, int]]: The logger name, last level, message template and
+            number of dropped calls of every call site that dropped some.
+        """
+        with self._lock:
+            pending = list(self._pending)
+            self._pending.clear()
+            for (name, msg, *_), state in self._sites.items():
+                if state[4]:
+                    pending.append((name, state[5], msg, state[4]))
+                    state[4] = 0
+        return pending
+
+    def reset(self) -> list[tuple[str, int, Any, int]]:
+        """Forget the state of every call site.
+
+        Returns:
+            list[tuple[str, int, Any, int]]: The dropped calls not reported yet, see `flush`.
+        """
+        pending = self.flush()
+        with self._lock:
+            self._sites.clear()
+        self._sample_rates.clear()
+        return pending
@@ -0,0 +1,349 @@
+__all__ = [
+    "LogIndex",
+    "LogReader",
+]
+
+import argparse
+import dataclasses
+import datetime
+import json
+import logging
+import mmap
+import os
+import sys
+import zlib
+from typing import Any, Callable, Iterable, Iterator
+
+INDEX_VERSION = 1
+
+
+@dataclasses.dataclass
+class LogBlock:
+    """Summary of a range of whole lines of a log file.
+
+    Attributes:
+        start (int): The offset of the first line.
+        end (int): The offset after the last line.
+        min_created (float | None): The earliest `created` timestamp of the block.
+        max_created (float | None): The latest `created` timestamp of the block.
+        levels (list[int]): The level numbers found in the block.
+        loggers (list[str]): The logger names found in the block.
+    """
+
+    start: int
+    end: int
+    min_created: float | None = None
+    max_created: float | None = None
+    levels: list[int] = dataclasses.field(default_factory=list)
+    loggers: list[str] = dataclasses.field(default_factory=list)
+
+    def matches(
+        self,
+        start: float | None,
+        end: float | None,
+        levels: set[int] | None,
+        loggers: set[str] | None,
+    ) -> bool:
+        if (
+            start is not None
+            and self.max_created is not None
+            and self.max_created < start
+        ):
+            return False
+        if end is not None and self.min_created is not None and self.min_created >= end:
+            return False
+        if levels is not None and levels.isdisjoint(self.levels):
+            return False
+        if loggers is not None and loggers.isdisjoint(self.loggers):
+            return False
+        return True
+
+
+@dataclasses.dataclass
+class LogIndex:
+    """Sparse index of a JSON lines log file, saved next to it as `<log file>.idx`.
+
+    The file is split in blocks of about `block_size` bytes, and only the time range, levels and
+    loggers of every block are kept, so the index stays a tiny fraction of the file. Queries
+    only read the blocks that may hold matching records.
+
+    Attributes:
+        size (int): The number of bytes of the log file covered by the index.
+        head (int): The CRC32 of the first bytes of the file, telling a rotated file apart.
+        block_size (int): The target size of the blocks.
+        blocks (list[LogBlock]): The blocks, in file order.
+    """
+
+    size: int = 0
+    head: int = 0
+    block_size: int = 1 << 20
+    blocks: list[LogBlock] = dataclasses.field(default_factory=list)
+
+    @classmethod
+    def load(cls, path: str) -> "LogIndex | None":
+        """Load an index file, None if it is missing or of another version."""
+        try:
+            with open(path, encoding="utf-8") as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != INDEX_VERSION:
+            return None
+        return cls(
+            size=data["size"],
+            head=data["head"],
+            block_size=data["block_size"],
+            blocks=[LogBlock(*block) for block in data["blocks"]],
+        )
+
+    def save(self, path: str):
+        data = {
+            "version": INDEX_VERSION,
+            "size": self.size,
+            "head": self.head,
+            "block_size": self.block_size,
+            "blocks": [dataclasses.astuple(block) for block in self.blocks],
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(data, file, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+
+def _head_checksum(data: mmap.mmap, size: int) -> int:
+    return zlib.crc32(data[: min(size, 256)])
+
+
+def _to_timestamp(value: float | datetime.datetime | str | None) -> float | None:
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        value = datetime.datetime.fromisoformat(value)
+    return value.timestamp()
+
+
+def _get_field(record: dict[str, Any], path: str) -> Any:
+    value: Any = record
+    for key in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+class LogReader:
+    """Query a JSON lines log file written by `JSONFormatter`, without scanning all of it.
+
+    The file is memory-mapped, and its sparse `LogIndex` is built on first use then extended
+    incrementally as the file grows; it is rebuilt when the file was rotated or truncated.
+
+    Args:
+        path (str): The log file.
+        index_path (str, optional): The index file. Defaults to `<path>.idx`.
+        block_size (int): The target size of the index blocks, in bytes.
+
+    Usage:
+        reader = LogReader("service.log")
+        for record in reader.query(
+            start="2024-05-01T10:00:00",
+            end="2024-05-01T10:05:00",
+            levels=["ERROR", "CRITICAL"],
+            where={"metadata.job_id": "42"},
+        ):
+            print(record["message"])
+    """
+
+    def __init__(
+        self, path: str, index_path: str | None = None, block_size: int = 1 << 20
+    ):
+        self.path = path
+        self.index_path = index_path or f"{path}.idx"
+        self.block_size = block_size
+        self._index: LogIndex | None = None
+
+    def index(self, save: bool = True) -> LogIndex:
+        """Build or refresh the index of the file.
+
+        Args:
+            save (bool): Whether to write the index file when it changed.
+
+        Returns:
+            LogIndex: The index.
+        """
+        index = self._index or LogIndex.load(self.index_path)
+        with open(self.path, "rb") as file:
+            size = os.fstat(file.fileno()).st_size
+            if size == 0:
+                self._index = LogIndex(block_size=self.block_size)
+                return self._index
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                if (
+                    index is None
+                    or index.size > size
+                    or index.head != _head_checksum(data, index.size)
+                ):
+                    index = LogIndex(block_size=self.block_size)
+                if index.size < size:
+                    self._extend(index, data, size)
+                    index.head = _head_checksum(data, index.size)
+                    if save:
+                        index.save(self.index_path)
+        self._index = index
+        return index
+
+    def _extend(self, index: LogIndex, data: mmap.mmap, size: int):
+        position = index.size
+        while position < size:
+            block_end = data.find(b"\n", min(position + index.block_size, size) - 1)
+            if block_end < 0:
+                # the last line is still being written, index it next time
+                break
+            block_end += 1
+            block = LogBlock(position, block_end)
+            levels: set[int] = set()
+            loggers: set[str] = set()
+            for line in data[position:block_end].splitlines():
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if not isinstance(record, dict):
+                    continue
+                created = record.get("created")
+                if isinstance(created, (int, float)):
+                    if block.min_created is None or created < block.min_created:
+                        block.min_created = created
+                    if block.max_created is None or created > block.max_created:
+                        block.max_created = created
+                level = _get_field(record, "source.level_no")
+                if isinstance(level, int):
+                    levels.add(level)
+                if isinstance(record.get("name"), str):
+                    loggers.add(record["name"])
+            block.levels = sorted(levels)
+            block.loggers = sorted(loggers)
+            index.blocks.append(block)
+            position = block_end
+        index.size = position
+
+    def query(
+        self,
+        start: float | datetime.datetime | str | None = None,
+        end: float | datetime.datetime | str | None = None,
+        levels: Iterable[int | str] | None = None,
+        loggers: Iterable[str] | None = None,
+        where: dict[str, Any] | Callable[[dict[str, Any]], bool] | None = None,
+    ) -> Iterator[dict[str, Any]]:
+        """Iterate over the records matching every filter, in file order.
+
+        Args:
+            start (float | datetime | str, optional): The earliest `created` time, included, as
+                a timestamp, a datetime or an ISO string.
+            end (float | datetime | str, optional): The latest `created` time, excluded.
+            levels (Iterable[int | str], optional): The level numbers or names to keep.
+            loggers (Iterable[str], optional): The logger names to keep.
+            where (dict | Callable, optional): The values of dotted fields, such as
+                `{"metadata.job_id": "42"}`, or a predicate on the parsed records.
+
+        Returns:
+            Iterator[dict[str, Any]]: The parsed records.
+        """
+        start = _to_timestamp(start)
+        end = _to_timestamp(end)
+        level_set = {logging._checkLevel(level) for level in levels} if levels else None
+        logger_set = set(loggers) if loggers else None
+
+        predicate = where if callable(where) else None
+        fields = where if isinstance(where, dict) else {}
+        # encoded values must appear in the raw line, a cheap test before parsing it
+        needles = [
+            json.dumps(value).encode()
+            for value in fields.values()
+            if isinstance(value, str)
+        ]
+
+        index = self.index()
+        if not index.blocks:
+            return
+        with open(self.path, "rb") as file:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                for block in index.blocks:
+                    if not block.matches(start, end, level_set, logger_set):
+                        continue
+                    for line in data[block.start : block.end].splitlines():
+                        if needles and not all(needle in line for needle in needles):
+                            continue
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            continue
+                        if self._matches(
+                            record, start, end, level_set, logger_set, fields, predicate
+                        ):
+                            yield record
+
+    @staticmethod
+    def _matches(
+        record: dict[str, Any],
+        start: float | None,
+        end: float | None,
+        levels: set[int] | None,
+        loggers: set[str] | None,
+        fields: dict[str, Any],
+        predicate: Callable[[dict[str, Any]], bool] | None,
+    ) -> bool:
+        if not isinstance(record, dict):
+            return False
+        if start is not None or end is not None:
+            created = record.get("created")
+            if not isinstance(created, (int, float)):
+                return False
+            if start is not None and created < start:
+                return False
+            if end is not None and created >= end:
+                return False
+        if levels is not None and _get_field(record, "source.level_no") not in levels:
+            return False
+        if loggers is not None and record.get("name") not in loggers:
+            return False
+        for path, value in fields.items():
+            if _get_field(record, path) != value:
+                return False
+        return predicate is None or predicate(record)
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(
+        prog="python -m utils.logs",
+        description="Print the records of a JSON log file matching the filters, as JSON lines.",
+    )
+    parser.add_argument("path", help="the log file")
+    parser.add_argument("--start", help="earliest time, ISO format or timestamp")
+    parser.add_argument("--end", help="latest time, excluded, ISO format or timestamp")
+    parser.add_argument("--level", action="append", help="level name, repeatable")
+    parser.add_argument("--logger", action="append", help="logger name, repeatable")
+    parser.add_argument(
+        "--where",
+        action="append",
+        default=[],
+        metavar="FIELD=VALUE",
+        help="dotted field equal to a string value, repeatable",
+    )
+    args = parser.parse_args(argv)
+
+    def parse_time(value: str | None) -> float | str | None:
+        try:
+            return float(value) if value is not None else None
+        except ValueError:
+            return value
+
+    where = dict(condition.split("=", 1) for condition in args.where)
+    reader = LogReader(args.path)
+    for record in reader.query(
+        start=parse_time(args.start),
+        end=parse_time(args.end),
+        levels=args.level,
+        loggers=args.logger,
+        where=where,
+    ):
+        sys.stdout.write(json.dumps(record) + "\n")
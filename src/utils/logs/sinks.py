@@ -0,0 +1,410 @@
+__all__ = [
+    "LogFileWriter",
+    "SinkServer",
+    "QueueSinkListener",
+    "SocketSinkHandler",
+    "QueueSinkHandler",
+]
+
+import logging
+import logging.handlers
+import os
+import queue
+import selectors
+import socket
+import struct
+import threading
+import time
+from typing import Any
+
+from .. import metrics
+
+_HEADER = struct.Struct(">I")
+
+DEFAULT_MAX_FRAME_SIZE = 1 << 24
+
+_registry = metrics.get_registry()
+_dropped = _registry.counter(
+    "utils_log_records_dropped_total",
+    "Log records dropped, by reason",
+    ["reason"],
+)
+_unreachable = _dropped.labels(reason="sink_unreachable")
+_undecodable = _dropped.labels(reason="invalid_utf8")
+_written = _registry.counter(
+    "utils_log_sink_records_written_total",
+    "Log records written by the sink writers of this process",
+)
+_batches = _registry.counter(
+    "utils_log_sink_batches_total",
+    "Batches written by the sink writers of this process",
+)
+_oversized = _registry.counter(
+    "utils_log_sink_oversized_frames_total",
+    "Sink clients disconnected for announcing a record larger than the frame size limit",
+)
+_pending = _registry.gauge(
+    "utils_log_sink_pending_records",
+    "Log records received by the sink writers of this process and not written yet",
+)
+
+
+class LogFileWriter:
+    """Appends batches of formatted records to a log file, rotating it by size.
+
+    A single writer owns the file, so records from every process land as whole lines and rotation
+    never races with another writer.
+
+    Args:
+        file_name (str): The path of the log file.
+        max_bytes (int): The size the file is rotated at, 0 to never rotate.
+        backup_count (int): The number of rotated files kept, as `<file_name>.1` to `.N`.
+        encoding (str): The encoding of the file.
+    """
+
+    def __init__(
+        self,
+        file_name: str,
+        max_bytes: int = 0,
+        backup_count: int = 5,
+        encoding: str = "utf-8",
+    ):
+        self.file_name = os.path.abspath(file_name)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.encoding = encoding
+        self._file = None
+        self._size = 0
+
+    def _open(self):
+        self._file = open(self.file_name, "a", encoding=self.encoding)
+        self._size = self._file.tell()
+
+    def write(self, records: list[str]):
+        """Write records, one per line, with a single write and flush.
+
+        Args:
+            records (list[str]): The formatted records.
+        """
+        if not records:
+            return
+        if self._file is None:
+            self._open()
+
+        data = "\n".join(records) + "\n"
+        size = len(data.encode(self.encoding)) if not data.isascii() else len(data)
+        if self.max_bytes and self._size and self._size + size > self.max_bytes:
+            self.rotate()
+
+        self._file.write(data)
+        self._file.flush()
+        self._size += size
+
+    def rotate(self):
+        """Rename the current file to `.1`, shifting the older backups, and start a new file."""
+        self.close()
+        if self.backup_count > 0:
+            for i in range(self.backup_count - 1, 0, -1):
+                source = f"{self.file_name}.{i}"
+                if os.path.exists(source):
+                    os.replace(source, f"{self.file_name}.{i + 1}")
+            if os.path.exists(self.file_name):
+                os.replace(self.file_name, f"{self.file_name}.1")
+        else:
+            open(self.file_name, "w").close()
+        self._open()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class _BatchingThread(threading.Thread):
+    """Thread collecting records and handing them to a `LogFileWriter` in batches."""
+
+    def __init__(self, writer: LogFileWriter, batch_size: int, flush_interval: float):
+        super().__init__(name=f"{type(self).__name__}-{writer.file_name}", daemon=True)
+        self.writer = writer
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.received = 0
+        self.written = 0
+        self._pending: list[str] = []
+        self._flushed_at = time.monotonic()
+        self._stopping = threading.Event()
+
+    def _add(self, record: str):
+        self._pending.append(record)
+        self.received += 1
+        _pending.inc()
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        if self._pending:
+            self.writer.write(self._pending)
+            self.written += len(self._pending)
+            _written.inc(len(self._pending))
+            _batches.inc()
+            _pending.dec(len(self._pending))
+            self._pending = []
+        self._flushed_at = time.monotonic()
+
+    def _flush_due(self):
+        if time.monotonic() - self._flushed_at >= self.flush_interval:
+            self._flush()
+
+    def stop(self, timeout: float | None = None):
+        """Write the received records and stop the thread."""
+        self._stopping.set()
+        self.join(timeout)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+class SinkServer(_BatchingThread):
+    """Writer thread receiving records from `SocketSinkHandler`s over a Unix socket.
+
+    Records are framed with a 4-byte big-endian length. The thread multiplexes every client
+    connection with `selectors`, and writes what it received every `batch_size` records or
+    `flush_interval` seconds. A client announcing a record larger than `max_frame_size` is
+    disconnected, so a corrupted or hostile stream cannot make the server buffer gigabytes, and
+    records that are not valid UTF-8 are dropped.
+
+    Args:
+        address (str): The path of the Unix socket, replaced if it exists.
+        writer (LogFileWriter): The writer of the log file.
+        batch_size (int): The number of records written at once.
+        flush_interval (float): The maximum delay before received records are written.
+        max_frame_size (int): The size of the largest record accepted, in bytes.
+
+    Usage:
+        # in the gunicorn master, before the workers fork
+        server = SinkServer("/tmp/service.log.sock", LogFileWriter("service.log", 100_000_000))
+        server.start()
+    """
+
+    def __init__(
+        self,
+        address: str,
+        writer: LogFileWriter,
+        batch_size: int = 1000,
+        flush_interval: float = 0.2,
+        max_frame_size: int = DEFAULT_MAX_FRAME_SIZE,
+    ):
+        super().__init__(writer, batch_size, flush_interval)
+        self.address = address
+        self.max_frame_size = max_frame_size
+
+        if os.path.exists(address):
+            os.unlink(address)
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.bind(address)
+        self._socket.listen(128)
+        self._socket.setblocking(False)
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._socket, selectors.EVENT_READ)
+        self._buffers: dict[socket.socket, bytearray] = {}
+
+    def run(self):
+        try:
+            while not self._stopping.is_set():
+                for key, _ in self._selector.select(self.flush_interval):
+                    if key.fileobj is self._socket:
+                        self._accept()
+                    else:
+                        self._receive(key.fileobj)
+                self._flush_due()
+            # drain what the clients already sent
+            for connection in list(self._buffers):
+                self._receive(connection)
+            self._flush()
+        finally:
+            for connection in list(self._buffers):
+                self._disconnect(connection)
+            self._selector.close()
+            self._socket.close()
+            if os.path.exists(self.address):
+                os.unlink(self.address)
+            self.writer.close()
+
+    def _accept(self):
+        try:
+            connection, _ = self._socket.accept()
+        except BlockingIOError:
+            return
+        connection.setblocking(False)
+        self._selector.register(connection, selectors.EVENT_READ)
+        self._buffers[connection] = bytearray()
+
+    def _receive(self, connection: socket.socket):
+        buffer = self._buffers[connection]
+        while True:
+            try:
+                chunk = connection.recv(1 << 16)
+            except (BlockingIOError, TimeoutError):
+                break
+            except OSError:
+                chunk = b""
+            if not chunk:
+                self._disconnect(connection)
+                break
+            buffer += chunk
+            if len(chunk) < 1 << 16:
+                break
+
+        offset = 0
+        while len(buffer) - offset >= _HEADER.size:
+            (length,) = _HEADER.unpack_from(buffer, offset)
+            if length > self.max_frame_size:
+                _oversized.inc()
+                self._disconnect(connection)
+                return
+            end = offset + _HEADER.size + length
+            if len(buffer) < end:
+                break
+            try:
+                record = buffer[offset + _HEADER.size : end].decode("utf-8")
+            except UnicodeDecodeError:
+                # the frame is dropped, its length still delimits the next one
+                _undecodable.inc()
+            else:
+                self._add(record)
+            offset = end
+        del buffer[:offset]
+
+    def _disconnect(self, connection: socket.socket):
+        if connection in self._buffers:
+            self._selector.unregister(connection)
+            del self._buffers[connection]
+        connection.close()
+
+
+class QueueSinkListener(_BatchingThread):
+    """Writer thread receiving records from `QueueSinkHandler`s through a queue.
+
+    Args:
+        queue (Any): A `multiprocessing` or `queue` queue of formatted records.
+        writer (LogFileWriter): The writer of the log file.
+        batch_size (int): The number of records written at once.
+        flush_interval (float): The maximum delay before received records are written.
+
+    Usage:
+        records = multiprocessing.Queue()
+        with QueueSinkListener(records, LogFileWriter("service.log")):
+            with multiprocessing.Pool(initializer=configure_worker, initargs=(records,)) as pool:
+                ...
+    """
+
+    def __init__(
+        self,
+        queue: Any,
+        writer: LogFileWriter,
+        batch_size: int = 1000,
+        flush_interval: float = 0.2,
+    ):
+        super().__init__(writer, batch_size, flush_interval)
+        self.queue = queue
+
+    def run(self):
+        try:
+            while True:
+                try:
+                    record = self.queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    self._flush()
+                    continue
+                if record is None:
+                    break
+                self._add(record)
+                self._flush_due()
+            self._flush()
+        finally:
+            self.writer.close()
+
+    def stop(self, timeout: float | None = None):
+        """Write the queued records and stop the listener."""
+        self.queue.put(None)
+        super().stop(timeout)
+
+
+class SocketSinkHandler(logging.Handler):
+    """Handler sending formatted records to a `SinkServer`.
+
+    The connection is opened lazily and reopened in forked children, so the handler can be
+    created before gunicorn or multiprocessing forks. While the server is unreachable, records
+    are dropped and counted in `dropped`, and reconnection is attempted every
+    `reconnect_interval` seconds.
+
+    Args:
+        address (str): The path of the Unix socket of the server.
+        reconnect_interval (float): The minimum delay between two connection attempts.
+    """
+
+    def __init__(self, address: str, reconnect_interval: float = 1.0):
+        super().__init__()
+        self.address = address
+        self.reconnect_interval = reconnect_interval
+        self.dropped = 0
+        self._socket: socket.socket | None = None
+        self._pid = os.getpid()
+        self._retry_at = 0.0
+
+    def _connect(self) -> socket.socket | None:
+        if self._pid != os.getpid():
+            # the socket was inherited from the parent, writing to it would interleave frames;
+            # closing this process's descriptor leaves the parent's connection open
+            if self._socket is not None:
+                self._socket.close()
+                self._socket = None
+            self._pid = os.getpid()
+            self._retry_at = 0.0
+        if self._socket is None and time.monotonic() >= self._retry_at:
+            connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                connection.connect(self.address)
+            except OSError:
+                connection.close()
+                self._retry_at = time.monotonic() + self.reconnect_interval
+            else:
+                self._socket = connection
+        return self._socket
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            data = self.format(record).encode("utf-8")
+            connection = self._connect()
+            if connection is None:
+                self.dropped += 1
+                _unreachable.inc()
+                return
+            try:
+                connection.sendall(_HEADER.pack(len(data)) + data)
+            except OSError:
+                connection.close()
+                self._socket = None
+                self.dropped += 1
+                _unreachable.inc()
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        with self.lock:
+            if self._socket is not None and self._pid == os.getpid():
+                self._socket.close()
+            self._socket = None
+        super().close()
+
+
+class QueueSinkHandler(logging.handlers.QueueHandler):
+    """Handler putting formatted records, as plain strings, on the queue of a
+    `QueueSinkListener`."""
+
+    def prepare(self, record: logging.LogRecord) -> str:
+        return self.format(record)
@@ -0,0 +1,530 @@
+from __future__ import annotations
+
+__all__ = [
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "MetricsRegistry",
+    "MetricsServer",
+    "FileExporter",
+    "get_registry",
+    "start_exporters",
+]
+
+import abc
+import bisect
+import http.server
+import itertools
+import math
+import os
+import re
+import threading
+from typing import Any, Callable, Iterator, Sequence
+
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+DEFAULT_METRICS_CONFIG = {
+    "file": {
+        "path": None,
+        "interval": 15.0,
+    },
+    "http": {
+        "host": "127.0.0.1",
+        "port": None,
+    },
+}
+
+_NAME_PATTERN = re.compile(r"^[a-zA-Z_:][a-zA-Z0-9_:]*$")
+
+# Values are split in stripes, each thread updating the stripe it was assigned to, so threads
+# only contend when they share a stripe. Reads sum the stripes.
+_STRIPES = 16
+_stripe_locks = [threading.Lock() for _ in range(_STRIPES)]
+_stripe_ids = itertools.count()
+_local = threading.local()
+
+
+def _stripe() -> int:
+    try:
+        return _local.stripe
+    except AttributeError:
+        _local.stripe = next(_stripe_ids) % _STRIPES
+        return _local.stripe
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return (
+        "{"
+        + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+        + "}"
+    )
+
+
+class _CounterValue:
+    __slots__ = ("_values",)
+
+    def __init__(self):
+        self._values = [0.0] * _STRIPES
+
+    def inc(self, amount: float = 1.0):
+        """Increment the counter.
+
+        Args:
+            amount (float): The increment, must not be negative.
+        """
+        if amount < 0:
+            raise ValueError("Counters can only be incremented by non-negative amounts")
+        stripe = _stripe()
+        with _stripe_locks[stripe]:
+            self._values[stripe] += amount
+
+    def get(self) -> float:
+        return sum(self._values)
+
+    def samples(self) -> Iterator[tuple[str, dict[str, str], float]]:
+        yield "", {}, self.get()
+
+
+class _GaugeValue:
+    __slots__ = ("_value", "_function", "_lock")
+
+    def __init__(self):
+        self._value = 0.0
+        self._function: Callable[[], float] | None = None
+        self._lock = threading.Lock()
+
+    def set(self, value: float):
+        with self._lock:
+            self._value = float(value)
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.inc(-amount)
+
+    def set_function(self, function: Callable[[], float] | None):
+        """Read the value from `function` at export time instead of storing it."""
+        self._function = function
+
+    def get(self) -> float:
+        function = self._function
+        return float(function()) if function is not None else self._value
+
+    def samples(self) -> Iterator[tuple[str, dict[str, str], float]]:
+        yield "", {}, self.get()
+
+
+class _HistogramValue:
+    __slots__ = ("buckets", "_counts", "_sums")
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        # per stripe, the count of every bucket then the total count
+        self._counts = [[0] * (len(buckets) + 2) for _ in range(_STRIPES)]
+        self._sums = [0.0] * _STRIPES
+
+    def observe(self, value: float):
+        """Record a value in the first bucket whose upper bound is not lower than it.
+
+        Args:
+            value (float): The value.
+        """
+        index = bisect.bisect_left(self.buckets, value)
+        stripe = _stripe()
+        with _stripe_locks[stripe]:
+            counts = self._counts[stripe]
+            counts[index] += 1
+            counts[-1] += 1
+            self._sums[stripe] += value
+
+    def get(self) -> tuple[list[int], float, int]:
+        """Return the cumulative count of every bucket, `+Inf` included, the sum and the
+        count."""
+        totals = [sum(column) for column in zip(*self._counts)]
+        cumulative = list(itertools.accumulate(totals[:-1]))
+        return cumulative, sum(self._sums), totals[-1]
+
+    def samples(self) -> Iterator[tuple[str, dict[str, str], float]]:
+        cumulative, total, count = self.get()
+        for bound, value in zip((*self.buckets, math.inf), cumulative):
+            yield "_bucket", {"le": _format_value(bound)}, value
+        yield "_sum", {}, total
+        yield "_count", {}, count
+
+
+class _Metric(abc.ABC):
+    """A metric and its children, one per combination of label values."""
+
+    type_name = ""
+
+    def __init__(
+        self, name: str, documentation: str = "", labelnames: Sequence[str] = ()
+    ):
+        if not _NAME_PATTERN.match(name):
+            raise ValueError(f"Invalid metric name: {name}")
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._children[()] = self._default = self._new_child()
+
+    @abc.abstractmethod
+    def _new_child(self):
+        """Create the value of one combination of label values."""
+        raise NotImplementedError
+
+    def labels(self, *values: Any, **labels: Any):
+        """Return the child of a combination of label values, to be kept by hot paths.
+
+        Args:
+            *values (Any): The label values, in the order of `labelnames`.
+            **labels (Any): The label values, by name.
+
+        Returns:
+            The child, with the methods of an unlabelled metric.
+        """
+        if labels:
+            values = tuple(labels[name] for name in self.labelnames)
+        if len(values) != len(self.labelnames) or not self.labelnames:
+            raise ValueError(f"Expected label values for {self.labelnames}")
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def collect(self) -> Iterator[tuple[str, dict[str, str], float]]:
+        for key, child in list(self._children.items()):
+            labels = dict(zip(self.labelnames, key))
+            for suffix, sample_labels, value in child.samples():
+                yield self.name + suffix, labels | sample_labels, value
+
+
+class Counter(_Metric):
+    """A monotonically increasing value, such as a number of requests.
+
+    Increments only lock the stripe of the calling thread.
+    """
+
+    type_name = "counter"
+
+    def _new_child(self) -> _CounterValue:
+        return _CounterValue()
+
+    def inc(self, amount: float = 1.0):
+        self._default.inc(amount)
+
+    def get(self) -> float:
+        return self._default.get()
+
+
+class Gauge(_Metric):
+    """A value that goes up and down, such as a queue size."""
+
+    type_name = "gauge"
+
+    def _new_child(self) -> _GaugeValue:
+        return _GaugeValue()
+
+    def set(self, value: float):
+        self._default.set(value)
+
+    def inc(self, amount: float = 1.0):
+        self._default.inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self._default.dec(amount)
+
+    def set_function(self, function: Callable[[], float] | None):
+        self._default.set_function(function)
+
+    def get(self) -> float:
+        return self._default.get()
+
+
+class Histogram(_Metric):
+    """Counts of observed values in fixed buckets, such as request durations in seconds.
+
+    Args:
+        buckets (Sequence[float]): The upper bounds of the buckets, `+Inf` is implied.
+    """
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str = "",
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.buckets = tuple(
+            sorted(bucket for bucket in buckets if not math.isinf(bucket))
+        )
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+    def get(self) -> tuple[list[int], float, int]:
+        return self._default.get()
+
+
+class MetricsRegistry:
+    """A set of metrics, exported together in the Prometheus text format.
+
+    Usage:
+        registry = get_registry()
+        requests = registry.counter("app_requests_total", "Handled requests", ["route"])
+        requests.labels(route="/users").inc()
+        registry.write("/var/lib/node_exporter/app.prom")
+    """
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(
+        self, metric_type: type[_Metric], name: str, *args, **kwargs
+    ) -> Any:
+        metric = self._metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(name)
+                if metric is None:
+                    metric = self._metrics[name] = metric_type(name, *args, **kwargs)
+        if type(metric) is not metric_type:
+            raise ValueError(
+                f"Metric {name} is already registered as a {metric.type_name}"
+            )
+        return metric
+
+    def counter(
+        self,
+        name: str,
+        documentation: str = "",
+        labelnames: Sequence[str] = (),
+    ) -> Counter:
+        """Return the counter of a name, creating it on first use."""
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str = "",
+        labelnames: Sequence[str] = (),
+    ) -> Gauge:
+        """Return the gauge of a name, creating it on first use."""
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str = "",
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        """Return the histogram of a name, creating it on first use."""
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets)
+
+    def unregister(self, name: str):
+        with self._lock:
+            self._metrics.pop(name, None)
+
+    def get(self, name: str) -> _Metric | None:
+        return self._metrics.get(name)
+
+    def expose(self) -> str:
+        """Return every metric in the Prometheus text exposition format."""
+        lines = []
+        for name, metric in sorted(self._metrics.items()):
+            if metric.documentation:
+                lines.append(f"# HELP {name} {_escape(metric.documentation)}")
+            lines.append(f"# TYPE {name} {metric.type_name}")
+            for sample_name, labels, value in metric.collect():
+                lines.append(
+                    f"{sample_name}{_format_labels(labels)} {_format_value(value)}"
+                )
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str):
+        """Write the metrics to a file atomically, for the node exporter textfile collector.
+
+        Args:
+            path (str): The path of the file.
+        """
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            file.write(self.expose())
+        os.replace(tmp_path, path)
+
+    def serve(self, host: str = "127.0.0.1", port: int = 9100) -> MetricsServer:
+        """Serve the metrics over HTTP from a background thread.
+
+        Args:
+            host (str): The address to listen on.
+            port (int): The port to listen on, 0 for any free port.
+
+        Returns:
+            MetricsServer: The started server.
+        """
+        server = MetricsServer(self, host, port)
+        server.start()
+        return server
+
+
+class _MetricsHandler(http.server.BaseHTTPRequestHandler):
+    registry: MetricsRegistry
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        body = self.server.registry.expose().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+
+class MetricsServer(threading.Thread):
+    """Background thread serving the metrics of a registry on every HTTP GET.
+
+    Args:
+        registry (MetricsRegistry): The registry.
+        host (str): The address to listen on.
+        port (int): The port to listen on, 0 for any free port.
+    """
+
+    def __init__(
+        self, registry: MetricsRegistry, host: str = "127.0.0.1", port: int = 9100
+    ):
+        super().__init__(name="metrics-server", daemon=True)
+        self.httpd = http.server.ThreadingHTTPServer((host, port), _MetricsHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.registry = registry
+
+    @property
+    def address(self) -> tuple[str, int]:
+        return self.httpd.server_address[:2]
+
+    def run(self):
+        self.httpd.serve_forever(poll_interval=0.5)
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.join()
+
+
+class FileExporter(threading.Thread):
+    """Background thread writing the metrics of a registry to a file periodically.
+
+    Args:
+        registry (MetricsRegistry): The registry.
+        path (str): The path of the file.
+        interval (float): The number of seconds between two writes.
+    """
+
+    def __init__(self, registry: MetricsRegistry, path: str, interval: float = 15.0):
+        super().__init__(name="metrics-file-exporter", daemon=True)
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            self.registry.write(self.path)
+
+    def stop(self):
+        """Stop the thread, writing the metrics one last time."""
+        self._stopped.set()
+        self.join()
+        self.registry.write(self.path)
+
+
+_registry = MetricsRegistry()
+
+
+def get_registry() -> MetricsRegistry:
+    """Return the process-wide registry, where the modules of `utils` publish their stats."""
+    return _registry
+
+
+def start_exporters(
+    config: dict[str, Any] | None = None,
+    registry: MetricsRegistry | None = None,
+) -> list[FileExporter | MetricsServer]:
+    """Start the exporters enabled in the `metrics` config section.
+
+    Args:
+        config (dict[str, Any], optional): The section. Defaults to the `metrics` section of the
+            loaded configuration.
+        registry (MetricsRegistry, optional): The registry to export. Defaults to
+            `get_registry()`.
+
+    Returns:
+        list[FileExporter | MetricsServer]: The started exporters, to `stop()` on shutdown.
+
+    Usage:
+        metrics:
+          file:
+            path: /var/lib/node_exporter/service.prom
+            interval: 15
+          http:
+            host: 0.0.0.0
+            port: 9100
+    """
+    from . import configuration, dictionary
+
+    if config is None:
+        config = configuration.get_config().get("metrics", {}) or {}
+    config = dictionary.merge_dicts(DEFAULT_METRICS_CONFIG, config)
+    registry = registry or get_registry()
+
+    exporters: list[FileExporter | MetricsServer] = []
+    if config["file"].get("path"):
+        exporter = FileExporter(
+            registry, config["file"]["path"], config["file"]["interval"]
+        )
+        exporter.start()
+        exporters.append(exporter)
+    if config["http"].get("port") is not None:
+        exporters.append(registry.serve(config["http"]["host"], config["http"]["port"]))
+    return exporters
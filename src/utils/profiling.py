@@ -0,0 +1,474 @@
+from __future__ import annotations
+
+__all__ = [
+    "profiled",
+    "dump_profiles",
+    "snapshot_memory",
+    "start_profiling",
+    "stop_profiling",
+    "toggle_profiling",
+    "install_profiling_signal",
+]
+
+import atexit
+import datetime
+import functools
+import inspect
+import logging
+import marshal
+import os
+import queue
+import random
+import re
+import signal
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from typing import Any, Callable
+
+from . import configuration, logs, metrics
+
+DEFAULT_PROFILING_CONFIG = {
+    "enabled": False,
+    "sample_rate": 0.01,
+    "directory": os.path.join(tempfile.gettempdir(), "profiles"),
+    "dump_every": 1000,
+    "memory_frames": 1,
+    "memory_top": 50,
+    "signal": None,
+    "logger": "utils.profiling",
+    "level": "INFO",
+}
+
+_settings: dict[str, Any] = dict(DEFAULT_PROFILING_CONFIG)
+_enabled = False
+
+_registry = metrics.get_registry()
+_sampled = _registry.counter(
+    "utils_profiling_sampled_calls_total",
+    "Calls profiled by `profiled`",
+)
+_dumps = _registry.counter(
+    "utils_profiling_dumps_total", "Written profiling dumps", ["kind"]
+)
+
+_UNSAFE_CHARACTERS = re.compile(r"[^\w.-]+")
+
+
+def _builtin_key(func: Any) -> tuple[str, int, str]:
+    module = getattr(func, "__module__", None)
+    name = getattr(func, "__qualname__", None) or repr(func)
+    return ("~", 0, f"<built-in method {module}.{name}>" if module else f"<{name}>")
+
+
+class _Profile:
+    """Deterministic profiler of the calls made by one thread, in the format of `pstats`.
+
+    It is installed with `sys.setprofile`, which only sees the thread that installs it, whereas
+    `cProfile` records every thread of the process since Python 3.12. The statistics of each
+    function are `[primitive calls, calls, own time, cumulative time, callers]`, the callers
+    mapping the calling functions to the same counters of the calls they made.
+    """
+
+    __slots__ = ("stats", "calls", "_stack", "_active")
+
+    def __init__(self):
+        self.stats: dict[tuple, list] = {}
+        self.calls = 0
+        # [function, started at, time spent in the callees]
+        self._stack: list[list] = []
+        self._active: dict[tuple, int] = {}
+
+    def dispatch(self, frame, event: str, arg: Any):
+        now = time.perf_counter()
+        if event == "call":
+            code = frame.f_code
+            self._push((code.co_filename, code.co_firstlineno, code.co_name), now)
+        elif event == "c_call":
+            self._push(_builtin_key(arg), now)
+        elif self._stack:
+            self._pop(now)
+
+    def _push(self, key: tuple, now: float):
+        self._stack.append([key, now, 0.0])
+        self._active[key] = self._active.get(key, 0) + 1
+
+    def _pop(self, now: float):
+        key, started, callees = self._stack.pop()
+        elapsed = now - started
+        own = elapsed - callees
+        self._active[key] -= 1
+        # the cumulative time of recursive calls is already in the outermost one
+        outermost = not self._active[key]
+
+        stats = self.stats.get(key)
+        if stats is None:
+            stats = self.stats[key] = [0, 0, 0.0, 0.0, {}]
+        stats[1] += 1
+        stats[2] += own
+        if outermost:
+            stats[0] += 1
+            stats[3] += elapsed
+
+        if self._stack:
+            caller = self._stack[-1]
+            caller[2] += elapsed
+            counters = stats[4].get(caller[0])
+            if counters is None:
+                counters = stats[4][caller[0]] = [0, 0, 0.0, 0.0]
+            counters[0] += 1
+            counters[2] += own
+            if outermost:
+                counters[1] += 1
+                counters[3] += elapsed
+
+    def finish(self):
+        """Drop the calls still running, such as the one uninstalling the profiler."""
+        self._stack.clear()
+        self._active.clear()
+        self.calls += 1
+
+    def merge(self, other: _Profile):
+        for key, (cc, nc, tt, ct, callers) in other.stats.items():
+            stats = self.stats.get(key)
+            if stats is None:
+                stats = self.stats[key] = [0, 0, 0.0, 0.0, {}]
+            stats[0] += cc
+            stats[1] += nc
+            stats[2] += tt
+            stats[3] += ct
+            for caller, counters in callers.items():
+                total = stats[4].setdefault(caller, [0, 0, 0.0, 0.0])
+                for i, value in enumerate(counters):
+                    total[i] += value
+        self.calls += other.calls
+
+    def dump_stats(self, path: str):
+        """Write the statistics in the marshal format read by `pstats.Stats`."""
+        stats = {
+            key: (
+                cc,
+                nc,
+                tt,
+                ct,
+                {caller: tuple(counters) for caller, counters in callers.items()},
+            )
+            for key, (cc, nc, tt, ct, callers) in self.stats.items()
+        }
+        with open(path, "wb") as file:
+            marshal.dump(stats, file)
+
+
+_profiles: dict[str, _Profile] = {}
+_profiles_lock = threading.Lock()
+
+_memory_lock = threading.Lock()
+_memory_baseline: tracemalloc.Snapshot | None = None
+_tracing_started = False
+
+_actions: queue.SimpleQueue[Callable[[], Any] | None] = queue.SimpleQueue()
+_worker: threading.Thread | None = None
+_worker_lock = threading.Lock()
+# `_shutdown` is registered when profiling is first enabled, not when the module is imported
+_shutdown_registered = False
+
+
+def _announce(message: str, path: str, kind: str, **data):
+    _dumps.labels(kind=kind).inc()
+    logger = logs.get_logger(_settings["logger"])
+    logger.log(
+        logging._checkLevel(_settings["level"]),
+        message,
+        path,
+        extra={"data": {"kind": kind, "path": path, **data}},
+    )
+
+
+def _dump_path(name: str, extension: str) -> str:
+    directory = _settings["directory"]
+    os.makedirs(directory, exist_ok=True)
+    timestamp = datetime.datetime.now().strftime("%Y%m%dT%H%M%S%f")
+    file_name = (
+        f"{_UNSAFE_CHARACTERS.sub('_', name)}.{os.getpid()}.{timestamp}.{extension}"
+    )
+    return os.path.join(directory, file_name)
+
+
+def _run_worker():
+    while True:
+        action = _actions.get()
+        if action is None:
+            return
+        try:
+            action()
+        except Exception:  # pylint: disable=broad-exception-caught
+            logging.getLogger(__name__).exception("Profiling action failed")
+
+
+def _submit(action: Callable[[], Any]):
+    """Run `action` in the profiling thread, off the profiled call or the signal handler."""
+    global _worker
+    if _worker is None or not _worker.is_alive():
+        with _worker_lock:
+            if _worker is None or not _worker.is_alive():
+                _worker = threading.Thread(
+                    target=_run_worker, name="profiling", daemon=True
+                )
+                _worker.start()
+    _actions.put(action)
+
+
+def profiled(name: str | None = None) -> Callable[[Callable], Callable]:
+    """Profile a sampled fraction of the calls of a function.
+
+    While profiling is enabled, each call is profiled with the probability `sample_rate`, and
+    the statistics of the sampled calls are accumulated per name. They are written to
+    `<directory>/<name>.<pid>.<time>.pstats` every `dump_every` sampled calls, by
+    `dump_profiles`, and when profiling stops. When profiling is disabled, a call costs a flag
+    check.
+
+    A sampled call is profiled with a `sys.setprofile` hook of its own thread, so the profile
+    only holds the functions that call ran, while calls of other threads go on unprofiled or
+    are sampled into their own profile. `cProfile` cannot attribute time this way: since Python
+    3.12 it records every thread of the process. The hook is slower than `cProfile` and its
+    overhead is paid on every function call and return, so it also skews the profile: functions
+    that make many short calls are over-weighted against functions that spend their time in a
+    few calls or in C code. Calls nested in a sampled call are part of its profile and not
+    sampled themselves, and calls of a thread with another profile hook, such as a debugger,
+    are not sampled.
+
+    Args:
+        name (str, optional): The name of the profile. Defaults to the qualified name of the
+            decorated function.
+
+    Usage:
+        @profiled()
+        def handle(request): ...
+
+        # python -c "import pstats; pstats.Stats('handle.123.20240501T100000000000.pstats')
+        #     .sort_stats('cumulative').print_stats(20)"
+    """
+
+    def decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+            raise TypeError("profiled cannot sample coroutine functions")
+        profile_name = name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if (
+                not _enabled
+                or random.random() >= _settings["sample_rate"]
+                or sys.getprofile() is not None
+            ):
+                return func(*args, **kwargs)
+
+            profile = _Profile()
+            sys.setprofile(profile.dispatch)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                sys.setprofile(None)
+                profile.finish()
+                _sampled.inc()
+                _add_profile(profile_name, profile)
+
+        return wrapper
+
+    return decorator
+
+
+def _add_profile(name: str, profile: _Profile):
+    with _profiles_lock:
+        total = _profiles.get(name)
+        if total is None:
+            total = _profiles[name] = profile
+        else:
+            total.merge(profile)
+        if not _settings["dump_every"] or total.calls < _settings["dump_every"]:
+            return
+        del _profiles[name]
+    _submit(functools.partial(_write_profile, name, total))
+
+
+def _write_profile(name: str, profile: _Profile) -> str:
+    path = _dump_path(name, "pstats")
+    profile.dump_stats(path)
+    _announce("Wrote profile %s", path, "cpu", name=name, calls=profile.calls)
+    return path
+
+
+def dump_profiles() -> list[str]:
+    """Write the statistics of the calls sampled since the last dump, one file per name.
+
+    Returns:
+        list[str]: The paths of the written `.pstats` files.
+    """
+    with _profiles_lock:
+        profiles = dict(_profiles)
+        _profiles.clear()
+    return [_write_profile(name, profile) for name, profile in sorted(profiles.items())]
+
+
+def snapshot_memory() -> str | None:
+    """Take a tracemalloc snapshot and write its difference with the previous one.
+
+    The first call starts tracing memory allocations, with `memory_frames` frames per
+    allocation, and only keeps the snapshot as the baseline. The `memory_top` lines or
+    tracebacks whose allocations grew the most are written to
+    `<directory>/memory.<pid>.<time>.txt`.
+
+    Returns:
+        str | None: The path of the written file, None for the baseline.
+    """
+    global _memory_baseline, _tracing_started
+    with _memory_lock:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(_settings["memory_frames"])
+            _tracing_started = True
+            _memory_baseline = None
+
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            )
+        )
+        previous, _memory_baseline = _memory_baseline, snapshot
+        if previous is None:
+            return None
+
+        key_type = "lineno" if tracemalloc.get_traceback_limit() == 1 else "traceback"
+        differences = snapshot.compare_to(previous, key_type)
+        size_diff = sum(difference.size_diff for difference in differences)
+        path = _dump_path("memory", "txt")
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(f"Total allocated size: {size_diff:+,d} B\n\n")
+            for difference in differences[: _settings["memory_top"]]:
+                file.write(f"{difference}\n")
+                if key_type == "traceback":
+                    file.write("\n".join(difference.traceback.format()) + "\n\n")
+
+    _announce("Wrote memory allocation diff %s", path, "memory", size_diff=size_diff)
+    return path
+
+
+def _stop_memory_tracing():
+    global _memory_baseline, _tracing_started
+    with _memory_lock:
+        if _tracing_started:
+            tracemalloc.stop()
+            _tracing_started = False
+        _memory_baseline = None
+
+
+def start_profiling():
+    """Enable the sampling of `profiled` functions and take the memory baseline."""
+    configure(enabled=True)
+    snapshot_memory()
+
+
+def stop_profiling() -> list[str]:
+    """Disable the sampling, then write the profiles and the memory growth since
+    `start_profiling`.
+
+    Returns:
+        list[str]: The paths of the written files.
+    """
+    configure(enabled=False)
+    paths = dump_profiles()
+    if _memory_baseline is not None:
+        path = snapshot_memory()
+        if path is not None:
+            paths.append(path)
+    _stop_memory_tracing()
+    return paths
+
+
+def toggle_profiling():
+    """Start profiling when it is stopped, else stop it and write the dumps."""
+    if _enabled:
+        stop_profiling()
+    else:
+        start_profiling()
+
+
+def _handle_signal(signum, frame):  # pylint: disable=unused-argument
+    _submit(toggle_profiling)
+
+
+def install_profiling_signal(signum: int | str = "SIGUSR2"):
+    """Toggle profiling when the process receives a signal, such as `kill -USR2 <pid>`.
+
+    Must be called from the main thread.
+
+    Args:
+        signum (int | str): The signal number or name.
+    """
+    if isinstance(signum, str):
+        signum = signal.Signals[signum]
+    signal.signal(signum, _handle_signal)
+
+
+def configure(
+    enabled: bool | None = None,
+    sample_rate: float | None = None,
+    directory: str | None = None,
+    dump_every: int | None = None,
+    logger: str | None = None,
+    level: str | int | None = None,
+) -> dict[str, Any]:
+    """Override the settings of the `profiling` config section.
+
+    Args:
+        enabled (bool, optional): Whether `profiled` functions are sampled.
+        sample_rate (float, optional): The fraction of the calls that are profiled.
+        directory (str, optional): The directory the dumps are written to.
+        dump_every (int, optional): The number of sampled calls of a name written together, 0
+            to only write them on demand.
+        logger (str, optional): The name of the logger announcing the dumps.
+        level (str | int, optional): The level of the announcements.
+
+    Returns:
+        dict[str, Any]: The settings in effect.
+    """
+    global _enabled, _shutdown_registered
+    overrides = {
+        "enabled": enabled,
+        "sample_rate": sample_rate,
+        "directory": directory,
+        "dump_every": dump_every,
+        "logger": logger,
+        "level": level,
+    }
+    _settings.update(
+        {key: value for key, value in overrides.items() if value is not None}
+    )
+    _enabled = bool(_settings["enabled"])
+    if _enabled and not _shutdown_registered:
+        atexit.register(_shutdown)
+        _shutdown_registered = True
+    return dict(_settings)
+
+
+def load_config() -> dict[str, Any]:
+    """Load the settings from the `profiling` config section, installing the `signal` handler
+    when one is configured and this is the main thread."""
+    _settings.clear()
+    _settings.update(DEFAULT_PROFILING_CONFIG)
+    _settings.update(configuration.get_config().get("profiling", {}) or {})
+    settings = configure()
+    if settings["signal"] and threading.current_thread() is threading.main_thread():
+        install_profiling_signal(settings["signal"])
+    return settings
+
+
+def _shutdown():
+    _actions.put(None)
+    if _profiles:
+        dump_profiles()
+
+
+load_config()
@@ -1 +1,15 @@
-from .credential_token import AbstractToken, AbstractTokenFactory, JwtToken, JwtTokenFactory
+from .credential_token import (
+    AbstractToken,
+    AbstractTokenFactory,
+    JwtToken,
+    JwtTokenFactory,
+    get_executor,
+    shutdown_executor,
+)
+from .revocation import (
+    AbstractRevocationStore,
+    BloomFilter,
+    MemoryRevocationStore,
+    RevokedTokenError,
+    SqliteRevocationStore,
+)
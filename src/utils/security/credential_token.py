@@ -1,11 +1,60 @@
 import abc
+import asyncio
+import concurrent.futures
 import dataclasses
+import functools
 import os
+import threading
 from typing import Any
 
 import jwt
 
 from .. import configuration
+from .revocation import AbstractRevocationStore, RevokedTokenError
+
+HMAC_ALGORITHMS = frozenset({"HS256", "HS384", "HS512"})
+DEFAULT_MAX_WORKERS = min(4, os.cpu_count() or 1)
+DEFAULT_INLINE_MAX_TOKEN_SIZE = 8192
+
+_executor: concurrent.futures.ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> concurrent.futures.ThreadPoolExecutor:
+    """Return the process-wide executor used to offload token crypto from the event loop.
+
+    The executor is created lazily on first use and bounded by
+    `security.executor.max_workers` in the configuration (defaults to
+    `min(4, os.cpu_count())`).
+
+    Returns:
+        concurrent.futures.ThreadPoolExecutor: The shared executor.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                config = (
+                    configuration.get_config().get("security", {}).get("executor", {})
+                )
+                _executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=config.get("max_workers", DEFAULT_MAX_WORKERS),
+                    thread_name_prefix="token-crypto",
+                )
+    return _executor
+
+
+def shutdown_executor(wait: bool = True):
+    """Shut down the shared executor. A new one is created on the next offloaded call.
+
+    Args:
+        wait (bool): Whether to wait for pending operations to finish.
+    """
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait)
 
 
 @dataclasses.dataclass
@@ -46,14 +95,46 @@ class AbstractToken(abc.ABC):
 
 
 class AbstractTokenFactory(abc.ABC):
-    """Abstract base class for token factories."""
+    """Abstract base class for token factories.
+
+    `aencode` and `adecode` are the asyncio counterparts of `encode` and `decode`. Cheap
+    operations (an algorithm in `inline_algorithms` and a token no longer than
+    `inline_max_token_size`) run inline on the event loop, everything else is offloaded to the
+    shared executor returned by `get_executor`.
+    """
 
     secret: str
     algorithm: str
+    inline_algorithms: frozenset[str] = HMAC_ALGORITHMS
+    inline_max_token_size: int = DEFAULT_INLINE_MAX_TOKEN_SIZE
 
-    def __init__(self, secret: str, algorithm: str):
+    def __init__(
+        self,
+        secret: str,
+        algorithm: str,
+        inline_algorithms: set[str] | None = None,
+        inline_max_token_size: int | None = None,
+    ):
         self.secret = secret
         self.algorithm = algorithm
+        if inline_algorithms is not None:
+            self.inline_algorithms = frozenset(inline_algorithms)
+        if inline_max_token_size is not None:
+            self.inline_max_token_size = inline_max_token_size
+
+    def should_offload(self, token_size: int = 0) -> bool:
+        """Tell whether an operation is expensive enough to leave the event loop.
+
+        Args:
+            token_size (int): The length of the token being decoded, 0 when encoding.
+
+        Returns:
+            bool: True if the operation should run in the shared executor.
+        """
+        return (
+            self.algorithm not in self.inline_algorithms
+            or token_size > self.inline_max_token_size
+        )
 
     def encode(self, data: dict, *args, **kwargs) -> AbstractToken:
         """Encodes the provided data into a token object using the implemented _encode method.
@@ -89,6 +170,46 @@ class AbstractTokenFactory(abc.ABC):
         data = self._decode(token, *args, **kwargs)
         return data
 
+    async def aencode(self, data: dict, *args, **kwargs) -> AbstractToken:
+        """Asynchronous version of `encode` that does not block the event loop.
+
+        Args:
+            data (dict): The data to be encoded into a token object.
+            *args: Additional positional arguments.
+            **kwargs: Additional keyword arguments.
+
+        Returns:
+            AbstractToken: The encoded token object.
+        """
+        if not self.should_offload():
+            return self.encode(data, *args, **kwargs)
+        return await self._run_in_executor(self.encode, data, *args, **kwargs)
+
+    async def adecode(
+        self, token: AbstractToken | str, *args, **kwargs
+    ) -> dict[str, Any]:
+        """Asynchronous version of `decode` that does not block the event loop.
+
+        Args:
+            token (AbstractToken | str): The token or token object to be decoded.
+            *args: Additional positional arguments.
+            **kwargs: Additional keyword arguments.
+
+        Returns:
+            dict[str, Any]: The decoded data.
+        """
+        raw_token = token.token if isinstance(token, AbstractToken) else token
+        if not self.should_offload(len(raw_token)):
+            return self.decode(token, *args, **kwargs)
+        return await self._run_in_executor(self.decode, token, *args, **kwargs)
+
+    async def _run_in_executor(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            get_executor(),
+            functools.partial(func, *args, **kwargs),
+        )
+
     @abc.abstractmethod
     def _encode(self, data: dict, *args, **kwargs) -> AbstractToken:
         """Abstract method that should be implemented to encode the data into a token object.
@@ -136,17 +257,30 @@ class JwtToken(AbstractToken):
 
 
 class JwtTokenFactory(AbstractTokenFactory):
-    """Factory for creating and decoding JSON Web Tokens (JWTs)."""
+    """Factory for creating and decoding JSON Web Tokens (JWTs).
+
+    When a `revocation_store` is given, `decode` rejects tokens whose `jti` claim has been
+    revoked with `revoke` by raising `RevokedTokenError`.
+    """
 
     def __init__(
         self,
         secret: str | None = None,
         algorithm: str | None = None,
         from_env: bool = False,
+        inline_algorithms: set[str] | None = None,
+        inline_max_token_size: int | None = None,
+        revocation_store: AbstractRevocationStore | None = None,
     ):
-        config = configuration.get_config().get("security", {}).get("context", {})
+        security_config = configuration.get_config().get("security", {})
+        config = security_config.get("context", {})
+        executor_config = security_config.get("executor", {})
         secret = secret or config.get("secret")
         algorithm = algorithm or config.get("algorithm")
+        if inline_algorithms is None:
+            inline_algorithms = executor_config.get("inline_algorithms")
+        if inline_max_token_size is None:
+            inline_max_token_size = executor_config.get("inline_max_token_size")
 
         if from_env:
             secret = os.environ["JWT_SECRET"]
@@ -155,13 +289,45 @@ class JwtTokenFactory(AbstractTokenFactory):
         if secret is None or algorithm is None:
             raise ValueError("secret and algorithm must be set")
 
-        super().__init__(secret, algorithm)
+        super().__init__(secret, algorithm, inline_algorithms, inline_max_token_size)
+        self.revocation_store = revocation_store
+
+    def revoke(self, token: JwtToken | str):
+        """Revoke a token until it expires.
+
+        Args:
+            token (JwtToken | str): The token or token object to be revoked.
+
+        Raises:
+            ValueError: If no revocation store is set or the token has no `jti` claim.
+            jwt.InvalidTokenError: If the token cannot be decoded.
+        """
+        if self.revocation_store is None:
+            raise ValueError("revocation_store must be set to revoke tokens")
+
+        data = self._decode_claims(token)
+        jti = data.get("jti")
+        if jti is None:
+            raise ValueError("token has no jti claim")
+        if not isinstance(jti, str):
+            raise jwt.InvalidTokenError("jti claim must be a string")
+        self.revocation_store.revoke(jti, data.get("exp"))
 
     def _encode(self, data: dict, *args, **kwargs) -> JwtToken:
         token = jwt.encode(data, self.secret, self.algorithm)
         return JwtToken(data=data, token=token)
 
     def _decode(self, token: JwtToken | str, *args, **kwargs) -> dict[str, Any]:
+        data = self._decode_claims(token)
+        if self.revocation_store is not None:
+            jti = data.get("jti")
+            if jti is not None and not isinstance(jti, str):
+                raise jwt.InvalidTokenError("jti claim must be a string")
+            if jti is not None and self.revocation_store.is_revoked(jti):
+                raise RevokedTokenError(f"Token {jti} has been revoked")
+        return data
+
+    def _decode_claims(self, token: JwtToken | str) -> dict[str, Any]:
         if isinstance(token, JwtToken):
             token = token.token
         data = jwt.decode(token, self.secret, [self.algorithm])
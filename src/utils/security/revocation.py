@@ -0,0 +1,343 @@
+import abc
+import hashlib
+import heapq
+import math
+import sqlite3
+import threading
+import time
+from typing import Iterator
+
+import jwt
+
+from .. import metrics
+
+DEFAULT_CAPACITY = 100_000
+DEFAULT_ERROR_RATE = 0.001
+DEFAULT_EVICTION_INTERVAL = 60.0
+
+_registry = metrics.get_registry()
+_checks = _registry.counter(
+    "utils_revocation_checks_total",
+    "Revocation checks, by the layer that answered them",
+    ["result"],
+)
+_bloom_misses = _checks.labels(result="bloom_miss")
+_store_misses = _checks.labels(result="store_miss")
+_revoked_hits = _checks.labels(result="revoked")
+_revocations = _registry.counter("utils_revocations_total", "Revoked token ids")
+_evictions = _registry.counter(
+    "utils_revocation_evictions_total", "Evicted expired token ids"
+)
+_rebuilds = _registry.counter(
+    "utils_revocation_bloom_rebuilds_total", "Bloom filter rebuilds"
+)
+
+
+class RevokedTokenError(jwt.InvalidTokenError):
+    """Raised when decoding a token whose `jti` claim has been revoked."""
+
+
+def _check_jti(jti: str):
+    if not isinstance(jti, str):
+        raise TypeError(f"jti must be a string, not {type(jti).__name__}")
+
+
+class BloomFilter:
+    """A fixed-size Bloom filter over strings.
+
+    Args:
+        capacity (int): The number of items the filter is sized for.
+        error_rate (float): The expected false positive rate at `capacity` items.
+
+    Note:
+        - Membership tests never return false negatives, so a miss proves the item was never
+          added.
+        - Items cannot be removed; rebuild the filter to drop them.
+    """
+
+    def __init__(
+        self,
+        capacity: int = DEFAULT_CAPACITY,
+        error_rate: float = DEFAULT_ERROR_RATE,
+    ):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1")
+
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> Iterator[int]:
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: str):
+        """Add an item to the filter.
+
+        Args:
+            item (str): The item to add.
+        """
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+
+class AbstractRevocationStore(abc.ABC):
+    """Abstract base class for stores of revoked token ids (`jti` claims).
+
+    Every revoked id is also added to an in-memory Bloom filter, so `is_revoked` only reaches the
+    backing set when the filter reports a possible hit. Entries expire together with the token
+    they revoke and are evicted lazily, at most once per `eviction_interval` seconds.
+
+    Args:
+        capacity (int): The initial number of ids the Bloom filter is sized for. The filter is
+            resized when it is exceeded.
+        error_rate (float): The false positive rate of the Bloom filter.
+        eviction_interval (float): The minimum number of seconds between two evictions.
+    """
+
+    def __init__(
+        self,
+        capacity: int = DEFAULT_CAPACITY,
+        error_rate: float = DEFAULT_ERROR_RATE,
+        eviction_interval: float = DEFAULT_EVICTION_INTERVAL,
+    ):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.eviction_interval = eviction_interval
+        self.bloom = BloomFilter(capacity, error_rate)
+        # number of ids added to the filter, telling when it is saturated
+        self._bloom_count = 0
+        self._lock = threading.RLock()
+        self._last_eviction = time.time()
+
+    def revoke(self, jti: str, expires_at: float | None = None):
+        """Revoke a token id.
+
+        Args:
+            jti (str): The token id.
+            expires_at (float, optional): The token expiry as a unix timestamp. The entry is kept
+                forever when it is None.
+        """
+        _check_jti(jti)
+        with self._lock:
+            self._add(jti, expires_at)
+            self.bloom.add(jti)
+            self._bloom_count += 1
+            _revocations.inc()
+            if self._bloom_count > self.capacity:
+                self.capacity *= 2
+                self.rebuild()
+        self._maybe_evict()
+
+    def is_revoked(self, jti: str) -> bool:
+        """Check whether a token id has been revoked.
+
+        Args:
+            jti (str): The token id.
+
+        Returns:
+            bool: True if the id is revoked and its entry has not expired yet.
+        """
+        _check_jti(jti)
+        self._sync()
+        if jti not in self.bloom:
+            _bloom_misses.inc()
+            return False
+        revoked = self._contains(jti, time.time())
+        (_revoked_hits if revoked else _store_misses).inc()
+        return revoked
+
+    def evict_expired(self, now: float | None = None) -> int:
+        """Remove the entries whose token has expired and rebuild the Bloom filter.
+
+        Args:
+            now (float, optional): The current unix timestamp. Defaults to `time.time()`.
+
+        Returns:
+            int: The number of evicted entries.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            self._last_eviction = now
+            evicted = self._evict(now)
+            _evictions.inc(evicted)
+            if evicted:
+                self.rebuild()
+        return evicted
+
+    def rebuild(self):
+        """Rebuild the Bloom filter from the backing set."""
+        with self._lock:
+            _rebuilds.inc()
+            jtis = list(self._iter_ids())
+            while len(jtis) > self.capacity:
+                self.capacity *= 2
+            bloom = BloomFilter(self.capacity, self.error_rate)
+            for jti in jtis:
+                bloom.add(jti)
+            self.bloom = bloom
+            self._bloom_count = len(jtis)
+
+    def _sync(self):
+        """Rebuild the Bloom filter when the backing set was changed by another store."""
+
+    def _maybe_evict(self):
+        if time.time() - self._last_eviction >= self.eviction_interval:
+            self.evict_expired()
+
+    @abc.abstractmethod
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def _add(self, jti: str, expires_at: float | None):
+        """Store a revoked id in the backing set."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def _contains(self, jti: str, now: float) -> bool:
+        """Authoritative lookup of a non-expired id in the backing set."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def _evict(self, now: float) -> int:
+        """Remove the entries expired at `now` and return how many were removed."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def _iter_ids(self) -> Iterator[str]:
+        """Iterate over every id of the backing set."""
+        raise NotImplementedError
+
+
+class MemoryRevocationStore(AbstractRevocationStore):
+    """Revocation store backed by a dict, with a heap ordering entries by expiry."""
+
+    def __init__(self, *args, **kwargs):
+        self._expiries: dict[str, float | None] = {}
+        self._heap: list[tuple[float, str]] = []
+        super().__init__(*args, **kwargs)
+
+    def __len__(self) -> int:
+        return len(self._expiries)
+
+    def _add(self, jti: str, expires_at: float | None):
+        self._expiries[jti] = expires_at
+        if expires_at is not None:
+            heapq.heappush(self._heap, (expires_at, jti))
+
+    def _contains(self, jti: str, now: float) -> bool:
+        if jti not in self._expiries:
+            return False
+        expires_at = self._expiries[jti]
+        return expires_at is None or expires_at > now
+
+    def _evict(self, now: float) -> int:
+        evicted = 0
+        while self._heap and self._heap[0][0] <= now:
+            expires_at, jti = heapq.heappop(self._heap)
+            # skip heap entries superseded by a later revoke of the same id
+            if self._expiries.get(jti, None) == expires_at:
+                del self._expiries[jti]
+                evicted += 1
+        return evicted
+
+    def _iter_ids(self) -> Iterator[str]:
+        return iter(list(self._expiries))
+
+
+class SqliteRevocationStore(AbstractRevocationStore):
+    """Revocation store backed by a local SQLite database.
+
+    The database file can be shared by every process of the host. SQLite bumps the
+    `data_version` of a connection whenever another connection commits to the file, so each
+    lookup compares it with the version the Bloom filter was built at, and rebuilds the filter
+    when another process revoked or evicted ids.
+
+    Args:
+        path (str): The database file. Defaults to an in-memory database.
+        *args: Additional positional arguments for `AbstractRevocationStore`.
+        **kwargs: Additional keyword arguments for `AbstractRevocationStore`.
+    """
+
+    def __init__(self, path: str = ":memory:", *args, **kwargs):
+        self.path = path
+        self.connection = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self.connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS revoked_tokens (
+                jti TEXT PRIMARY KEY,
+                expires_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS revoked_tokens_expires_at
+                ON revoked_tokens (expires_at);
+            """
+        )
+        self._data_version = None
+        super().__init__(*args, **kwargs)
+        self.rebuild()
+
+    def _get_data_version(self) -> int:
+        (version,) = self.connection.execute("PRAGMA data_version").fetchone()
+        return version
+
+    def rebuild(self):
+        with self._lock:
+            self._data_version = self._get_data_version()
+            super().rebuild()
+
+    def _sync(self):
+        with self._lock:
+            if self._get_data_version() != self._data_version:
+                self.rebuild()
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self.connection.execute(
+                "SELECT COUNT(*) FROM revoked_tokens"
+            ).fetchone()
+        return count
+
+    def _add(self, jti: str, expires_at: float | None):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO revoked_tokens (jti, expires_at) VALUES (?, ?)",
+            (jti, expires_at),
+        )
+
+    def _contains(self, jti: str, now: float) -> bool:
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT 1 FROM revoked_tokens WHERE jti = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (jti, now),
+            ).fetchone()
+        return row is not None
+
+    def _evict(self, now: float) -> int:
+        cursor = self.connection.execute(
+            "DELETE FROM revoked_tokens WHERE expires_at <= ?",
+            (now,),
+        )
+        return cursor.rowcount
+
+    def _iter_ids(self) -> Iterator[str]:
+        rows = self.connection.execute("SELECT jti FROM revoked_tokens").fetchall()
+        return (jti for (jti,) in rows)
+
+    def close(self):
+        """Close the database connection."""
+        self.connection.close()
@@ -2,4 +2,6 @@ from .databases import *
 from .rest import *
 from .states import *
 from .api import *
+from .load import *
+from .cassette import *
 from .fixtures import *
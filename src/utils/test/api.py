@@ -1,18 +1,43 @@
+import asyncio
+import concurrent.futures
 import dataclasses
+import functools
 import http
 import logging
-from typing import Callable, List, Any
+import threading
+from typing import Any, Callable, Coroutine, Iterable, List, TypeVar
 
 import httpx
 import pydantic
-from utils import dictionary
+from utils import dictionary, io
 
 logger = logging.getLogger(__file__)
 
+T = TypeVar("T")
+
+
+def schema_type(schema: Any) -> Any:
+    """Normalize a body schema to a type: model instances become their class and `[Model]`
+    becomes `list[Model]`."""
+    if isinstance(schema, list):
+        return list[schema_type(schema[0])] if schema else list
+    if isinstance(schema, pydantic.BaseModel):
+        return type(schema)
+    return schema
+
+
+@functools.lru_cache(maxsize=None)
+def _get_type_adapter(schema: Any) -> pydantic.TypeAdapter:
+    return pydantic.TypeAdapter(schema)
+
+
+def get_type_adapter(schema: Any) -> pydantic.TypeAdapter:
+    """Return the compiled `TypeAdapter` of a body schema, built once per schema type."""
+    return _get_type_adapter(schema_type(schema))
+
 
 @dataclasses.dataclass
 class ExpectedResponse:
-
     status_code: http.HTTPStatus = http.HTTPStatus.OK
     headers: dict[str, str] = None
     header_schema: dict[str, type] = None
@@ -33,7 +58,8 @@ class ExpectedResponse:
     def validate_headers(
         self,
         response: httpx.Response,
-    ): ...
+    ):
+        ...
 
     def validate_body(
         self,
@@ -42,17 +68,75 @@ class ExpectedResponse:
         if self.body_schema is None:
             return
 
-        if isinstance(self.body_schema, list):
-            self.body_schema = pydantic.TypeAdapter(self.body_schema)
-            self.body_schema.validate(response.json())
-            return
-        self.body_schema.model_validate(response.json())
+        get_type_adapter(self.body_schema).validate_json(response.content)
         if self.body is None:
             return
-        result, key = dictionary.is_subdict(self.body, response.json())
 
-        assert result
-        assert key
+        data = response.json()
+        if not isinstance(data, dict):
+            return
+        result, key = dictionary.is_subdict(self.body, data)
+
+        assert result, f"Unexpected value for {key!r} in response body"
+
+    def validate_stream(
+        self,
+        response: httpx.Response,
+        max_failures: int = 10,
+    ) -> int:
+        """Validate a streamed JSON array response against a list `body_schema`, see
+        `validate_streaming_body`.
+
+        Returns:
+            int: The number of validated items.
+        """
+        assert response.status_code == self.status_code
+        self.validate_headers(response)
+
+        body_type = schema_type(self.body_schema)
+        if getattr(body_type, "__origin__", None) is not list:
+            raise ValueError("validate_stream requires a list body_schema")
+        (item_schema,) = body_type.__args__
+        return validate_streaming_body(response, item_schema, max_failures)
+
+
+def validate_streaming_body(
+    response: httpx.Response,
+    item_schema: Any,
+    max_failures: int = 10,
+) -> int:
+    """Validate a JSON array response item by item while it is being received.
+
+    Items are split from `response.iter_bytes()` by `io.iter_json_array` and validated from
+    bytes, so memory stays bounded by the size of one item. Use it with a streamed response,
+    e.g. `client.stream(...)`, for bodies too large to be loaded at once.
+
+    Args:
+        response (httpx.Response): The response, usually not read yet.
+        item_schema (Any): The schema of one item of the array.
+        max_failures (int): Stop after this many invalid items.
+
+    Returns:
+        int: The number of validated items.
+
+    Raises:
+        AssertionError: If some items are invalid, reporting the first `max_failures` of them.
+        ValueError: If the body is not a JSON array.
+    """
+    adapter = get_type_adapter(item_schema)
+    failures: list[str] = []
+    count = 0
+    for index, item in enumerate(io.iter_json_array(response.iter_bytes())):
+        count += 1
+        try:
+            adapter.validate_json(item)
+        except pydantic.ValidationError as ex:
+            failures.append(f"item {index}: {ex}")
+            if len(failures) >= max_failures:
+                break
+
+    assert not failures, "Invalid items in response body:\n" + "\n".join(failures)
+    return count
 
 
 def validate_response(
@@ -63,6 +147,7 @@ def validate_response(
 
 
 Schema = dict[str, Callable[..., Any]]
+Behavior = str | dict[str, Any]
 
 
 def validate_is_schema(obj: object):
@@ -76,7 +161,25 @@ def validate_is_schema(obj: object):
             raise ValueError(f"Expected a callable value, got {type(value)}")
 
 
+def behavior_to_kwargs(behavior: Behavior) -> dict[str, Any]:
+    """Normalize a behavior name to the keyword arguments of `TestOrchestrator.get_response`."""
+    if isinstance(behavior, str):
+        return {"behavior": behavior}
+    return behavior
+
+
 class TestOrchestrator:
+    """Drives the behaviors of an API under test.
+
+    `run_many` and `arun_many` send independent behaviors concurrently. They reuse the
+    connection pool of `client` (from a thread pool) or of `async_client` (from the event loop),
+    so keep-alive and HTTP/2 connections are shared between requests.
+
+    The connections of `async_client` are bound to the event loop that opened them, so the
+    synchronous entry points, `run_many` and `load.run_load`, run every coroutine on one event
+    loop owned by the orchestrator, in a background thread started on first use and stopped by
+    `close`. Use `async_client` either from them or from your own event loop, not both.
+    """
 
     __test__: bool = False
 
@@ -87,12 +190,55 @@ class TestOrchestrator:
         request_body_factory: dict[str, Schema],
         default_value_factory: dict[str, dict[str, Any]],
         response_schema_factory: dict[str, pydantic.BaseModel],
+        async_client: httpx.AsyncClient | None = None,
     ):
         self.client = client
+        self.async_client = async_client
         self.url_factory = url_factory
         self._request_body_factory = request_body_factory
         self.default_value_factory = default_value_factory
         self.response_schema_factory = response_schema_factory
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread: threading.Thread | None = None
+        self._loop_lock = threading.Lock()
+
+    def run_coroutine(self, coroutine: Coroutine[Any, Any, T]) -> T:
+        """Run a coroutine on the event loop of the orchestrator and wait for its result.
+
+        Args:
+            coroutine (Coroutine): The coroutine, usually using `async_client`.
+
+        Returns:
+            T: The result of the coroutine.
+        """
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(
+                    target=self._loop.run_forever,
+                    name="test-orchestrator-loop",
+                    daemon=True,
+                )
+                self._loop_thread.start()
+            loop = self._loop
+        return asyncio.run_coroutine_threadsafe(coroutine, loop).result()
+
+    def close(self):
+        """Stop the event loop of the orchestrator; the clients are left open."""
+        with self._loop_lock:
+            loop, self._loop = self._loop, None
+            thread, self._loop_thread = self._loop_thread, None
+        if loop is None:
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
 
     @property
     def request_body_factory(self) -> dict[str, Schema]:
@@ -114,20 +260,34 @@ class TestOrchestrator:
             return schema
         return {key: value() for key, value in schema.items()}
 
-    def get_response(
+    def build_request(
         self,
         behavior: str,
         url: str = None,
         method: str = None,
         url_kwargs: dict[str, Any] = None,
         request_body: dict[str, Any] = None,
-    ) -> httpx.Response:
+    ) -> tuple[str, str, dict[str, Any] | None]:
         if url is None:
             url, method = self.get_url(behavior)
-        if url_kwargs is None:
+        if url_kwargs is not None:
             url = url.format(**url_kwargs)
         if request_body is None:
             request_body = self.make_request_body(behavior)
+
+        return method, url, request_body
+
+    def get_response(
+        self,
+        behavior: str,
+        url: str = None,
+        method: str = None,
+        url_kwargs: dict[str, Any] = None,
+        request_body: dict[str, Any] = None,
+    ) -> httpx.Response:
+        method, url, request_body = self.build_request(
+            behavior, url, method, url_kwargs, request_body
+        )
         response = self.client.request(
             method=method,
             url=url,
@@ -136,6 +296,97 @@ class TestOrchestrator:
 
         return response
 
+    async def aget_response(
+        self,
+        behavior: str,
+        url: str = None,
+        method: str = None,
+        url_kwargs: dict[str, Any] = None,
+        request_body: dict[str, Any] = None,
+    ) -> httpx.Response:
+        if self.async_client is None:
+            raise ValueError("async_client is required for asynchronous requests")
+
+        method, url, request_body = self.build_request(
+            behavior, url, method, url_kwargs, request_body
+        )
+        response = await self.async_client.request(
+            method=method,
+            url=url,
+            json=request_body,
+        )
+
+        return response
+
+    def run_many(
+        self,
+        behaviors: Iterable[Behavior],
+        concurrency: int = 8,
+        return_exceptions: bool = False,
+    ) -> list[httpx.Response | Exception]:
+        """Send independent behaviors concurrently and collect the responses in order.
+
+        Uses `arun_many` on the event loop of the orchestrator when an `async_client` is set,
+        otherwise `client` from a thread pool. Blocks until every response is received, so
+        await `arun_many` from a running event loop instead.
+
+        Args:
+            behaviors (Iterable[Behavior]): Behavior names, or keyword arguments of
+                `get_response`.
+            concurrency (int): The maximum number of requests in flight.
+            return_exceptions (bool): Return the exception of a failed request in place of its
+                response instead of raising it.
+
+        Returns:
+            list[httpx.Response | Exception]: The responses, in the order of `behaviors`.
+        """
+        if self.async_client is not None:
+            return self.run_coroutine(
+                self.arun_many(behaviors, concurrency, return_exceptions)
+            )
+
+        def send(kwargs: dict[str, Any]) -> httpx.Response | Exception:
+            try:
+                return self.get_response(**kwargs)
+            except Exception as ex:
+                if not return_exceptions:
+                    raise
+                return ex
+
+        requests = [behavior_to_kwargs(behavior) for behavior in behaviors]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+            return list(executor.map(send, requests))
+
+    async def arun_many(
+        self,
+        behaviors: Iterable[Behavior],
+        concurrency: int = 8,
+        return_exceptions: bool = False,
+    ) -> list[httpx.Response | Exception]:
+        """Asynchronous version of `run_many`, sending requests with `async_client`.
+
+        Args:
+            behaviors (Iterable[Behavior]): Behavior names, or keyword arguments of
+                `aget_response`.
+            concurrency (int): The maximum number of requests in flight.
+            return_exceptions (bool): Return the exception of a failed request in place of its
+                response instead of raising it.
+
+        Returns:
+            list[httpx.Response | Exception]: The responses, in the order of `behaviors`.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def send(kwargs: dict[str, Any]) -> httpx.Response:
+            async with semaphore:
+                return await self.aget_response(**kwargs)
+
+        requests = [behavior_to_kwargs(behavior) for behavior in behaviors]
+        return await asyncio.gather(
+            *(send(kwargs) for kwargs in requests),
+            return_exceptions=return_exceptions,
+        )
+
     def make_expected_response(
         self,
         behavior: str = None,
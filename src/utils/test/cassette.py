@@ -0,0 +1,294 @@
+import base64
+import enum
+import gzip
+import hashlib
+import json
+import os
+import pathlib
+import threading
+from typing import Any
+
+import httpx
+
+# headers describing the encoding of the original payload, which is stored decoded
+_DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+
+class CassetteMode(enum.StrEnum):
+    """How a cassette treats requests.
+
+    RECORD: always send requests to the live transport and record the responses, replacing the
+        existing recording.
+    REPLAY: only serve recorded responses, never reach the network.
+    AUTO: serve recorded responses, record the requests that were never seen.
+    """
+
+    RECORD = "record"
+    REPLAY = "replay"
+    AUTO = "auto"
+
+
+class CassetteMissError(LookupError):
+    """Raised in replay mode for a request that was never recorded."""
+
+
+def request_key(request: httpx.Request, match_body: bool = True) -> str:
+    """Index key of a request: its method, URL and the hash of its body.
+
+    Args:
+        request (httpx.Request): The request, with its content read.
+        match_body (bool): Whether the body is part of the key.
+
+    Returns:
+        str: The key.
+    """
+    body_hash = hashlib.blake2b(request.content if match_body else b"", digest_size=16)
+    return f"{request.method} {request.url} {body_hash.hexdigest()}"
+
+
+class Cassette:
+    """A recorded set of HTTP exchanges, replayed in place of a live server.
+
+    Exchanges are kept in memory in a dict keyed by `request_key`, so looking a request up is
+    O(1), and saved to a gzip-compressed JSON lines file. When a request was recorded several
+    times, its responses are replayed in order, the last one being repeated.
+
+    New recordings are written by `save`, called by `close`, when leaving the `with` block, and
+    when a client of the cassette is closed. A cassette used without any of them records
+    nothing to disk.
+
+    Args:
+        path (str | os.PathLike): The cassette file, loaded if it exists.
+        mode (CassetteMode | str): See `CassetteMode`.
+        match_body (bool): Whether requests with different bodies are told apart. Disable it
+            when request bodies hold random values.
+
+    Usage:
+        with Cassette("tests/data/cassettes/users.jsonl.gz", mode="auto") as cassette:
+            orchestrator = TestOrchestrator(
+                client=cassette.client(base_url="http://localhost:8000"),
+                ...
+            )
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        mode: CassetteMode | str = CassetteMode.AUTO,
+        match_body: bool = True,
+    ):
+        self.path = pathlib.Path(path)
+        self.mode = CassetteMode(mode)
+        self.match_body = match_body
+        self.entries: dict[str, list[dict[str, Any]]] = {}
+        self.modified = False
+        self._positions: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        if self.mode != CassetteMode.RECORD and self.path.exists():
+            self.load()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Save the new recordings, if any."""
+        if self.modified:
+            self.save()
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self.entries.values())
+
+    def load(self):
+        """Load the recorded exchanges from `path`."""
+        entries: dict[str, list[dict[str, Any]]] = {}
+        with gzip.open(self.path, "rt", encoding="utf-8") as file:
+            for line in file:
+                entry = json.loads(line)
+                entries.setdefault(entry["key"], []).append(entry)
+        with self._lock:
+            self.entries = entries
+            self._positions = {}
+
+    def save(self):
+        """Write the recorded exchanges to `path`, atomically."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+        with self._lock:
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as file:
+                for entries in self.entries.values():
+                    for entry in entries:
+                        file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+            self.modified = False
+        os.replace(tmp_path, self.path)
+
+    def play(self, request: httpx.Request) -> httpx.Response | None:
+        """Return the recorded response of a request.
+
+        Args:
+            request (httpx.Request): The request.
+
+        Returns:
+            httpx.Response | None: The response, None if the request was never recorded.
+        """
+        key = request_key(request, self.match_body)
+        with self._lock:
+            entries = self.entries.get(key)
+            if not entries:
+                return None
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+            entry = entries[min(position, len(entries) - 1)]
+
+        return httpx.Response(
+            status_code=entry["status_code"],
+            headers=entry["headers"],
+            content=base64.b64decode(entry["content"]),
+            request=request,
+        )
+
+    def record(self, request: httpx.Request, response: httpx.Response):
+        """Record an exchange; the response content must have been read.
+
+        Args:
+            request (httpx.Request): The request.
+            response (httpx.Response): Its response.
+        """
+        key = request_key(request, self.match_body)
+        entry = {
+            "key": key,
+            "method": request.method,
+            "url": str(request.url),
+            "status_code": response.status_code,
+            "headers": [
+                [name, value]
+                for name, value in response.headers.multi_items()
+                if name.lower() not in _DROPPED_HEADERS
+            ],
+            "content": base64.b64encode(response.content).decode("ascii"),
+        }
+        with self._lock:
+            self.entries.setdefault(key, []).append(entry)
+            self.modified = True
+
+    def transport(
+        self,
+        transport: httpx.BaseTransport | None = None,
+        async_transport: httpx.AsyncBaseTransport | None = None,
+    ) -> httpx.BaseTransport:
+        """Return a transport serving this cassette.
+
+        In replay mode this is an `httpx.MockTransport`, so no server needs to be running.
+
+        Args:
+            transport (httpx.BaseTransport, optional): The live transport of sync clients.
+                Defaults to `httpx.HTTPTransport()`.
+            async_transport (httpx.AsyncBaseTransport, optional): The live transport of async
+                clients. Defaults to `httpx.AsyncHTTPTransport()`.
+
+        Returns:
+            httpx.BaseTransport: The transport, usable by sync and async clients.
+        """
+        if self.mode == CassetteMode.REPLAY:
+            return httpx.MockTransport(self._replay)
+        return CassetteTransport(self, transport, async_transport)
+
+    def client(self, **kwargs) -> httpx.Client:
+        """Return an `httpx.Client` going through `transport()`."""
+        return httpx.Client(
+            transport=self.transport(kwargs.pop("transport", None)), **kwargs
+        )
+
+    def async_client(self, **kwargs) -> httpx.AsyncClient:
+        """Return an `httpx.AsyncClient` going through `transport()`."""
+        transport = self.transport(async_transport=kwargs.pop("transport", None))
+        return httpx.AsyncClient(transport=transport, **kwargs)
+
+    def _replay(self, request: httpx.Request) -> httpx.Response:
+        response = self.play(request)
+        if response is None:
+            raise CassetteMissError(
+                f"No recorded response for {request.method} {request.url}"
+            )
+        return response
+
+
+class CassetteTransport(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    """Transport replaying the exchanges of a cassette and recording the others live.
+
+    Args:
+        cassette (Cassette): The cassette.
+        transport (httpx.BaseTransport, optional): The live transport of sync clients.
+        async_transport (httpx.AsyncBaseTransport, optional): The live transport of async clients.
+    """
+
+    def __init__(
+        self,
+        cassette: Cassette,
+        transport: httpx.BaseTransport | None = None,
+        async_transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self.cassette = cassette
+        self._transport = transport
+        self._async_transport = async_transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        request.read()
+        if self.cassette.mode == CassetteMode.AUTO:
+            response = self.cassette.play(request)
+            if response is not None:
+                return response
+
+        if self._transport is None:
+            self._transport = httpx.HTTPTransport()
+        response = self._transport.handle_request(request)
+        content = response.read()
+        response.close()
+        self.cassette.record(request, response)
+        return self._copy(response, content, request)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        if self.cassette.mode == CassetteMode.AUTO:
+            response = self.cassette.play(request)
+            if response is not None:
+                return response
+
+        if self._async_transport is None:
+            self._async_transport = httpx.AsyncHTTPTransport()
+        response = await self._async_transport.handle_async_request(request)
+        content = await response.aread()
+        await response.aclose()
+        self.cassette.record(request, response)
+        return self._copy(response, content, request)
+
+    def close(self):
+        if self._transport is not None:
+            self._transport.close()
+        self.cassette.close()
+
+    async def aclose(self):
+        if self._async_transport is not None:
+            await self._async_transport.aclose()
+        self.cassette.close()
+
+    def _copy(
+        self,
+        response: httpx.Response,
+        content: bytes,
+        request: httpx.Request,
+    ) -> httpx.Response:
+        headers = [
+            (name, value)
+            for name, value in response.headers.multi_items()
+            if name.lower() not in _DROPPED_HEADERS
+        ]
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=headers,
+            content=content,
+            request=request,
+        )
@@ -1,7 +1,104 @@
-from typing import Any
+import contextlib
+import itertools
+import os
+import threading
+import weakref
+from typing import Any, Iterable, Iterator
 
 import sqlalchemy
 
+from utils import io
+
+DEFAULT_CHUNK_SIZE = 500
+DEFAULT_BATCH_SIZE = 1000
+
+_metadata: weakref.WeakKeyDictionary[
+    sqlalchemy.engine.Engine, sqlalchemy.MetaData
+] = weakref.WeakKeyDictionary()
+_metadata_lock = threading.Lock()
+
+
+def reflect_table(
+    conn: sqlalchemy.engine.Connection,
+    table: str,
+) -> sqlalchemy.Table:
+    """Reflect a table, once per engine.
+
+    Args:
+        conn (sqlalchemy.engine.Connection): A connection of the engine.
+        table (str): The name of the table.
+
+    Returns:
+        sqlalchemy.Table: The reflected table.
+    """
+    with _metadata_lock:
+        metadata = _metadata.setdefault(conn.engine, sqlalchemy.MetaData())
+        if table not in metadata.tables:
+            sqlalchemy.Table(table, metadata, autoload_with=conn)
+        return metadata.tables[table]
+
+
+def enable_savepoints(engine: sqlalchemy.engine.Engine):
+    """Make the pysqlite driver emit BEGIN itself so SAVEPOINTs work; no-op on other dialects.
+
+    Args:
+        engine (sqlalchemy.engine.Engine): The engine to patch.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+
+    @sqlalchemy.event.listens_for(engine, "connect")
+    def _disable_pysqlite_transactions(dbapi_connection, _):
+        dbapi_connection.isolation_level = None
+
+    @sqlalchemy.event.listens_for(engine, "begin")
+    def _emit_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+
+def create_engine(uri: str, **kwargs) -> sqlalchemy.engine.Engine:
+    """Create a SQLAlchemy engine able to run SAVEPOINTs.
+
+    Args:
+        uri (str): The database URI.
+        **kwargs: Additional keyword arguments for `sqlalchemy.create_engine`.
+
+    Returns:
+        sqlalchemy.engine.Engine: The engine.
+    """
+    engine = sqlalchemy.create_engine(uri, **kwargs)
+    enable_savepoints(engine)
+    return engine
+
+
+@contextlib.contextmanager
+def rollback_scope(
+    engine: sqlalchemy.engine.Engine,
+) -> Iterator[sqlalchemy.engine.Connection]:
+    """Yield a connection inside a transaction and a SAVEPOINT, rolled back on exit.
+
+    Everything written through the connection, including commits of sessions bound with
+    `join_transaction_mode="create_savepoint"`, is discarded when the scope exits.
+
+    Args:
+        engine (sqlalchemy.engine.Engine): The engine, see `create_engine` for SQLite.
+
+    Yields:
+        sqlalchemy.engine.Connection: The connection.
+
+    Usage:
+        with rollback_scope(engine) as conn:
+            session = Session(bind=conn, join_transaction_mode="create_savepoint")
+            ...
+    """
+    with engine.connect() as conn:
+        transaction = conn.begin()
+        conn.begin_nested()
+        try:
+            yield conn
+        finally:
+            transaction.rollback()
+
 
 class SqlDatabase:
     """A class representing a SQL database.
@@ -9,27 +106,42 @@ class SqlDatabase:
     Args:
         engine (sqlalchemy.engine.Engine, optional): The SQLAlchemy engine to use for database connections.
         uri (str, optional): The URI string to create a SQLAlchemy engine if `engine` is not provided.
+        chunk_size (int, optional): The maximum number of ids bound in one `IN (...)` clause.
+        connection (sqlalchemy.engine.Connection, optional): A connection to run every statement
+            on, in a SAVEPOINT, instead of checking out connections from the engine.
+        batch_size (int, optional): The number of rows inserted per statement by `load_fixtures`.
 
     Attributes:
         engine (sqlalchemy.engine.Engine): The SQLAlchemy engine used for database connections.
-        cached (dict): A dictionary to cache retrieved models.
+        cached (dict): The ids of the retrieved and loaded models, per table, removed by `clear`.
 
     Methods:
         get(table: str, id: str) -> Any:
             Retrieves a model from the specified table by its id.
 
+        get_many(table: str, ids: Iterable[str]) -> list[Any]:
+            Retrieves the models from the specified table by their ids.
+
+        load_fixtures(table: str, rows: Iterable[dict] | str) -> int:
+            Inserts rows, or the records of a YAML/JSON file, into the specified table.
+
         remove(table: str, id: str):
             Removes a model from the specified table by its id.
 
+        remove_many(table: str, ids: Iterable[str]) -> int:
+            Removes the models from the specified table by their ids.
+
         clear():
-            Clears the cached models.
+            Removes the cached models.
 
     Note:
-        At least provide `engine` or `uri` when creating an instance of `SqlDatabase`.
+        At least provide `engine`, `uri` or `connection` when creating an instance of `SqlDatabase`.
 
     Usage:
         database = SqlDatabase(engine=my_engine)
         model = database.get('my_table', 'my_id')
+        models = database.get_many('my_table', ['id_1', 'id_2'])
+        database.load_fixtures('my_table', 'fixtures/my_table.yaml')
         database.remove('my_table', 'my_id')
         database.clear()
     """
@@ -38,17 +150,26 @@ class SqlDatabase:
         self,
         engine: sqlalchemy.engine.Engine | None = None,
         uri: str | None = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        connection: sqlalchemy.engine.Connection | None = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
     ):
         super().__init__()
 
+        if connection is not None:
+            engine = connection.engine
+
         if engine is None and uri is None:
-            raise ValueError("At least provide engine or uri")
+            raise ValueError("At least provide engine, uri or connection")
 
         if engine is None:
             assert uri
             engine = sqlalchemy.create_engine(uri)
 
         self.engine = engine
+        self.connection = connection
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
         self.cached: dict[str, set[str]] = {}
 
     def get(self, table: str, id: str) -> Any:
@@ -59,17 +180,89 @@ class SqlDatabase:
             id (str): The id of the model to retrieve.
 
         Returns:
-            Any: The retrieved model.
+            Any: The retrieved model, None if it does not exist.
 
         Raises:
             sqlalchemy.exc.ResourceClosedError: If the execution of the SQL statement fails.
         """
-        with self.engine.connect() as conn:
-            self.cached[table] = set()
-            self.cached[table].add(id)
-            stm = sqlalchemy.text(f"SELECT * FROM \"{table}\" WHERE id = '{id}';")
-            model = conn.execute(stm).mappings().fetchone()
-            return model
+        models = self.get_many(table, [id])
+        return models[0] if models else None
+
+    def get_many(self, table: str, ids: Iterable[str]) -> list[Any]:
+        """Retrieves the models from the specified table by their ids, `chunk_size` ids per query.
+
+        Args:
+            table (str): The name of the table.
+            ids (Iterable[str]): The ids of the models to retrieve.
+
+        Returns:
+            list[Any]: The retrieved models, in no particular order.
+
+        Raises:
+            sqlalchemy.exc.ResourceClosedError: If the execution of the SQL statement fails.
+        """
+        ids = list(ids)
+        sql_table = self._table(table)
+
+        models = []
+        with self._connect() as conn:
+            for chunk in itertools.batched(ids, self.chunk_size):
+                stm = (
+                    sqlalchemy.select(sqlalchemy.literal_column("*"))
+                    .select_from(sql_table)
+                    .where(sql_table.c.id.in_(chunk))
+                )
+                models += conn.execute(stm).mappings().fetchall()
+        self.cached.setdefault(table, set()).update(model["id"] for model in models)
+        return models
+
+    def load_fixtures(
+        self,
+        table: str,
+        rows: Iterable[dict[str, Any]] | str | os.PathLike,
+        batch_size: int | None = None,
+    ) -> int:
+        """Inserts rows into the specified table, `batch_size` rows per statement, in a single
+        transaction. The ids of the inserted rows are recorded so `clear` removes them.
+
+        Args:
+            table (str): The name of the table.
+            rows (Iterable[dict[str, Any]] | str | os.PathLike): The rows, or the path of a
+                YAML, JSON or JSON lines file read with `io.iter_records`. Rows of a batch must
+                share the same keys.
+            batch_size (int, optional): The number of rows per statement. Defaults to
+                `self.batch_size`.
+
+        Returns:
+            int: The number of inserted rows.
+
+        Raises:
+            sqlalchemy.exc.NoSuchTableError: If the table does not exist.
+        """
+        if isinstance(rows, (str, os.PathLike)):
+            rows = io.iter_records(rows)
+        batch_size = batch_size or self.batch_size
+
+        inserted = 0
+        with self._begin() as conn:
+            sql_table = reflect_table(conn, table)
+            id_column = sql_table.c.get("id")
+            stm = sqlalchemy.insert(sql_table)
+            returning = (
+                id_column is not None and conn.dialect.insert_executemany_returning
+            )
+            if returning:
+                stm = stm.returning(id_column)
+
+            cached = self.cached.setdefault(table, set())
+            for batch in itertools.batched(rows, batch_size):
+                result = conn.execute(stm, list(batch))
+                if returning:
+                    cached.update(result.scalars().all())
+                else:
+                    cached.update(row["id"] for row in batch if "id" in row)
+                inserted += len(batch)
+        return inserted
 
     def remove(self, table: str, id: str):
         """Removes a model from the specified table by its id.
@@ -81,11 +274,64 @@ class SqlDatabase:
         Raises:
             sqlalchemy.exc.ResourceClosedError: If the execution of the SQL statement fails.
         """
-        with self.engine.connect() as conn:
-            conn.execute(sqlalchemy.text(f"DELETE FROM {table} WHERE id = '{id}';"))
+        self.remove_many(table, [id])
+
+    def remove_many(self, table: str, ids: Iterable[str]) -> int:
+        """Removes the models from the specified table by their ids in a single transaction, and
+        forgets them so `clear` does not remove them again.
+
+        Args:
+            table (str): The name of the table.
+            ids (Iterable[str]): The ids of the models to remove.
+
+        Returns:
+            int: The number of removed rows.
+
+        Raises:
+            sqlalchemy.exc.ResourceClosedError: If the execution of the SQL statement fails.
+        """
+        ids = list(ids)
+        with self._begin() as conn:
+            removed = self._remove_many(conn, table, ids)
+        self.cached.get(table, set()).difference_update(ids)
+        return removed
 
     def clear(self):
-        """Clears the cached models."""
-        for table, models in self.cached.items():
-            for id in models:
-                self.remove(table, id)
+        """Removes the cached models, every table in a single transaction."""
+        with self._begin() as conn:
+            for table, ids in self.cached.items():
+                self._remove_many(conn, table, ids)
+        self.cached.clear()
+
+    @contextlib.contextmanager
+    def _connect(self) -> Iterator[sqlalchemy.engine.Connection]:
+        if self.connection is not None:
+            yield self.connection
+            return
+        with self.engine.connect() as conn:
+            yield conn
+
+    @contextlib.contextmanager
+    def _begin(self) -> Iterator[sqlalchemy.engine.Connection]:
+        if self.connection is not None:
+            with self.connection.begin_nested():
+                yield self.connection
+            return
+        with self.engine.begin() as conn:
+            yield conn
+
+    def _remove_many(
+        self,
+        conn: sqlalchemy.engine.Connection,
+        table: str,
+        ids: Iterable[str],
+    ) -> int:
+        sql_table = self._table(table)
+        removed = 0
+        for chunk in itertools.batched(ids, self.chunk_size):
+            stm = sqlalchemy.delete(sql_table).where(sql_table.c.id.in_(chunk))
+            removed += conn.execute(stm).rowcount
+        return removed
+
+    def _table(self, table: str) -> sqlalchemy.TableClause:
+        return sqlalchemy.table(table, sqlalchemy.column("id"))
@@ -1,10 +1,130 @@
 import os
+import pathlib
+import shutil
+from typing import Any
 
 import pytest
+import sqlalchemy
 
 from utils import configuration
 from utils.test import databases
 
+MASTER_WORKER_ID = "master"
+
+
+def get_sql_database_uri(config: dict[str, Any] | None = None) -> str | None:
+    """Read the SQL database URI from `database.connection.uri`, falling back to the
+    "DATABASE_URI" environment variable."""
+    config = config if config is not None else configuration.get_config()
+    uri = config.get("database", {}).get("connection", {}).get("uri")
+    if uri is None:
+        uri = os.environ.get("DATABASE_URI")
+    return uri
+
+
+def get_worker_id() -> str:
+    """Return the pytest-xdist worker id ("gw0", "gw1", ...), "master" when not distributed."""
+    return os.environ.get("PYTEST_XDIST_WORKER", MASTER_WORKER_ID)
+
+
+def get_worker_sql_database_uri(uri: str, worker_id: str) -> str:
+    """Give every pytest-xdist worker its own SQLite database file.
+
+    The file of a worker is named after the configured one, e.g. `test_gw0.db` for `test.db`.
+    URIs of other dialects, in-memory SQLite and the master process are returned unchanged.
+
+    Args:
+        uri (str): The configured database URI.
+        worker_id (str): The worker id, see `get_worker_id`.
+
+    Returns:
+        str: The database URI of the worker.
+    """
+    url = sqlalchemy.engine.make_url(uri)
+    if worker_id == MASTER_WORKER_ID or url.get_backend_name() != "sqlite":
+        return uri
+    if (
+        not url.database
+        or url.database == ":memory:"
+        or url.database.startswith("file:")
+    ):
+        return uri
+
+    path = pathlib.Path(url.database)
+    worker_path = path.with_name(f"{path.stem}_{worker_id}{path.suffix}")
+    return url.set(database=str(worker_path)).render_as_string(hide_password=False)
+
+
+def isolate_worker_schema(
+    engine: sqlalchemy.engine.Engine, worker_id: str
+) -> str | None:
+    """Point every connection of a PostgreSQL engine to a schema owned by the worker.
+
+    The schema, `test_<worker id>`, is created if needed and put first in the `search_path`, so
+    tables created by the tests of a worker do not collide with the other workers.
+
+    Args:
+        engine (sqlalchemy.engine.Engine): The engine of the worker.
+        worker_id (str): The worker id, see `get_worker_id`.
+
+    Returns:
+        str | None: The schema, None when no isolation is needed or supported.
+    """
+    if worker_id == MASTER_WORKER_ID or engine.dialect.name != "postgresql":
+        return None
+
+    schema = f"test_{worker_id}"
+    quoted_schema = engine.dialect.identifier_preparer.quote_schema(schema)
+
+    # registered before the schema is created and ahead of the dialect's own listeners, so every
+    # connection, the one creating the schema included, is pooled with the search_path set
+    @sqlalchemy.event.listens_for(engine, "connect", insert=True)
+    def _set_search_path(dbapi_connection, _):
+        # outside of a transaction, so the rollback of the pool's reset-on-return keeps it
+        autocommit = dbapi_connection.autocommit
+        dbapi_connection.autocommit = True
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"SET SESSION search_path TO {quoted_schema}, public")
+        cursor.close()
+        dbapi_connection.autocommit = autocommit
+
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f"CREATE SCHEMA IF NOT EXISTS {quoted_schema}")
+
+    return schema
+
+
+def drop_worker_schema(engine: sqlalchemy.engine.Engine, schema: str):
+    """Drop the schema created by `isolate_worker_schema` and everything in it.
+
+    Args:
+        engine (sqlalchemy.engine.Engine): The engine of the worker.
+        schema (str): The schema.
+    """
+    quoted_schema = engine.dialect.identifier_preparer.quote_schema(schema)
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f"DROP SCHEMA IF EXISTS {quoted_schema} CASCADE")
+
+
+@pytest.fixture(scope="session")
+def session_config(pytestconfig: pytest.Config):
+    """Pytest fixture that loads the configuration once per test session.
+
+    The configuration is read from the `--utils-config-path` option, the `utils_config_path`
+    ini setting or the "CONFIG_PATH" environment variable, in this order.
+
+    Returns:
+        dict[str, Any]: The configuration object.
+    """
+    config_path = pytestconfig.getoption("utils_config_path", default=None) or None
+    if config_path is None:
+        try:
+            config_path = pytestconfig.getini("utils_config_path") or None
+        except ValueError:
+            config_path = None
+    config = configuration.load_config(config_path=config_path)
+    yield config
+
 
 @pytest.fixture
 def load_config(config_path: str):
@@ -63,11 +183,7 @@ def sql_database_uri(load_config: None):
             # Use the SQL database URI within the test
             ...
     """
-    config = configuration.get_config()
-    uri = config.get("database", {}).get("connection").get("uri")
-    if uri is None:
-        uri = os.environ.get("DATABASE_URI")
-    yield uri
+    yield get_sql_database_uri()
 
 
 @pytest.fixture
@@ -92,3 +208,69 @@ def sql_database(sql_database_uri: str, load_config: None):
     """
     database = databases.SqlDatabase(uri=sql_database_uri)
     yield database
+
+
+@pytest.fixture(scope="session")
+def sql_engine(session_config: dict[str, Any]):
+    """Pytest fixture that provides a SQLAlchemy engine shared by the whole test session.
+
+    The URI is read once from the configuration, see `get_sql_database_uri`. The engine is
+    created with `databases.create_engine`, so SAVEPOINTs also work with SQLite.
+
+    Under pytest-xdist every worker gets its own engine and its own data: SQLite workers use a
+    copy of the configured database file, see `get_worker_sql_database_uri`, and PostgreSQL
+    workers use their own schema, see `isolate_worker_schema`. Both are dropped at the end of
+    the session.
+
+    Tests using it are skipped when no database URI is configured.
+
+    Returns:
+        sqlalchemy.engine.Engine: The engine.
+    """
+    uri = get_sql_database_uri(session_config)
+    if uri is None:
+        pytest.skip(
+            "No SQL database configured: set database.connection.uri or DATABASE_URI"
+        )
+    worker_id = get_worker_id()
+    worker_uri = get_worker_sql_database_uri(uri, worker_id)
+    worker_database = None
+    if worker_uri != uri:
+        source = sqlalchemy.engine.make_url(uri).database
+        worker_database = sqlalchemy.engine.make_url(worker_uri).database
+        if os.path.exists(source):
+            shutil.copyfile(source, worker_database)
+
+    engine = databases.create_engine(worker_uri)
+    schema = isolate_worker_schema(engine, worker_id)
+    yield engine
+    if schema is not None:
+        drop_worker_schema(engine, schema)
+    engine.dispose()
+    if worker_database is not None and os.path.exists(worker_database):
+        os.remove(worker_database)
+
+
+@pytest.fixture
+def transactional_sql_database(sql_engine):
+    """Pytest fixture that provides a SQL database object whose changes are rolled back.
+
+    The test runs on a single connection of the session engine, inside a transaction and a
+    SAVEPOINT that are rolled back at teardown, so no row needs to be tracked or deleted.
+
+    Args:
+        sql_engine (sqlalchemy.engine.Engine): The session engine.
+
+    Returns:
+        SqlDatabase: The SQL database object, bound to the test connection.
+
+    Usage:
+        Code under test must use `transactional_sql_database.connection`, for instance through
+        `Session(bind=connection, join_transaction_mode="create_savepoint")`.
+
+        Example:
+        def test_something(transactional_sql_database):
+            ...
+    """
+    with databases.rollback_scope(sql_engine) as connection:
+        yield databases.SqlDatabase(connection=connection)
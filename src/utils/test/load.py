@@ -0,0 +1,218 @@
+import asyncio
+import collections
+import dataclasses
+import itertools
+import json
+import time
+from typing import Any, Callable, Iterable
+
+import httpx
+
+from utils.histogram import LatencyHistogram
+from utils.test.api import Behavior, TestOrchestrator, behavior_to_kwargs
+
+
+def is_error_response(response: httpx.Response) -> bool:
+    """Default error predicate of a load test: any 4xx or 5xx response."""
+    return response.status_code >= 400
+
+
+@dataclasses.dataclass
+class BehaviorStats:
+    """Outcome of the requests sent for one behavior during a load test.
+
+    Attributes:
+        latency (LatencyHistogram): Request latencies, in microseconds.
+        requests (int): The number of completed requests.
+        errors (int): The number of failed requests, exceptions included.
+        status_codes (collections.Counter): The number of responses per status code.
+        exceptions (collections.Counter): The number of failures per exception type.
+    """
+
+    latency: LatencyHistogram = dataclasses.field(default_factory=LatencyHistogram)
+    requests: int = 0
+    errors: int = 0
+    status_codes: collections.Counter = dataclasses.field(
+        default_factory=collections.Counter
+    )
+    exceptions: collections.Counter = dataclasses.field(
+        default_factory=collections.Counter
+    )
+
+    def merge(self, other: "BehaviorStats"):
+        self.latency.merge(other.latency)
+        self.requests += other.requests
+        self.errors += other.errors
+        self.status_codes.update(other.status_codes)
+        self.exceptions.update(other.exceptions)
+
+    def to_dict(self, duration: float) -> dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "error_rate": self.errors / self.requests if self.requests else 0.0,
+            "throughput": self.requests / duration if duration else 0.0,
+            "status_codes": {
+                str(code): count for code, count in self.status_codes.items()
+            },
+            "exceptions": dict(self.exceptions),
+            "latency_us": self.latency.summary(),
+        }
+
+
+@dataclasses.dataclass
+class LoadTestReport:
+    """Result of a load test, per behavior and in total.
+
+    Attributes:
+        duration (float): The measured duration of the test, in seconds.
+        behaviors (dict[str, BehaviorStats]): The stats of every behavior.
+    """
+
+    duration: float
+    behaviors: dict[str, BehaviorStats]
+
+    @property
+    def total(self) -> BehaviorStats:
+        total = BehaviorStats()
+        for stats in self.behaviors.values():
+            total.merge(stats)
+        return total
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "duration": self.duration,
+            "total": self.total.to_dict(self.duration),
+            "behaviors": {
+                name: stats.to_dict(self.duration)
+                for name, stats in self.behaviors.items()
+            },
+        }
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def dump(self, file_path: str):
+        """Write the report as JSON, for instance to compare it against a baseline in CI.
+
+        Args:
+            file_path (str): The path of the JSON file.
+        """
+        with open(file_path, "w", encoding="utf-8") as file:
+            file.write(self.to_json(indent=4))
+
+
+async def arun_load(
+    orchestrator: TestOrchestrator,
+    behaviors: Iterable[Behavior],
+    duration: float,
+    concurrency: int = 8,
+    rps: float | None = None,
+    is_error: Callable[[httpx.Response], bool] = is_error_response,
+) -> LoadTestReport:
+    """Drive sustained load through the behaviors of an orchestrator.
+
+    Behaviors are sent in round-robin with `orchestrator.async_client`, repeat a behavior to
+    weight it. Without `rps`, `concurrency` workers send requests back to back for `duration`
+    seconds (closed loop). With `rps`, requests are started on a fixed schedule (open loop) with
+    at most `concurrency` in flight; latencies are then measured from the scheduled start, so a
+    saturated server shows up in the percentiles instead of silently lowering the rate.
+
+    Args:
+        orchestrator (TestOrchestrator): The orchestrator, with an `async_client`.
+        behaviors (Iterable[Behavior]): Behavior names, or keyword arguments of
+            `TestOrchestrator.aget_response`.
+        duration (float): The number of seconds to generate load for.
+        concurrency (int): The number of workers, or the maximum number of requests in flight.
+        rps (float, optional): The target number of requests per second.
+        is_error (Callable[[httpx.Response], bool]): Tells whether a response is a failure.
+
+    Returns:
+        LoadTestReport: The latency histograms, throughput and error rates per behavior.
+    """
+    requests = [behavior_to_kwargs(behavior) for behavior in behaviors]
+    if not requests:
+        raise ValueError("At least one behavior is required")
+    if rps is not None and rps <= 0:
+        raise ValueError(f"rps must be positive, got {rps}")
+    if orchestrator.async_client is None:
+        raise ValueError("async_client is required for load tests")
+
+    stats: dict[str, BehaviorStats] = collections.defaultdict(BehaviorStats)
+    schedule = itertools.cycle(requests)
+    started_at = time.perf_counter()
+    deadline = started_at + duration
+
+    async def send(kwargs: dict[str, Any], scheduled_ns: int):
+        behavior_stats = stats[kwargs["behavior"]]
+        try:
+            response = await orchestrator.aget_response(**kwargs)
+        except Exception as ex:
+            behavior_stats.exceptions[type(ex).__name__] += 1
+            behavior_stats.errors += 1
+        else:
+            behavior_stats.status_codes[response.status_code] += 1
+            if is_error(response):
+                behavior_stats.errors += 1
+        behavior_stats.requests += 1
+        behavior_stats.latency.record((time.perf_counter_ns() - scheduled_ns) // 1000)
+
+    async def closed_loop_worker():
+        while time.perf_counter() < deadline:
+            await send(next(schedule), time.perf_counter_ns())
+
+    async def open_loop():
+        semaphore = asyncio.Semaphore(concurrency)
+        tasks = set()
+
+        async def send_bounded(kwargs: dict[str, Any], scheduled_ns: int):
+            try:
+                await send(kwargs, scheduled_ns)
+            finally:
+                semaphore.release()
+
+        start_ns = time.perf_counter_ns()
+        for i in itertools.count():
+            scheduled_ns = start_ns + int(i * 1e9 / rps)
+            if scheduled_ns >= start_ns + duration * 1e9:
+                break
+            delay = (scheduled_ns - time.perf_counter_ns()) / 1e9
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await semaphore.acquire()
+            task = asyncio.create_task(send_bounded(next(schedule), scheduled_ns))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        await asyncio.gather(*tasks)
+
+    if rps is None:
+        await asyncio.gather(*(closed_loop_worker() for _ in range(concurrency)))
+    else:
+        await open_loop()
+
+    return LoadTestReport(
+        duration=time.perf_counter() - started_at,
+        behaviors=dict(stats),
+    )
+
+
+def run_load(
+    orchestrator: TestOrchestrator,
+    behaviors: Iterable[Behavior],
+    duration: float,
+    concurrency: int = 8,
+    rps: float | None = None,
+    is_error: Callable[[httpx.Response], bool] = is_error_response,
+) -> LoadTestReport:
+    """Synchronous entry point of `arun_load`, run on the event loop of the orchestrator so
+    the connections of its `async_client` are reused between runs. Blocks until the run ends, so
+    await `arun_load` from a running event loop instead.
+
+    Usage:
+        report = run_load(orchestrator, ["get_user", "create_user"], duration=30, rps=200)
+        assert report.behaviors["get_user"].latency.percentile(99) < 50_000
+        report.dump("load-report.json")
+    """
+    return orchestrator.run_coroutine(
+        arun_load(orchestrator, behaviors, duration, concurrency, rps, is_error)
+    )
@@ -0,0 +1,33 @@
+"""Pytest plugin registering the fixtures of `utils.test.fixtures`.
+
+It is loaded automatically through the `pytest11` entry point once the package is installed, so
+test suites no longer need to star-import the fixtures in a conftest. The session-scoped
+fixtures (`session_config`, `sql_engine`, `transactional_sql_database`) are safe to use with
+pytest-xdist: the configuration is parsed once per worker and every worker gets its own engine
+and database.
+"""
+
+import pytest
+
+# only the fixtures that need no fixture of the consumer, the other ones are star-imported from
+# `utils.test.fixtures` by the suites that provide `config_path`
+from utils.test.fixtures.databases import (  # noqa: F401  pylint: disable=unused-import
+    session_config,
+    sql_engine,
+    transactional_sql_database,
+)
+
+
+def pytest_addoption(parser: pytest.Parser):
+    group = parser.getgroup("utils")
+    group.addoption(
+        "--utils-config-path",
+        dest="utils_config_path",
+        default=None,
+        help="directory of the configuration files loaded by the session_config fixture",
+    )
+    parser.addini(
+        "utils_config_path",
+        help="directory of the configuration files loaded by the session_config fixture",
+        default="",
+    )
@@ -1,5 +1,9 @@
 import json
-from typing import Any
+from typing import Any, Iterator
+
+import httpx
+
+from utils import io
 
 
 def response_to_dict(response_content: str) -> dict[str, Any]:
@@ -20,3 +24,24 @@ def response_to_dict(response_content: str) -> dict[str, Any]:
         # Output: {'key': 'value'}
     """
     return json.loads(response_content)
+
+
+def iter_response_items(response: httpx.Response) -> Iterator[Any]:
+    """Iterates over the items of a JSON array response without loading the whole body.
+
+    Args:
+        response (httpx.Response): The response, usually streamed with `client.stream(...)`.
+
+    Yields:
+        Any: The decoded items, in order.
+
+    Raises:
+        ValueError: If the response content is not a JSON array.
+
+    Example:
+        with client.stream("GET", "/exports") as response:
+            for item in iter_response_items(response):
+                ...
+    """
+    for item in io.iter_json_array(response.iter_bytes()):
+        yield json.loads(item)
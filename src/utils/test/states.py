@@ -1,22 +1,222 @@
 from __future__ import annotations
 
-from typing import Any, override
+from collections.abc import Mapping, MutableMapping
+from typing import Any, Iterator, override
+
+_DELETED = object()
+_MISSING = object()
+
+
+def _push_layer(
+    layers: tuple[dict[str, Any], ...],
+    layer: dict[str, Any],
+) -> tuple[dict[str, Any], ...]:
+    """Stack `layer` on top of `layers`, merging it with the layers below that are not larger.
+
+    Layer sizes strictly decrease from bottom to top, so there are at most log2(n) layers and
+    every key is copied O(log n) times over the life of the mapping. Layers are never mutated,
+    only replaced, which is what makes sharing them between snapshots safe.
+    """
+    stack = list(layers)
+    while stack and len(stack[-1]) <= len(layer):
+        layer = stack.pop() | layer
+    if not stack:
+        layer = {key: value for key, value in layer.items() if value is not _DELETED}
+    if layer:
+        stack.append(layer)
+    return tuple(stack)
+
+
+class PersistentDict(MutableMapping[str, Any]):
+    """A mapping made of immutable, shared layers.
+
+    `merge` and `snapshot` never copy the existing content: the result shares the layers of its
+    source and only stacks the new keys on top. Writing through `__setitem__` or `__delitem__`
+    only affects this handle, snapshots taken before keep their content.
+
+    It is a `Mapping`, not a `dict`, since a dict would have to hold a copy of the content. It
+    supports the `dict` API callers rely on: `copy`, `|` on either side and `==` against dicts,
+    and `to_dict` returns a plain dict for `json.dumps` and other APIs requiring one.
+
+    Args:
+        data (Mapping[str, Any], optional): The initial content, copied once.
+    """
+
+    __slots__ = ("_layers", "_flat")
+
+    def __init__(self, data: Mapping[str, Any] | None = None):
+        self._layers: tuple[dict[str, Any], ...] = (dict(data),) if data else ()
+        self._flat: dict[str, Any] | None = None
+
+    @classmethod
+    def _from_layers(cls, layers: tuple[dict[str, Any], ...]) -> PersistentDict:
+        instance = cls()
+        instance._layers = layers
+        return instance
+
+    def _flatten(self) -> dict[str, Any]:
+        if self._flat is None:
+            if len(self._layers) == 1:
+                self._flat = self._layers[0]
+            else:
+                flat: dict[str, Any] = {}
+                for layer in self._layers:
+                    flat.update(layer)
+                self._flat = {
+                    key: val for key, val in flat.items() if val is not _DELETED
+                }
+        return self._flat
+
+    def snapshot(self) -> PersistentDict:
+        """Return an independent copy of the mapping in O(1)."""
+        snapshot = self._from_layers(self._layers)
+        snapshot._flat = self._flat
+        return snapshot
+
+    def merge(self, other: Mapping[str, Any]) -> PersistentDict:
+        """Return a new mapping with the items of `other` on top of these ones, like `|`.
+
+        Args:
+            other (Mapping[str, Any]): The mapping to merge.
+
+        Returns:
+            PersistentDict: The merged mapping, sharing the layers of this one.
+        """
+        if isinstance(other, PersistentDict):
+            layer = other._flatten()
+        else:
+            layer = dict(other)
+        if not layer:
+            return self.snapshot()
+        return self._from_layers(_push_layer(self._layers, layer))
+
+    def diff(self, other: Mapping[str, Any]) -> dict[str, dict[str, Any]]:
+        """Compare this mapping with a later version of it.
+
+        Only the keys of the layers the two mappings do not share are compared, so diffing a
+        snapshot against its successor costs as much as the changes made in between.
+
+        Args:
+            other (Mapping[str, Any]): The mapping to compare with.
+
+        Returns:
+            dict[str, dict[str, Any]]: The `added` and `removed` items, and the `changed` ones as
+            `(old, new)` tuples.
+        """
+        if not isinstance(other, PersistentDict):
+            other = PersistentDict(other)
+
+        shared = 0
+        for layer, other_layer in zip(self._layers, other._layers):
+            if layer is not other_layer:
+                break
+            shared += 1
+
+        result: dict[str, dict[str, Any]] = {"added": {}, "removed": {}, "changed": {}}
+        keys = set().union(*self._layers[shared:], *other._layers[shared:])
+        for key in keys:
+            old = self.get(key, _MISSING)
+            new = other.get(key, _MISSING)
+            if old is _MISSING and new is not _MISSING:
+                result["added"][key] = new
+            elif new is _MISSING and old is not _MISSING:
+                result["removed"][key] = old
+            elif old is not new and old != new:
+                result["changed"][key] = (old, new)
+        return result
+
+    @override
+    def __getitem__(self, key: str) -> Any:
+        if self._flat is not None:
+            return self._flat[key]
+        for layer in reversed(self._layers):
+            value = layer.get(key, _MISSING)
+            if value is _MISSING:
+                continue
+            if value is _DELETED:
+                break
+            return value
+        raise KeyError(key)
+
+    @override
+    def __setitem__(self, key: str, value: Any):
+        self._layers = _push_layer(self._layers, {key: value})
+        self._flat = None
+
+    @override
+    def __delitem__(self, key: str):
+        if key not in self:
+            raise KeyError(key)
+        self._layers = _push_layer(self._layers, {key: _DELETED})
+        self._flat = None
+
+    @override
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._flatten())
+
+    @override
+    def __len__(self) -> int:
+        return len(self._flatten())
+
+    @override
+    def __eq__(self, other: object) -> bool:
+        if self is other:
+            return True
+        if isinstance(other, PersistentDict):
+            if self._layers is other._layers:
+                return True
+            return self._flatten() == other._flatten()
+        if isinstance(other, Mapping):
+            return self._flatten() == dict(other)
+        return NotImplemented
+
+    def __or__(self, other: Mapping[str, Any]) -> PersistentDict:
+        if not isinstance(other, Mapping):
+            return NotImplemented
+        return self.merge(other)
+
+    def __ror__(self, other: Mapping[str, Any]) -> dict[str, Any]:
+        if not isinstance(other, Mapping):
+            return NotImplemented
+        return dict(other) | self._flatten()
+
+    def copy(self) -> PersistentDict:
+        """Return an independent copy of the mapping in O(1), like `snapshot`."""
+        return self.snapshot()
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the content as a new plain dict."""
+        return dict(self._flatten())
+
+    @override
+    def __repr__(self) -> str:
+        return repr(self._flatten())
+
+
+def _persistent(data: Mapping[str, Any] | None) -> PersistentDict:
+    if isinstance(data, PersistentDict):
+        return data.snapshot()
+    return PersistentDict(data)
 
 
 class UnitTestState:
-    """TestState."""
+    """TestState.
+
+    The `data`, `responses` and `messages` sections are `PersistentDict`s, so adding states and
+    taking snapshots share the existing content instead of copying it.
+    """
 
     def __init__(
         self,
-        data: dict[str, Any] | None = None,
-        responses: dict[str, Any] | None = None,
-        messages: dict[str, Any] | None = None,
+        data: Mapping[str, Any] | None = None,
+        responses: Mapping[str, Any] | None = None,
+        messages: Mapping[str, Any] | None = None,
     ):
         super().__init__()
 
-        self.data = data if data is not None else {}
-        self.responses = responses if responses is not None else {}
-        self.messages = messages if messages is not None else {}
+        self.data = _persistent(data)
+        self.responses = _persistent(responses)
+        self.messages = _persistent(messages)
 
     def __add__(self, other: UnitTestState) -> UnitTestState:
         """__add__.
@@ -28,9 +228,9 @@ class UnitTestState:
             TestState:
         """
         state = UnitTestState(
-            data=self.data | other.data,
-            responses=self.responses | other.responses,
-            messages=self.messages | other.messages,
+            data=_persistent(self.data).merge(other.data),
+            responses=_persistent(self.responses).merge(other.responses),
+            messages=_persistent(self.messages).merge(other.messages),
         )
         return state
 
@@ -43,11 +243,38 @@ class UnitTestState:
         Returns:
             TestState:
         """
-        self.data = self.data | other.data
-        self.responses = self.responses | other.responses
-        self.messages = self.messages | other.messages
+        self.data = _persistent(self.data).merge(other.data)
+        self.responses = _persistent(self.responses).merge(other.responses)
+        self.messages = _persistent(self.messages).merge(other.messages)
         return self
 
+    def snapshot(self) -> UnitTestState:
+        """snapshot.
+
+        Returns:
+            TestState: an independent copy of the state, built in O(1)
+        """
+        return UnitTestState(
+            data=self.data,
+            responses=self.responses,
+            messages=self.messages,
+        )
+
+    def diff(self, other: UnitTestState) -> dict[str, dict[str, dict[str, Any]]]:
+        """diff.
+
+        Args:
+            other (TestState): a later version of the state
+
+        Returns:
+            dict: the `PersistentDict.diff` of every section
+        """
+        return {
+            "data": _persistent(self.data).diff(other.data),
+            "responses": _persistent(self.responses).diff(other.responses),
+            "messages": _persistent(self.messages).diff(other.messages),
+        }
+
     @override
     def __eq__(self, other: object) -> bool:
         """__eq__.
@@ -60,6 +287,8 @@ class UnitTestState:
         """
         assert isinstance(other, UnitTestState)
 
+        if self is other:
+            return True
         return (
             self.data == other.data
             and self.responses == other.responses
@@ -1,14 +1,16 @@
+import functools
 import random
+import secrets
 import string
 
 
-def generate_random_string(
-    length: int = 8,
+@functools.lru_cache(maxsize=None)
+def get_alphabet(
     upper_case: bool = False,
     numeric: bool = False,
     special_symbols: bool = False,
 ) -> str:
-    """generate a random string with the given length and charactors"""
+    """get the charactors used by the random string generators, computed once per combination"""
 
     charactors = string.ascii_lowercase
     if upper_case:
@@ -17,5 +19,63 @@ def generate_random_string(
         charactors += string.digits
     if special_symbols:
         charactors += string.punctuation
+    return charactors
+
+
+@functools.lru_cache(maxsize=None)
+def _byte_lookup_table(alphabet: str) -> tuple[bytes, int]:
+    """map every byte below the largest multiple of len(alphabet) to a charactor, so that
+    the bytes at or above it can be rejected without biasing the distribution"""
+
+    limit = 256 - 256 % len(alphabet)
+    table = bytes(ord(alphabet[byte % len(alphabet)]) for byte in range(limit))
+    return table, limit
+
+
+def _secure_choices(alphabet: str, k: int) -> str:
+    table, limit = _byte_lookup_table(alphabet)
+    delete = bytes(range(limit, 256))
+    charactors = b""
+    while len(charactors) < k:
+        missing = k - len(charactors)
+        # oversample slightly so a single draw is almost always enough
+        raw = secrets.token_bytes(missing + missing * (256 - limit) // limit + 16)
+        charactors += raw.translate(None, delete)
+    return charactors[:k].translate(table.ljust(256, b"\0")).decode("ascii")
+
+
+def generate_random_string(
+    length: int = 8,
+    upper_case: bool = False,
+    numeric: bool = False,
+    special_symbols: bool = False,
+    secure: bool = False,
+) -> str:
+    """generate a random string with the given length and charactors, drawn from `secrets`
+    when `secure` is set"""
+
+    charactors = get_alphabet(upper_case, numeric, special_symbols)
+    if secure:
+        return _secure_choices(charactors, length)
+    return "".join(random.choices(charactors, k=length))
+
+
+def generate_random_strings(
+    n: int,
+    length: int = 8,
+    upper_case: bool = False,
+    numeric: bool = False,
+    special_symbols: bool = False,
+    secure: bool = False,
+) -> list[str]:
+    """generate `n` random strings with the given length and charactors, drawing every
+    charactor in a single call then slicing the result"""
 
-    return "".join(random.choice(charactors) for _ in range(length))
+    if length == 0:
+        return [""] * n
+    charactors = get_alphabet(upper_case, numeric, special_symbols)
+    if secure:
+        pool = _secure_choices(charactors, n * length)
+    else:
+        pool = "".join(random.choices(charactors, k=n * length))
+    return [pool[i : i + length] for i in range(0, n * length, length)]
@@ -1,8 +1,10 @@
 import enum
+import functools
 import json
 import re
+import time
 from datetime import datetime
-from typing import Any
+from typing import Any, Callable, Iterable
 
 
 class JSONEncoder(json.JSONEncoder):
@@ -56,6 +58,115 @@ def prettier_dict(
     )
 
 
+DEFAULT_DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+# formats producing the same text as `datetime.isoformat(sep, timespec)` for naive datetimes
+ISO_FORMATS = {
+    "%Y-%m-%dT%H:%M:%S": ("T", "seconds"),
+    "%Y-%m-%d %H:%M:%S": (" ", "seconds"),
+    "%Y-%m-%dT%H:%M:%S.%f": ("T", "microseconds"),
+    "%Y-%m-%d %H:%M:%S.%f": (" ", "microseconds"),
+}
+
+
+class TimestampFormatter:
+    """Formats datetimes and timestamps with a strftime format, caching the text of the last
+    second.
+
+    The format is split around its `%f` directives: the parts before and after them only depend
+    on the second, so they are rendered once per second and only the microseconds are formatted
+    for the other values of the same second. Formats equivalent to `datetime.isoformat` use it
+    directly for naive datetimes.
+
+    Args:
+        datetime_format (str): The strftime format.
+
+    Examples:
+        >>> formatter = TimestampFormatter("%d/%m/%Y %H:%M:%S.%f")
+        >>> formatter.format(datetime(2023, 8, 10, 10, 30, 0, 1500))
+        '10/08/2023 10:30:00.001500'
+        >>> TimestampFormatter("%Y-%m-%dT%H:%M:%S").format(datetime(2023, 8, 10, 10, 30))
+        '2023-08-10T10:30:00'
+
+    Note:
+        - `format_timestamp` renders the parts with `time.strftime`, so it does not support the
+          directives only `datetime.strftime` knows, `%f` aside.
+    """
+
+    def __init__(self, datetime_format: str):
+        self.datetime_format = datetime_format
+        self.iso = ISO_FORMATS.get(datetime_format)
+        self.parts = self._split(datetime_format)
+        self._datetime_cache: tuple[Any, list[str]] | None = None
+        self._timestamp_cache: tuple[Any, list[str]] | None = None
+
+    @staticmethod
+    def _split(datetime_format: str) -> list[str]:
+        parts = []
+        start = 0
+        for match in re.finditer("%.", datetime_format):
+            if match.group() == "%f":
+                parts.append(datetime_format[start : match.start()])
+                start = match.end()
+        parts.append(datetime_format[start:])
+        return parts
+
+    def format(self, value: datetime) -> str:
+        """Format a datetime.
+
+        Args:
+            value (datetime): The datetime.
+
+        Returns:
+            str: The formatted datetime.
+        """
+        if self.iso is not None and value.tzinfo is None and value.year >= 1000:
+            return value.isoformat(*self.iso)
+
+        key = (value.replace(microsecond=0), value.tzinfo)
+        cache = self._datetime_cache
+        if cache is None or cache[0] != key:
+            cache = (key, [value.strftime(part) for part in self.parts])
+            self._datetime_cache = cache
+        if len(cache[1]) == 1:
+            return cache[1][0]
+        return f"{value.microsecond:06d}".join(cache[1])
+
+    def format_timestamp(
+        self,
+        timestamp: float,
+        converter: Callable[[float], time.struct_time] = time.localtime,
+    ) -> str:
+        """Format a POSIX timestamp, such as the `created` time of a log record.
+
+        Args:
+            timestamp (float): The timestamp, in seconds.
+            converter (Callable[[float], time.struct_time]): Converts the timestamp to a time
+                tuple, `time.localtime` or `time.gmtime`.
+
+        Returns:
+            str: The formatted timestamp.
+        """
+        seconds = int(timestamp)
+        cache = self._timestamp_cache
+        if cache is None or cache[0] != (seconds, converter):
+            time_tuple = converter(seconds)
+            cache = (
+                (seconds, converter),
+                [time.strftime(part, time_tuple) for part in self.parts],
+            )
+            self._timestamp_cache = cache
+        if len(cache[1]) == 1:
+            return cache[1][0]
+        return f"{int((timestamp - seconds) * 1_000_000):06d}".join(cache[1])
+
+
+@functools.lru_cache(maxsize=64)
+def get_timestamp_formatter(datetime_format: str) -> TimestampFormatter:
+    """Return the shared `TimestampFormatter` of a format."""
+    return TimestampFormatter(datetime_format)
+
+
 def jsonify_datetime(
     src_datetime: datetime,
     datetime_format: str | None = None,
@@ -93,8 +204,36 @@ def jsonify_datetime(
     Raises:
         None.
     """
-    datetime_format = datetime_format or "%Y-%m-%dT%H:%M:%S"
-    return src_datetime.strftime(datetime_format)
+    formatter = get_timestamp_formatter(datetime_format or DEFAULT_DATETIME_FORMAT)
+    return formatter.format(src_datetime)
+
+
+def jsonify_datetimes(
+    src_datetimes: Iterable[datetime],
+    datetime_format: str | None = None,
+) -> list[str]:
+    """Converts datetime objects to their string representations in JSON format, in bulk.
+
+    Args:
+        src_datetimes (Iterable[datetime]): The datetime objects to be converted.
+        datetime_format (str, optional): The format string to use for the datetime conversion
+
+    Returns:
+        list[str]: The string representations, in the order of the datetime objects.
+
+    Examples:
+        >>> jsonify_datetimes(
+        ...     [datetime(2023, 8, 10, 10, 30, 0, 5), datetime(2023, 8, 10, 10, 30, 0, 10)],
+        ...     "%H:%M:%S.%f",
+        ... )
+        ['10:30:00.000005', '10:30:00.000010']
+
+    Note:
+        - Sorted datetimes format fastest, consecutive values of the same second sharing the
+          text of that second.
+    """
+    formatter = get_timestamp_formatter(datetime_format or DEFAULT_DATETIME_FORMAT)
+    return [formatter.format(src_datetime) for src_datetime in src_datetimes]
 
 
 def jsonify_enum(src_enum: enum.Enum) -> str:
@@ -7,6 +7,8 @@ from typing import Any
 import pytest
 from utils import configuration
 
+pytest_plugins = ["pytester"]
+
 PROJECT_PATH = pathlib.Path(os.path.abspath(__file__)).parents[1]
 os.environ["PROJECT_PATH"] = str(PROJECT_PATH)
 project_path = os.environ["PROJECT_PATH"]
@@ -1,5 +1,7 @@
+import asyncio
 import logging
 import random
+import threading
 from typing import Any
 
 import jwt
@@ -63,3 +65,65 @@ class TestJwtFactory:
         decoded_data_from_lib = jwt.decode(token.token, jwt_secret, [jwt_algorithm])
         assert data == decoded_data
         assert decoded_data_from_lib == decoded_data
+
+
+class TestAsyncJwtFactory:
+    def test_aencode_hmac_runs_inline(
+        self,
+        jwt_token_factory: security.JwtTokenFactory,
+    ):
+        data = prepare_jwt_data()
+        assert not jwt_token_factory.should_offload()
+        token = asyncio.run(jwt_token_factory.aencode(data))
+        assert jwt_token_factory.decode(token) == data
+
+    def test_adecode_offloaded_to_executor(
+        self,
+        jwt_secret: str,
+        jwt_algorithm: str,
+    ):
+        factory = security.JwtTokenFactory(
+            secret=jwt_secret,
+            algorithm=jwt_algorithm,
+            inline_algorithms=set(),
+        )
+        data, token = encode_data(factory)
+        assert factory.should_offload(len(token.token))
+        assert asyncio.run(factory.adecode(token)) == data
+        assert asyncio.run(factory.adecode(token.token)) == data
+
+    def test_offloaded_decode_runs_outside_the_loop_thread(
+        self,
+        jwt_secret: str,
+        jwt_algorithm: str,
+    ):
+        factory = security.JwtTokenFactory(
+            secret=jwt_secret,
+            algorithm=jwt_algorithm,
+            inline_algorithms=set(),
+        )
+        data, token = encode_data(factory)
+        threads = []
+        decode = factory._decode
+
+        def recording_decode(*args, **kwargs):
+            threads.append(threading.get_ident())
+            return decode(*args, **kwargs)
+
+        factory._decode = recording_decode
+
+        async def main():
+            return threading.get_ident(), await factory.adecode(token)
+
+        loop_thread, decoded = asyncio.run(main())
+        assert decoded == data
+        assert len(threads) == 1
+        assert threads[0] != loop_thread
+
+    def test_large_token_is_offloaded(
+        self,
+        jwt_token_factory: security.JwtTokenFactory,
+    ):
+        assert jwt_token_factory.should_offload(
+            jwt_token_factory.inline_max_token_size + 1
+        )
@@ -0,0 +1,126 @@
+import time
+import uuid
+
+import jwt
+import pytest
+
+from utils import security
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def revocation_store(request: pytest.FixtureRequest, tmp_path):
+    if request.param == "memory":
+        store = security.MemoryRevocationStore(capacity=16)
+    else:
+        store = security.SqliteRevocationStore(
+            str(tmp_path / "revoked.db"), capacity=16
+        )
+    yield store
+
+
+@pytest.fixture
+def revocable_token_factory(
+    jwt_secret: str,
+    jwt_algorithm: str,
+    revocation_store: security.AbstractRevocationStore,
+):
+    factory = security.JwtTokenFactory(
+        secret=jwt_secret,
+        algorithm=jwt_algorithm,
+        revocation_store=revocation_store,
+    )
+    yield factory
+
+
+def make_claims(ttl: float = 60) -> dict:
+    return {"jti": str(uuid.uuid4()), "exp": int(time.time() + ttl)}
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = security.BloomFilter(capacity=1000, error_rate=0.01)
+    items = [str(uuid.uuid4()) for _ in range(1000)]
+    for item in items:
+        bloom.add(item)
+
+    assert all(item in bloom for item in items)
+    false_positives = sum(str(uuid.uuid4()) in bloom for _ in range(1000))
+    assert false_positives < 50
+
+
+class TestRevocation:
+    def test_decode_revoked_token_fails(
+        self,
+        revocable_token_factory: security.JwtTokenFactory,
+    ):
+        token = revocable_token_factory.encode(make_claims())
+        other_token = revocable_token_factory.encode(make_claims())
+
+        revocable_token_factory.revoke(token)
+
+        with pytest.raises(security.RevokedTokenError):
+            revocable_token_factory.decode(token)
+        assert revocable_token_factory.decode(other_token)["jti"]
+
+    def test_expired_entries_are_evicted(
+        self,
+        revocation_store: security.AbstractRevocationStore,
+    ):
+        revocation_store.revoke("expired", time.time() - 1)
+        revocation_store.revoke("alive", time.time() + 60)
+
+        assert not revocation_store.is_revoked("expired")
+        assert revocation_store.evict_expired() == 1
+        assert len(revocation_store) == 1
+        assert revocation_store.is_revoked("alive")
+
+    def test_store_grows_past_capacity(
+        self,
+        revocation_store: security.AbstractRevocationStore,
+    ):
+        jtis = [str(uuid.uuid4()) for _ in range(100)]
+        for jti in jtis:
+            revocation_store.revoke(jti)
+
+        assert revocation_store.capacity >= 100
+        assert all(revocation_store.is_revoked(jti) for jti in jtis)
+
+    def test_revoke_token_without_jti_fails(
+        self,
+        revocable_token_factory: security.JwtTokenFactory,
+    ):
+        token = revocable_token_factory.encode({"a": 1})
+        with pytest.raises(ValueError):
+            revocable_token_factory.revoke(token)
+
+    def test_non_string_jti_is_rejected(
+        self,
+        revocable_token_factory: security.JwtTokenFactory,
+    ):
+        store = revocable_token_factory.revocation_store
+        with pytest.raises(TypeError):
+            store.revoke(42)
+        with pytest.raises(TypeError):
+            store.is_revoked(42)
+
+        token = revocable_token_factory.encode({"jti": 42})
+        with pytest.raises(jwt.InvalidTokenError):
+            revocable_token_factory.decode(token)
+
+
+def test_sqlite_stores_share_revocations(tmp_path):
+    path = str(tmp_path / "revoked.db")
+    store = security.SqliteRevocationStore(path, capacity=16)
+    other_store = security.SqliteRevocationStore(path, capacity=16)
+
+    store.revoke("shared", time.time() + 60)
+    assert other_store.is_revoked("shared")
+
+    for i in range(40):
+        other_store.revoke(f"other-{i}")
+    assert all(store.is_revoked(f"other-{i}") for i in range(40))
+    assert store.capacity >= 41
+
+    store.revoke("expired", time.time() - 1)
+    assert store.evict_expired() == 1
+    assert other_store.is_revoked("shared")
+    assert not other_store.is_revoked("expired")
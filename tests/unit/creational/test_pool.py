@@ -0,0 +1,150 @@
+import asyncio
+import itertools
+import threading
+import time
+
+import pytest
+
+from utils import creational
+
+
+def make_pool(**kwargs) -> creational.Pool:
+    counter = itertools.count()
+    return creational.Pool(lambda: {"id": next(counter), "dirty": False}, **kwargs)
+
+
+def test_objects_are_reused():
+    pool = make_pool(max_size=2)
+    with pool.acquire() as first:
+        pass
+    with pool.acquire() as second:
+        pass
+
+    assert first is second
+    assert pool.metrics.created == 1
+    assert pool.metrics.reused == 1
+
+
+def test_pool_is_bounded():
+    pool = make_pool(max_size=1, timeout=0.05)
+    with pool.acquire():
+        with pytest.raises(creational.PoolTimeoutError):
+            pool.checkout()
+
+    metrics = pool.metrics
+    assert metrics.waits == 1
+    assert metrics.timeouts == 1
+
+
+def test_waiting_acquire_gets_released_object():
+    pool = make_pool(max_size=1)
+    obj = pool.checkout()
+    threading.Timer(0.05, pool.release, args=(obj,)).start()
+
+    with pool.acquire(timeout=1) as waited_obj:
+        assert waited_obj is obj
+    assert pool.metrics.wait_time > 0
+
+
+def test_invalid_objects_are_replaced():
+    pool = make_pool(validate=lambda obj: not obj["dirty"])
+    with pool.acquire() as obj:
+        obj["dirty"] = True
+    with pool.acquire() as new_obj:
+        assert new_obj is not obj
+
+    assert pool.metrics.invalidated == 1
+    assert pool.size == 1
+
+
+def test_reset_hook_runs_on_release():
+    pool = make_pool(reset=lambda obj: obj.update(dirty=False))
+    with pool.acquire() as obj:
+        obj["dirty"] = True
+
+    assert obj["dirty"] is False
+
+
+def test_idle_objects_are_evicted():
+    destroyed = []
+    pool = make_pool(max_idle_time=0.01, destroy=destroyed.append)
+    with pool.acquire() as obj:
+        pass
+    time.sleep(0.02)
+
+    assert pool.evict_idle() == 1
+    assert destroyed == [obj]
+    assert pool.size == 0
+
+
+def test_async_acquire():
+    pool = make_pool(max_size=2)
+
+    async def borrow():
+        async with pool.aacquire() as obj:
+            await asyncio.sleep(0.01)
+            return obj["id"]
+
+    async def main():
+        return await asyncio.gather(*(borrow() for _ in range(6)))
+
+    ids = asyncio.run(main())
+    assert set(ids) == {0, 1}
+    assert pool.metrics.created == 2
+
+
+def test_cancelled_async_wait_takes_no_object():
+    pool = make_pool(max_size=1)
+
+    async def main():
+        async with pool.aacquire() as obj:
+            with pytest.raises(TimeoutError):
+                await asyncio.wait_for(pool.acheckout(), 0.05)
+        async with pool.aacquire(timeout=1) as again:
+            assert again is obj
+
+    asyncio.run(main())
+    assert pool.size == 1
+    assert pool.idle == 1
+
+
+def test_async_waiter_is_woken_by_thread_release():
+    pool = make_pool(max_size=1)
+    borrowed = pool.checkout()
+    timer = threading.Timer(0.05, pool.release, [borrowed])
+
+    async def main():
+        timer.start()
+        async with pool.aacquire(timeout=5) as obj:
+            return obj
+
+    assert asyncio.run(main()) is borrowed
+    assert pool.metrics.waits == 1
+
+
+def test_async_acquire_times_out():
+    pool = make_pool(max_size=1)
+    borrowed = pool.checkout()
+
+    async def main():
+        async with pool.aacquire(timeout=0.05):
+            pass
+
+    with pytest.raises(creational.PoolTimeoutError):
+        asyncio.run(main())
+    assert pool.metrics.timeouts == 1
+    pool.release(borrowed)
+
+
+def test_closed_pool_destroys_objects():
+    destroyed = []
+    pool = make_pool(destroy=destroyed.append)
+    borrowed = pool.checkout()
+    with pool.acquire():
+        pass
+    pool.close()
+    pool.release(borrowed)
+
+    assert len(destroyed) == 2
+    with pytest.raises(creational.PoolClosedError):
+        pool.checkout()
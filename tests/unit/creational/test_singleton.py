@@ -0,0 +1,123 @@
+import pickle
+import threading
+import time
+
+import pytest
+
+from utils import creational
+
+
+@creational.singleton
+class SlowSingleton:
+    instances_created = 0
+
+    def __init__(self, value: int = 0):
+        time.sleep(0.01)
+        type(self).instances_created += 1
+        self.value = value
+
+
+@creational.singleton
+class SingletonDict(dict):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+
+@creational.multiton
+class Connection:
+    def __init__(self, host: str, port: int = 80):
+        self.host = host
+        self.port = port
+
+
+@pytest.fixture(autouse=True)
+def reset():
+    yield
+    creational.reset_singletons()
+
+
+def test_concurrent_first_access_builds_one_instance():
+    SlowSingleton.instances_created = 0
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(SlowSingleton()))
+        for _ in range(16)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert SlowSingleton.instances_created == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_singleton_is_still_a_class():
+    instance = SingletonDict(a=1)
+
+    assert isinstance(instance, SingletonDict)
+    assert isinstance(instance, dict)
+    assert pickle.loads(pickle.dumps(instance)) == {"a": 1}
+
+
+def test_singleton_warns_on_ignored_arguments():
+    SlowSingleton(1)
+    with pytest.warns(RuntimeWarning):
+        assert SlowSingleton(2).value == 1
+
+
+def test_reset_singleton():
+    first = SlowSingleton(1)
+    SlowSingleton.reset_instances()
+    second = SlowSingleton(2)
+
+    assert first is not second
+    assert second.value == 2
+
+
+def test_multiton_keyed_by_arguments():
+    assert Connection("a") is Connection("a")
+    assert Connection("a", port=80) is Connection("a", port=80)
+    assert Connection("a") is not Connection("b")
+
+
+def test_multiton_rejects_unhashable_arguments():
+    with pytest.raises(TypeError):
+        Connection(["a"])
+
+
+class Base:
+    @property
+    def name(self) -> str:
+        return "base"
+
+
+@creational.singleton
+class Named(Base):
+    @property
+    def name(self) -> str:
+        return "named " + super().name
+
+
+def test_properties_can_use_super():
+    assert Named().name == "named base"
+
+
+def test_unpickling_returns_the_instance():
+    instance = SlowSingleton(3)
+    assert pickle.loads(pickle.dumps(instance)) is instance
+
+    connection = Connection("a", port=81)
+    assert pickle.loads(pickle.dumps(connection)) is connection
+
+    data = pickle.dumps(connection)
+    creational.reset_singletons()
+    restored = pickle.loads(data)
+    assert restored is Connection("a", 81)
+    assert restored.port == 81
+
+
+def test_multiton_binds_default_arguments():
+    assert Connection("a") is Connection("a", port=80)
+    assert Connection("a") is Connection(host="a")
+    assert Connection("a") is not Connection("a", 81)
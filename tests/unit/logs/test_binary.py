@@ -0,0 +1,100 @@
+import datetime
+import decimal
+import io
+import json
+import logging
+import sys
+
+import pytest
+
+from utils import logs
+
+pytest.importorskip("msgpack")
+
+
+@pytest.fixture
+def binary_file(tmp_path):
+    yield str(tmp_path / "service.log.bin")
+    logs.close_handlers()
+
+
+def test_records_round_trip(binary_file, tmp_path):
+    logger = logs.Logger("binary", file_name=str(tmp_path / "service.log"))
+    logger.handlers = [logs.get_binary_handler(binary_file)]
+
+    with logs.bind_context(request_id="abc"):
+        logger.warning("hello %s", "world")
+    logger.error("failed %d", 3)
+    logs.get_binary_handler(binary_file).close()
+
+    records = list(logs.iter_binary_log(binary_file))
+    assert [record["message"] for record in records] == ["hello world", "failed 3"]
+    assert records[0]["context"] == {"request_id": "abc"}
+    assert records[1]["source"]["level_no"] == logging.ERROR
+    assert records[1]["args"] == [3]
+    assert records[1]["name"] == "binary"
+
+
+def test_appending_resets_key_dictionary(binary_file):
+    for message in ("first", "second"):
+        handler = logs.BinaryLogHandler(binary_file)
+        handler.handle(
+            logging.LogRecord("binary", logging.INFO, __file__, 1, message, (), None)
+        )
+        handler.close()
+
+    assert [record["message"] for record in logs.iter_binary_log(binary_file)] == [
+        "first",
+        "second",
+    ]
+
+
+def test_convert_to_json_lines(binary_file, tmp_path):
+    handler = logs.BinaryLogHandler(binary_file)
+    formatter = logs.JSONFormatter()
+    expected = []
+    for i in range(5):
+        record = logs.LogRecord(
+            "binary", logging.INFO, __file__, i, "record %d", (i,), None
+        )
+        handler.handle(record)
+        expected.append(json.loads(formatter.format(record)))
+    handler.close()
+
+    with open(binary_file, "ab") as file:
+        file.write(b"\x00\x00\x01")  # truncated frame of a killed writer
+
+    destination = str(tmp_path / "service.log")
+    assert logs.binary_log_to_json(binary_file, destination) == 5
+    with open(destination) as file:
+        assert [json.loads(line) for line in file] == expected
+
+
+def test_rejects_other_files():
+    with pytest.raises(ValueError):
+        list(logs.iter_binary_log(io.BytesIO(b'{"message": "json"}\n')))
+
+
+def test_missing_msgpack_names_the_extra(monkeypatch, tmp_path):
+    monkeypatch.setitem(sys.modules, "msgpack", None)
+
+    with pytest.raises(ImportError, match=r"tex-corver-utils\[binary\]"):
+        logs.BinaryLogHandler(str(tmp_path / "test.bin"))
+
+
+def test_user_data_round_trips_as_json(binary_file):
+    handler = logs.BinaryLogHandler(binary_file)
+    formatter = logs.JSONFormatter()
+    record = logs.LogRecord("binary", logging.INFO, __file__, 1, "data", (), None)
+    record.data = {
+        "codes": {0: "zero", 1: "one", 100: "hundred"},
+        "items": [{"sku": "a"}, ({2: "two"},)],
+        "when": datetime.datetime(2024, 5, 1, 10, 0),
+        "amount": decimal.Decimal("1.50"),
+    }
+    handler.handle(record)
+    handler.close()
+
+    (decoded,) = logs.iter_binary_log(binary_file)
+    assert decoded["data"]["codes"] == {"0": "zero", "1": "one", "100": "hundred"}
+    assert decoded == json.loads(formatter.format(record))
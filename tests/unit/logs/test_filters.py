@@ -0,0 +1,138 @@
+import json
+import logging
+import weakref
+
+import pytest
+
+from utils import logs
+from utils.logs import filters
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    yield str(tmp_path / "test.log")
+    logs.close_handlers()
+
+
+def read_messages(log_file: str) -> list[str]:
+    logs.get_persistent_handler(log_file).flush()
+    with open(log_file) as file:
+        return [json.loads(line)["message"] for line in file]
+
+
+def test_filter_is_disabled_by_default():
+    assert logs.LogFilter.from_config({}) is None
+    assert logs.LogFilter.from_config(logs.DEFAULT_LOG_CONFIG["filters"]) is None
+
+
+def test_sampling_prefers_closest_logger():
+    log_filter = logs.LogFilter(
+        sampling={
+            "loggers": {"noisy": 0.0, "noisy.kept": 1.0},
+            "levels": {"DEBUG": 0.0},
+        },
+    )
+
+    assert log_filter.check("noisy.module", logging.ERROR, "msg", ()) == -1
+    assert log_filter.check("noisy.kept.module", logging.ERROR, "msg", ()) == 0
+    assert log_filter.check("other", logging.DEBUG, "msg", ()) == -1
+    assert log_filter.check("other", logging.INFO, "msg", ()) == 0
+
+
+def test_rate_limit_is_per_call_site():
+    log_filter = logs.LogFilter(rate_limit={"rate": 0.001, "burst": 2})
+
+    results = [
+        log_filter.check("app", logging.ERROR, "msg %s", (i,), ("a.py", 1))
+        for i in range(5)
+    ]
+    assert results == [0, 0, -1, -1, -1]
+    assert log_filter.check("app", logging.ERROR, "msg %s", (0,), ("a.py", 2)) == 0
+
+
+def test_duplicates_are_suppressed_and_counted(monkeypatch, log_file):
+    monkeypatch.setattr(logs, "_log_filter", logs.LogFilter(duplicates={"window": 60}))
+    logger = logs.Logger("filters.duplicates", file_name=log_file)
+
+    for device in ["/dev/sda"] * 4 + ["/dev/sdb"]:
+        logger.error("disk full on %s", device)
+
+    assert read_messages(log_file) == [
+        "disk full on /dev/sda",
+        "Previous message repeated 3 times: disk full on %s",
+        "disk full on /dev/sdb",
+    ]
+
+
+def test_least_recently_used_sites_are_forgotten():
+    log_filter = logs.LogFilter(duplicates={"window": 60}, max_sites=2)
+
+    for line in [1, 1, 2, 1, 3]:
+        log_filter.check("app", logging.ERROR, "msg", (), ("a.py", line))
+
+    assert list(log_filter._sites) == [
+        ("app", "msg", "a.py", 1),
+        ("app", "msg", "a.py", 3),
+    ]
+    assert log_filter.check("app", logging.ERROR, "msg", (), ("a.py", 2)) == 0
+    assert log_filter.flush() == [("app", logging.ERROR, "msg", 2)]
+    assert log_filter.flush() == []
+
+
+def test_pending_summaries_are_logged_on_close(monkeypatch, log_file):
+    monkeypatch.setattr(logs, "_log_filter", logs.LogFilter(duplicates={"window": 60}))
+    logger = logs.get_logger("filters.pending")
+    logger.handlers = [logs.get_persistent_handler(log_file)]
+
+    for _ in range(3):
+        logger.error("disk full")
+    logs.close_handlers()
+
+    with open(log_file) as file:
+        messages = [json.loads(line)["message"] for line in file]
+    assert messages == ["disk full", "Previous message repeated 2 times: disk full"]
+
+
+def test_fractional_rate_defaults_to_one_token(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr(filters.time, "monotonic", lambda: clock[0])
+    log_filter = logs.LogFilter(rate_limit={"rate": 0.5})
+
+    results = []
+    for _ in range(5):
+        results.append(log_filter.check("app", logging.ERROR, "msg", (), ("a.py", 1)))
+        clock[0] += 1.0
+    assert results == [0, -1, 1, -1, 1]
+
+    with pytest.raises(ValueError):
+        logs.LogFilter(rate_limit={"rate": 10, "burst": 0.5})
+
+
+class Ambiguous:
+    def __eq__(self, other):
+        raise ValueError("The truth value of an array is ambiguous")
+
+    __hash__ = None
+
+
+def test_duplicates_do_not_compare_or_keep_args():
+    log_filter = logs.LogFilter(duplicates={"window": 60})
+    value = Ambiguous()
+
+    assert log_filter.check("app", logging.ERROR, "msg %s", (value,), ("a.py", 1)) == 0
+    assert log_filter.check("app", logging.ERROR, "msg %s", (value,), ("a.py", 1)) == -1
+    assert log_filter.check("app", logging.ERROR, "msg %s", (1,), ("a.py", 1)) == 1
+    reference = weakref.ref(value)
+    del value
+    assert reference() is None
+
+
+def test_pending_summaries_are_bounded():
+    log_filter = logs.LogFilter(duplicates={"window": 60}, max_sites=2)
+
+    for line in range(10):
+        for _ in range(2):
+            log_filter.check("app", logging.ERROR, "msg", (), ("a.py", line))
+
+    assert len(log_filter._pending) == 2
+    assert len(log_filter.flush()) == 4
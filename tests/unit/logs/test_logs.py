@@ -0,0 +1,164 @@
+import asyncio
+import json
+import logging
+import threading
+
+import pytest
+
+from utils import logs
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    yield str(tmp_path / "test.log")
+    logs.close_handlers()
+
+
+def test_loggers_share_file_handler(log_file):
+    first = logs.Logger("shared.first", file_name=log_file)
+    second = logs.Logger("shared.second", file_name=log_file)
+
+    first_file = [h for h in first.handlers if isinstance(h, logs.PersistentLogHandler)]
+    second_file = [
+        h for h in second.handlers if isinstance(h, logs.PersistentLogHandler)
+    ]
+    assert first_file and first_file[0] is second_file[0]
+    assert logs.get_persistent_handler(log_file) is first_file[0]
+
+
+def test_propagated_record_is_emitted_once(log_file):
+    parent = logs.Logger("dedupe", file_name=log_file)
+    child = logs.Logger("dedupe.child", file_name=log_file)
+    child.parent = parent
+
+    child.warning("hello %s", "world")
+    logs.get_persistent_handler(log_file).flush()
+
+    with open(log_file) as file:
+        lines = file.read().splitlines()
+    assert len(lines) == 1
+    assert json.loads(lines[0])["message"] == "hello world"
+
+
+def test_default_loggers_propagate_to_root_handlers():
+    logger = logging.getLogger("root.handlers.child")
+
+    assert logger.handlers == []
+    assert logger.propagate
+    assert set(logs.get_handlers()) <= set(logging.getLogger().handlers)
+
+
+def test_close_handlers_detaches_loggers(log_file):
+    logging.getLogger("closed")
+    root = logging.getLogger()
+    handlers = [handler for handler in root.handlers if handler in logs.get_handlers()]
+    assert handlers
+
+    logs.close_handlers()
+
+    assert not set(handlers) & set(root.handlers)
+    assert logs.get_temporary_handler() not in handlers
+
+
+def read_records(log_file: str) -> list[dict]:
+    logs.get_persistent_handler(log_file).flush()
+    with open(log_file) as file:
+        return [json.loads(line) for line in file]
+
+
+def test_bind_context_is_added_to_records(log_file):
+    logger = logs.Logger("context", file_name=log_file)
+
+    with logs.bind_context(request_id="abc"):
+        with logs.bind_context(tenant="t1"):
+            assert logs.get_context() == {"request_id": "abc", "tenant": "t1"}
+            logger.warning("inside")
+        logger.warning("outside")
+    logger.warning("unbound")
+
+    records = read_records(log_file)
+    assert records[0]["context"] == {"request_id": "abc", "tenant": "t1"}
+    assert records[1]["context"] == {"request_id": "abc"}
+    assert "context" not in records[2]
+    assert logs.get_context() == {}
+
+
+def test_bind_context_is_isolated_between_tasks(log_file):
+    logger = logs.Logger("context.tasks", file_name=log_file)
+
+    async def handle(request_id: str):
+        logs.bind_context(request_id=request_id)
+        await asyncio.sleep(0)
+        logger.warning("handled")
+
+    async def main():
+        await asyncio.gather(*(handle(str(i)) for i in range(5)))
+
+    asyncio.run(main())
+
+    ids = sorted(record["context"]["request_id"] for record in read_records(log_file))
+    assert ids == ["0", "1", "2", "3", "4"]
+
+
+def test_bound_logger_fields_override_context(log_file):
+    logger = logs.Logger("context.bound", file_name=log_file)
+    bound = logger.bind(user="u1").bind(step=2)
+
+    with logs.bind_context(user="u0", tenant="t1"):
+        bound.warning("bound")
+
+    records = read_records(log_file)
+    assert len(records) == 1
+    assert records[0]["context"] == {"user": "u1", "tenant": "t1", "step": 2}
+
+
+def test_extra_context_is_merged_into_bound_context(log_file):
+    logger = logs.Logger("context.extra", file_name=log_file)
+
+    with logs.bind_context(user="u0", tenant="t1"):
+        logger.warning("extra", extra={"context": {"user": "u1", "step": 2}})
+        logger.bind(step=3).warning("bound")
+
+    records = read_records(log_file)
+    assert records[0]["context"] == {"user": "u1", "tenant": "t1", "step": 2}
+    assert records[1]["context"] == {"user": "u0", "tenant": "t1", "step": 3}
+
+
+def test_combined_context_matches_its_outer_context():
+    inner = logs.LogContext({"step": 1})
+    outers = [logs.LogContext({"request_id": str(i)}) for i in range(2)]
+
+    errors = []
+
+    def combine(outer):
+        for _ in range(2000):
+            if inner.combine(outer).fields["request_id"] != outer.fields["request_id"]:
+                errors.append(outer)
+
+    threads = [threading.Thread(target=combine, args=(outer,)) for outer in outers * 2]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert inner.combine(None) is inner
+
+
+def test_bound_logger_has_no_handlers_of_its_own(log_file):
+    bound = logs.Logger("context.handlers", file_name=log_file).bind(user="u1")
+
+    assert bound.handlers == []
+    assert bound.name == "context.handlers"
+
+
+def test_inline_formatter_time_matches_logging():
+    record = logging.LogRecord("time", logging.INFO, __file__, 1, "msg", (), None)
+
+    for datefmt in (None, "%Y-%m-%d %H:%M:%S", "%H:%M"):
+        expected = logging.Formatter(datefmt=datefmt).formatTime(record, datefmt)
+        formatter = logs.InlineLogFormatter(datefmt=datefmt)
+        assert formatter.formatTime(record, datefmt) == expected
+        assert formatter.formatTime(record, "%S") == logging.Formatter().formatTime(
+            record, "%S"
+        )
@@ -0,0 +1,99 @@
+import json
+import logging
+
+import pytest
+
+from utils import logs
+
+
+def write_records(path, records):
+    with open(path, "a") as file:
+        for record in records:
+            file.write(json.dumps(record) + "\n")
+
+
+def make_record(i: int, level: int = logging.INFO, name: str = "app") -> dict:
+    return {
+        "name": name,
+        "created": 1_000.0 + i,
+        "source": {"level_no": level},
+        "metadata": {"job_id": str(i % 10)},
+        "message": f"record {i}",
+    }
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    path = tmp_path / "service.log"
+    records = [make_record(i) for i in range(1000)]
+    records[500] = make_record(500, logging.ERROR, "app.db")
+    write_records(path, records)
+    return str(path)
+
+
+def test_query_filters(log_file):
+    reader = logs.LogReader(log_file, block_size=1024)
+
+    messages = [record["message"] for record in reader.query(start=1_100, end=1_105)]
+    assert messages == [f"record {i}" for i in range(100, 105)]
+
+    errors = list(reader.query(levels=["ERROR"]))
+    assert [record["message"] for record in errors] == ["record 500"]
+    assert list(reader.query(loggers=["app.db"])) == errors
+
+    jobs = list(reader.query(end=1_050, where={"metadata.job_id": "3"}))
+    assert [record["created"] for record in jobs] == [
+        1_003.0,
+        1_013.0,
+        1_023.0,
+        1_033.0,
+        1_043.0,
+    ]
+
+    assert (
+        len(list(reader.query(where=lambda record: record["created"] >= 1_990))) == 10
+    )
+
+
+def test_index_skips_blocks(log_file):
+    index = logs.LogReader(log_file, block_size=1024).index()
+    blocks = [
+        block
+        for block in index.blocks
+        if block.matches(None, None, {logging.ERROR}, None)
+    ]
+
+    assert len(index.blocks) > 50
+    assert len(blocks) == 1
+
+
+def test_index_is_saved_and_extended(log_file):
+    logs.LogReader(log_file, block_size=1024).index()
+    size = logs.LogIndex.load(f"{log_file}.idx").size
+
+    write_records(log_file, [make_record(2_000, logging.ERROR)])
+    reader = logs.LogReader(log_file)
+    assert len(list(reader.query(levels=[logging.ERROR]))) == 2
+    assert logs.LogIndex.load(f"{log_file}.idx").size > size
+
+
+def test_index_is_rebuilt_after_rotation(log_file):
+    logs.LogReader(log_file).index()
+
+    with open(log_file, "w"):
+        pass
+    write_records(log_file, [make_record(i + 5_000) for i in range(2_000)])
+
+    records = list(logs.LogReader(log_file).query(start=5_000))
+    assert len(records) == 2_000
+
+
+def test_reads_logger_output(tmp_path):
+    path = str(tmp_path / "logger.log")
+    logger = logs.Logger("reader", file_name=path)
+    logger.warning("hello")
+    logs.get_persistent_handler(path).flush()
+    logs.close_handlers()
+
+    (record,) = logs.LogReader(path).query(loggers=["reader"], levels=["WARNING"])
+    assert record["message"] == "hello"
@@ -0,0 +1,163 @@
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import socket
+import struct
+import time
+
+import pytest
+
+from utils import logs
+
+
+def make_record(message: str) -> logging.LogRecord:
+    return logging.LogRecord("sink", logging.WARNING, __file__, 1, message, (), None)
+
+
+def read_messages(path: str) -> list[str]:
+    with open(path) as file:
+        return [json.loads(line)["message"] for line in file]
+
+
+def wait_for(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def send_records(address: str, count: int):
+    handler = logs.SocketSinkHandler(address)
+    handler.setFormatter(logs.JSONFormatter())
+    for i in range(count):
+        handler.handle(make_record(f"{os.getpid()}-{i}"))
+    handler.close()
+
+
+def test_socket_sink_writes_whole_records(tmp_path):
+    log_file = str(tmp_path / "sink.log")
+    address = str(tmp_path / "sink.sock")
+
+    with logs.SinkServer(
+        address, logs.LogFileWriter(log_file), batch_size=64
+    ) as server:
+        send_records(address, 500)
+        wait_for(lambda: server.received == 500)
+
+    messages = read_messages(log_file)
+    assert len(messages) == 500
+    assert messages[-1].endswith("-499")
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+def test_socket_sink_reconnects_in_forked_workers(tmp_path):
+    log_file = str(tmp_path / "sink.log")
+    address = str(tmp_path / "sink.sock")
+    context = multiprocessing.get_context("fork")
+
+    with logs.SinkServer(address, logs.LogFileWriter(log_file)) as server:
+        handler = logs.SocketSinkHandler(address)
+        handler.setFormatter(logs.JSONFormatter())
+        handler.handle(make_record("parent"))
+        workers = [
+            context.Process(target=send_records, args=(address, 200)) for _ in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        handler.close()
+        wait_for(lambda: server.received == 801)
+
+    messages = read_messages(log_file)
+    assert len(messages) == 801
+    assert len({message.split("-")[0] for message in messages}) == 5
+
+
+def test_socket_sink_disconnects_oversized_frames(tmp_path):
+    log_file = str(tmp_path / "sink.log")
+    address = str(tmp_path / "sink.sock")
+
+    with logs.SinkServer(
+        address, logs.LogFileWriter(log_file), max_frame_size=1024
+    ) as server:
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        client.connect(address)
+        client.sendall(struct.pack(">I", 1 << 30))
+        wait_for(lambda: not server._buffers and client.recv(1) == b"")
+        client.close()
+
+        send_records(address, 1)
+        wait_for(lambda: server.received == 1)
+
+    assert len(read_messages(log_file)) == 1
+
+
+def test_socket_sink_drops_invalid_utf8_frames(tmp_path):
+    log_file = str(tmp_path / "sink.log")
+    address = str(tmp_path / "sink.sock")
+
+    with logs.SinkServer(address, logs.LogFileWriter(log_file)) as server:
+        record = json.dumps({"message": "valid"}).encode()
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(address)
+            for data in [b"\xff\xfe", record]:
+                client.sendall(struct.pack(">I", len(data)) + data)
+            wait_for(lambda: server.received == 1)
+        assert server.is_alive()
+
+    assert read_messages(log_file) == ["valid"]
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+def test_forked_handler_closes_inherited_socket(tmp_path):
+    address = str(tmp_path / "sink.sock")
+
+    with logs.SinkServer(address, logs.LogFileWriter(str(tmp_path / "sink.log"))):
+        handler = logs.SocketSinkHandler(address)
+        handler.setFormatter(logs.JSONFormatter())
+        handler.handle(make_record("parent"))
+        inherited = handler._socket
+
+        pid = os.fork()
+        if pid == 0:
+            handler._connect()
+            os._exit(0 if inherited.fileno() == -1 else 1)
+        _, status = os.waitpid(pid, 0)
+
+        assert os.waitstatus_to_exitcode(status) == 0
+        assert inherited.fileno() != -1
+        handler.close()
+
+
+def test_socket_sink_drops_records_without_server(tmp_path):
+    handler = logs.SocketSinkHandler(str(tmp_path / "missing.sock"))
+    handler.handle(make_record("lost"))
+    assert handler.dropped == 1
+
+
+def test_queue_sink(tmp_path):
+    log_file = str(tmp_path / "sink.log")
+    records = queue.Queue()
+
+    with logs.QueueSinkListener(records, logs.LogFileWriter(log_file)):
+        handler = logs.QueueSinkHandler(records)
+        handler.setFormatter(logs.JSONFormatter())
+        for i in range(10):
+            handler.handle(make_record(str(i)))
+
+    assert read_messages(log_file) == [str(i) for i in range(10)]
+
+
+def test_writer_rotates_by_size(tmp_path):
+    log_file = str(tmp_path / "sink.log")
+    writer = logs.LogFileWriter(log_file, max_bytes=100, backup_count=2)
+
+    for i in range(10):
+        writer.write(["x" * 40, "y" * 40])
+    writer.close()
+
+    assert sorted(os.listdir(tmp_path)) == ["sink.log", "sink.log.1", "sink.log.2"]
+    assert os.path.getsize(log_file) == 82
@@ -0,0 +1,267 @@
+import datetime
+import http.server
+import json
+import threading
+
+import httpx
+import pydantic
+import pytest
+
+from utils.test import ExpectedResponse, TestOrchestrator, api, load, rest
+
+
+class User(pydantic.BaseModel):
+    id: str
+    name: str
+
+
+def handler(request: httpx.Request) -> httpx.Response:
+    if request.method == "GET":
+        user_id = request.url.path.rsplit("/", 1)[-1]
+        return httpx.Response(200, json={"id": user_id, "name": f"user-{user_id}"})
+    body = json.loads(request.content)
+    return httpx.Response(201, json={"id": "new", **body})
+
+
+@pytest.fixture
+def transport():
+    yield httpx.MockTransport(handler)
+
+
+class UserHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = json.dumps({"id": self.path.rsplit("/", 1)[-1], "name": "user"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), UserHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def make_orchestrator(transport: httpx.MockTransport, **kwargs) -> TestOrchestrator:
+    return TestOrchestrator(
+        client=httpx.Client(transport=transport, base_url="http://test"),
+        url_factory={
+            "get_user": {"path": "/users/{id}", "method": "GET"},
+            "create_user": {"path": "/users", "method": "POST"},
+        },
+        request_body_factory={
+            "get_user": None,
+            "create_user": {"name": lambda: "alice"},
+        },
+        default_value_factory={},
+        response_schema_factory={"user": User},
+        **kwargs,
+    )
+
+
+def behaviors(n: int) -> list:
+    return [
+        {"behavior": "get_user", "url_kwargs": {"id": str(i)}} for i in range(n)
+    ] + ["create_user"]
+
+
+def assert_responses(responses: list[httpx.Response], n: int):
+    assert [response.json()["id"] for response in responses[:n]] == [
+        str(i) for i in range(n)
+    ]
+    assert responses[n].status_code == 201
+    assert responses[n].json()["name"] == "alice"
+
+
+def test_run_many_with_thread_pool(transport: httpx.MockTransport):
+    orchestrator = make_orchestrator(transport)
+
+    responses = orchestrator.run_many(behaviors(20), concurrency=4)
+
+    assert_responses(responses, 20)
+
+
+def test_run_many_with_async_client(transport: httpx.MockTransport):
+    async_client = httpx.AsyncClient(transport=transport, base_url="http://test")
+    orchestrator = make_orchestrator(transport, async_client=async_client)
+
+    responses = orchestrator.run_many(behaviors(20), concurrency=4)
+
+    assert_responses(responses, 20)
+
+
+def test_run_many_reuses_async_connections(server_url: str):
+    async_client = httpx.AsyncClient(base_url=server_url)
+    with TestOrchestrator(
+        client=httpx.Client(base_url=server_url),
+        url_factory={"get_user": {"path": "/users/{id}", "method": "GET"}},
+        request_body_factory={"get_user": None},
+        default_value_factory={},
+        response_schema_factory={},
+        async_client=async_client,
+    ) as orchestrator:
+        requests = [
+            {"behavior": "get_user", "url_kwargs": {"id": str(i)}} for i in range(5)
+        ]
+        for _ in range(2):
+            responses = orchestrator.run_many(requests, concurrency=2)
+            assert [response.json()["id"] for response in responses] == [
+                str(i) for i in range(5)
+            ]
+        orchestrator.run_coroutine(async_client.aclose())
+
+
+def test_run_many_returns_exceptions(transport: httpx.MockTransport):
+    orchestrator = make_orchestrator(transport)
+
+    responses = orchestrator.run_many(
+        ["delete_user", "create_user"], return_exceptions=True
+    )
+
+    assert isinstance(responses[0], KeyError)
+    assert responses[1].status_code == 201
+
+
+def test_load_test_report(transport: httpx.MockTransport):
+    async_client = httpx.AsyncClient(transport=transport, base_url="http://test")
+    orchestrator = make_orchestrator(transport, async_client=async_client)
+
+    report = load.run_load(
+        orchestrator,
+        [
+            {"behavior": "get_user", "url_kwargs": {"id": "1"}},
+            "create_user",
+            "delete_user",
+        ],
+        duration=0.2,
+        rps=200,
+    )
+    result = json.loads(report.to_json())
+
+    assert set(result["behaviors"]) == {"get_user", "create_user", "delete_user"}
+    assert result["behaviors"]["delete_user"]["error_rate"] == 1.0
+    assert result["behaviors"]["get_user"]["errors"] == 0
+    assert 20 <= result["total"]["requests"] <= 45
+    assert result["behaviors"]["get_user"]["latency_us"]["p99"] > 0
+
+
+def test_repeated_load_tests_share_connections(server_url: str):
+    async_client = httpx.AsyncClient(base_url=server_url)
+    with TestOrchestrator(
+        client=httpx.Client(base_url=server_url),
+        url_factory={"get_user": {"path": "/users/{id}", "method": "GET"}},
+        request_body_factory={"get_user": None},
+        default_value_factory={},
+        response_schema_factory={},
+        async_client=async_client,
+    ) as orchestrator:
+        behavior = {"behavior": "get_user", "url_kwargs": {"id": "1"}}
+        for _ in range(2):
+            report = load.run_load(
+                orchestrator, [behavior], duration=0.1, concurrency=2
+            )
+            assert report.total.requests > 0
+            assert report.total.errors == 0
+        orchestrator.run_coroutine(async_client.aclose())
+
+
+def test_closed_loop_load_test(transport: httpx.MockTransport):
+    async_client = httpx.AsyncClient(transport=transport, base_url="http://test")
+    orchestrator = make_orchestrator(transport, async_client=async_client)
+
+    report = load.run_load(orchestrator, ["create_user"], duration=0.1, concurrency=4)
+
+    assert report.behaviors["create_user"].requests > 0
+    assert report.behaviors["create_user"].status_codes[201] == report.total.requests
+
+
+@pytest.mark.parametrize("rps", [0, -1])
+def test_load_test_rejects_non_positive_rps(transport: httpx.MockTransport, rps: float):
+    async_client = httpx.AsyncClient(transport=transport, base_url="http://test")
+    orchestrator = make_orchestrator(transport, async_client=async_client)
+
+    with pytest.raises(ValueError, match="rps"):
+        load.run_load(orchestrator, ["create_user"], duration=0.1, rps=rps)
+
+
+def test_validate_body_with_cached_type_adapter():
+    response = httpx.Response(
+        200, json=[{"id": "1", "name": "a"}, {"id": "2", "name": "b"}]
+    )
+    expected_response = ExpectedResponse(body_schema=[User])
+
+    expected_response.validate(response)
+    expected_response.validate(response)
+
+    assert expected_response.body_schema == [User]
+    assert api.get_type_adapter([User]) is api.get_type_adapter(list[User])
+
+
+def test_validate_body_checks_subdict():
+    response = httpx.Response(200, json={"id": "1", "name": "a"})
+
+    ExpectedResponse(body_schema=User, body={"id": "1"}).validate(response)
+    with pytest.raises(AssertionError):
+        ExpectedResponse(body_schema=User, body={"id": "2"}).validate(response)
+    with pytest.raises(pydantic.ValidationError):
+        ExpectedResponse(body_schema=[User]).validate(response)
+
+
+class Event(pydantic.BaseModel):
+    model_config = pydantic.ConfigDict(strict=True)
+
+    id: str
+    at: datetime.datetime
+
+
+def test_validate_body_uses_json_mode_in_strict_models():
+    response = httpx.Response(200, json={"id": "1", "at": "2024-05-01T10:00:00"})
+
+    ExpectedResponse(body_schema=Event, body={"id": "1"}).validate(response)
+
+
+class IterStream(httpx.SyncByteStream):
+    def __init__(self, chunks: list[bytes]):
+        self.chunks = chunks
+
+    def __iter__(self):
+        yield from self.chunks
+
+
+def stream_response(items: list) -> httpx.Response:
+    content = json.dumps(items).encode()
+    chunks = [content[i : i + 7] for i in range(0, len(content), 7)]
+    return httpx.Response(200, stream=IterStream(chunks))
+
+
+def test_validate_stream():
+    items = [{"id": str(i), "name": f"user-{i}"} for i in range(50)]
+
+    assert (
+        ExpectedResponse(body_schema=[User]).validate_stream(stream_response(items))
+        == 50
+    )
+    assert [
+        item["id"] for item in rest.iter_response_items(stream_response(items))
+    ] == [str(i) for i in range(50)]
+
+
+def test_validate_stream_reports_first_failures():
+    items = [{"id": str(i)} for i in range(50)]
+
+    with pytest.raises(AssertionError) as ex:
+        api.validate_streaming_body(stream_response(items), User, max_failures=3)
+    assert "item 2" in str(ex.value)
+    assert "item 3" not in str(ex.value)
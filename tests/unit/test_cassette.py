@@ -0,0 +1,84 @@
+import asyncio
+
+import httpx
+import pytest
+
+from utils.test import Cassette, CassetteMissError
+
+
+@pytest.fixture
+def live_transport():
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(
+            200, json={"call": len(calls), "body": request.content.decode()}
+        )
+
+    transport = httpx.MockTransport(handler)
+    transport.calls = calls
+    yield transport
+
+
+def test_record_then_replay_without_server(
+    tmp_path, live_transport: httpx.MockTransport
+):
+    path = tmp_path / "cassette.jsonl.gz"
+    with Cassette(path, mode="record") as cassette:
+        client = cassette.client(transport=live_transport, base_url="http://test")
+        client.get("/users")
+        client.post("/users", json={"name": "a"})
+        client.post("/users", json={"name": "a"})
+        client.post("/users", json={"name": "b"})
+
+    replay = Cassette(path, mode="replay")
+    client = replay.client(base_url="http://test")
+
+    assert len(replay) == 4
+    assert client.get("/users").json()["call"] == 1
+    assert [
+        client.post("/users", json={"name": "a"}).json()["call"] for _ in range(3)
+    ] == [2, 3, 3]
+    assert client.post("/users", json={"name": "b"}).json()["call"] == 4
+    with pytest.raises(CassetteMissError):
+        client.delete("/users")
+
+
+def test_auto_mode_records_only_misses(tmp_path, live_transport: httpx.MockTransport):
+    path = tmp_path / "cassette.jsonl.gz"
+    for _ in range(2):
+        with Cassette(path) as cassette:
+            client = cassette.client(transport=live_transport, base_url="http://test")
+            assert client.get("/users").json()["call"] == 1
+
+    assert len(live_transport.calls) == 1
+
+
+def test_async_client_replay(tmp_path, live_transport: httpx.MockTransport):
+    path = tmp_path / "cassette.jsonl.gz"
+    with Cassette(path) as cassette:
+        cassette.client(transport=live_transport, base_url="http://test").get("/users")
+
+    async def main():
+        client = Cassette(path, mode="replay").async_client(base_url="http://test")
+        return await client.get("/users")
+
+    assert asyncio.run(main()).json()["call"] == 1
+
+
+def test_repeated_headers_are_kept_and_saved_on_client_close(tmp_path):
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            200, headers=[("Set-Cookie", "a=1"), ("Set-Cookie", "b=2")]
+        )
+
+    path = tmp_path / "cookies.jsonl.gz"
+    client = Cassette(path, mode="record").client(
+        transport=httpx.MockTransport(handler), base_url="http://test"
+    )
+    assert client.get("/login").headers.get_list("set-cookie") == ["a=1", "b=2"]
+    client.close()
+
+    replay = Cassette(path, mode="replay").client(base_url="http://test")
+    assert replay.get("/login").headers.get_list("set-cookie") == ["a=1", "b=2"]
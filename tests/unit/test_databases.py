@@ -0,0 +1,120 @@
+import pytest
+import sqlalchemy
+from sqlalchemy import orm
+
+from utils.test import SqlDatabase, databases
+
+
+@pytest.fixture
+def database(tmp_path):
+    engine = databases.create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    with engine.begin() as conn:
+        conn.execute(
+            sqlalchemy.text('CREATE TABLE "user" (id TEXT PRIMARY KEY, name TEXT)')
+        )
+        conn.execute(
+            sqlalchemy.text('INSERT INTO "user" (id, name) VALUES (:id, :name)'),
+            [{"id": str(i), "name": f"user-{i}"} for i in range(10)],
+        )
+    yield SqlDatabase(engine=engine, chunk_size=3)
+
+
+def count_rows(database: SqlDatabase) -> int:
+    with database.engine.connect() as conn:
+        return conn.execute(sqlalchemy.text('SELECT COUNT(*) FROM "user"')).scalar_one()
+
+
+def test_get(database: SqlDatabase):
+    assert database.get("user", "1")["name"] == "user-1"
+    assert database.get("user", "missing") is None
+
+
+def test_get_many_is_chunked(database: SqlDatabase):
+    models = database.get_many("user", [str(i) for i in range(8)])
+
+    assert sorted(model["id"] for model in models) == [str(i) for i in range(8)]
+
+
+def test_get_many_caches_found_ids_only(database: SqlDatabase):
+    database.get_many("user", ["1", "2", "missing"])
+    database.get("user", "other")
+
+    assert database.cached == {"user": {"1", "2"}}
+
+
+def test_get_binds_parameters(database: SqlDatabase):
+    assert database.get("user", "1' OR '1'='1") is None
+    assert count_rows(database) == 10
+
+
+def test_clear_removes_every_fetched_model(database: SqlDatabase):
+    database.get("user", "1")
+    database.get("user", "2")
+    database.get_many("user", ["3", "4", "5", "6"])
+
+    database.clear()
+
+    assert count_rows(database) == 4
+    assert database.cached == {}
+
+
+def test_remove_many(database: SqlDatabase):
+    assert database.remove_many("user", ["1", "2", "3", "4"]) == 4
+    assert count_rows(database) == 6
+
+
+def test_remove_many_forgets_removed_models(database: SqlDatabase):
+    database.get_many("user", ["1", "2", "3"])
+
+    database.remove_many("user", ["1", "2"])
+
+    assert database.cached == {"user": {"3"}}
+
+
+def test_rollback_scope_discards_changes(database: SqlDatabase):
+    with databases.rollback_scope(database.engine) as connection:
+        scoped_database = SqlDatabase(connection=connection)
+        scoped_database.remove_many("user", ["1", "2"])
+        with orm.Session(
+            bind=connection, join_transaction_mode="create_savepoint"
+        ) as session:
+            session.execute(sqlalchemy.text("DELETE FROM \"user\" WHERE id = '3'"))
+            session.commit()
+
+        assert scoped_database.get_many("user", ["1", "2", "3", "4"])[0]["id"] == "4"
+
+    assert count_rows(database) == 10
+
+
+def test_load_fixtures_from_rows(database: SqlDatabase):
+    rows = ({"id": f"new-{i}", "name": f"new-{i}"} for i in range(25))
+
+    assert database.load_fixtures("user", rows, batch_size=4) == 25
+    assert count_rows(database) == 35
+    assert len(database.cached["user"]) == 25
+
+    database.clear()
+    assert count_rows(database) == 10
+
+
+def test_load_fixtures_from_file(database: SqlDatabase, tmp_path):
+    file_path = tmp_path / "users.yaml"
+    file_path.write_text(
+        "- id: a\n  name: a\n---\n- id: b\n  name: b\n- id: c\n  name: c\n"
+    )
+
+    assert database.load_fixtures("user", str(file_path)) == 3
+    assert database.cached["user"] == {"a", "b", "c"}
+
+
+def test_load_fixtures_records_generated_ids(database: SqlDatabase):
+    with database.engine.begin() as conn:
+        conn.execute(
+            sqlalchemy.text(
+                "CREATE TABLE item (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT)"
+            )
+        )
+
+    database.load_fixtures("item", [{"name": str(i)} for i in range(5)], batch_size=2)
+
+    assert database.cached["item"] == {1, 2, 3, 4, 5}
@@ -0,0 +1,56 @@
+import random
+
+import pytest
+
+from utils import LatencyHistogram
+
+
+def test_percentiles_are_within_relative_error():
+    values = [random.randint(1, 10_000_000) for _ in range(10_000)]
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.record(value)
+
+    values.sort()
+    for percentile in (50, 90, 99):
+        expected = values[round(percentile / 100 * len(values)) - 1]
+        assert histogram.percentile(percentile) == pytest.approx(expected, rel=0.02)
+    assert histogram.max == values[-1]
+    assert histogram.min == values[0]
+
+
+def test_small_values_are_exact():
+    histogram = LatencyHistogram()
+    for value in range(100):
+        histogram.record(value)
+
+    assert histogram.percentile(50) == 49
+    assert histogram.summary()["count"] == 100
+
+
+def test_merge():
+    first, second = LatencyHistogram(), LatencyHistogram()
+    first.record(10)
+    second.record(1_000_000)
+
+    first.merge(second)
+
+    assert first.count == 2
+    assert first.percentile(100) == 1_000_000
+
+
+def test_record_many_matches_record():
+    values = [random.randint(-10, 10_000_000) for _ in range(5_000)]
+    one_by_one = LatencyHistogram()
+    for value in values:
+        one_by_one.record(value)
+    batch = LatencyHistogram()
+    batch.record_many(values)
+
+    assert batch.counts == one_by_one.counts
+    assert (batch.count, batch.total, batch.min, batch.max) == (
+        one_by_one.count,
+        one_by_one.total,
+        one_by_one.min,
+        one_by_one.max,
+    )
@@ -0,0 +1,138 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from utils import instrumentation, logs
+
+
+@pytest.fixture
+def enabled():
+    settings = instrumentation.configure(enabled=True)
+    instrumentation.get_histograms(reset=True)
+    yield
+    instrumentation.get_histograms(reset=True)
+    instrumentation.configure(enabled=False, logger=settings["logger"])
+
+
+def test_disabled_records_nothing():
+    instrumentation.configure(enabled=False)
+
+    @instrumentation.timed("disabled")
+    def work():
+        return 1
+
+    with instrumentation.timed("disabled.block") as span:
+        assert span is None
+    assert work() == 1
+    assert instrumentation.get_histograms() == {}
+
+
+def test_nested_spans(enabled):
+    @instrumentation.timed()
+    def inner():
+        return instrumentation.current_span()
+
+    with instrumentation.timed("outer") as outer:
+        span = inner()
+        assert instrumentation.current_span() is outer
+    assert instrumentation.current_span() is None
+
+    assert span.parent is outer
+    assert span.path == f"outer/{__name__}.test_nested_spans.<locals>.inner"
+    histograms = instrumentation.get_histograms()
+    assert histograms["outer"].count == 1
+    assert histograms["outer"].max >= histograms[span.name].max
+
+
+def test_async_and_threads(enabled):
+    timer = instrumentation.timed("shared")
+
+    @instrumentation.timed("task")
+    async def task():
+        with timer:
+            await asyncio.sleep(0)
+        return instrumentation.current_span().name
+
+    async def main():
+        return await asyncio.gather(*(task() for _ in range(10)))
+
+    assert asyncio.run(main()) == ["task"] * 10
+
+    def work():
+        for _ in range(100):
+            with timer:
+                pass
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    histograms = instrumentation.get_histograms(reset=True)
+    assert histograms["task"].count == 10
+    assert histograms["shared"].count == 410
+    assert instrumentation.get_histograms() == {}
+
+
+def test_flush_logs_structured_records(enabled, tmp_path):
+    log_file = str(tmp_path / "spans.log")
+    instrumentation.configure(logger="test.instrumentation")
+    logs.get_logger("test.instrumentation").handlers = [
+        logs.get_persistent_handler(log_file)
+    ]
+
+    for _ in range(3):
+        with instrumentation.timed("flushed"):
+            pass
+    instrumentation.flush()
+    logs.get_persistent_handler(log_file).flush()
+    logs.close_handlers()
+
+    with open(log_file) as file:
+        (record,) = [json.loads(line) for line in file]
+    assert record["data"]["span"] == "flushed"
+    assert record["data"]["count"] == 3
+    assert record["message"].startswith("span flushed: 3 calls")
+
+
+def test_block_entered_while_disabled_leaves_outer_span_open(enabled):
+    timer = instrumentation.timed("reentered")
+
+    with timer as outer:
+        instrumentation.configure(enabled=False)
+        with timer as inner:
+            assert inner is None
+        assert instrumentation.current_span() is outer
+        instrumentation.configure(enabled=True)
+    assert instrumentation.current_span() is None
+    assert instrumentation.get_histograms()["reentered"].count == 1
+
+
+def test_configure_is_not_star_exported():
+    import utils
+
+    assert not hasattr(utils, "configure")
+    assert not hasattr(utils, "flush")
+    assert utils.instrumentation.configure is instrumentation.configure
+
+
+def test_one_timer_decorates_several_functions(enabled):
+    timer = instrumentation.timed()
+
+    @timer
+    def first():
+        return 1
+
+    @timer
+    async def second():
+        return 2
+
+    assert first() == 1
+    assert asyncio.run(second()) == 2
+
+    histograms = instrumentation.get_histograms()
+    assert {name.rsplit(".", 1)[-1] for name in histograms} == {"first", "second"}
+    assert timer.name is None
@@ -0,0 +1,34 @@
+import json
+
+import pytest
+
+from utils import io
+
+
+def test_iter_json_array_across_chunks():
+    items = [{"a": 'x,]}"\\', "b": [1, {"c": None}]}, "s", 1.5, [], {}]
+    content = json.dumps(items).encode()
+    chunks = [content[i : i + 3] for i in range(0, len(content), 3)]
+
+    assert [json.loads(item) for item in io.iter_json_array(chunks)] == items
+
+
+@pytest.mark.parametrize("content", [b'{"a": 1}', b"[1, 2", b"1"])
+def test_iter_json_array_rejects_invalid_documents(content: bytes):
+    with pytest.raises(ValueError):
+        list(io.iter_json_array([content]))
+
+
+@pytest.mark.parametrize(
+    "file_name, content",
+    [
+        ("rows.json", '[{"id": 1}, {"id": 2}]'),
+        ("rows.jsonl", '{"id": 1}\n\n{"id": 2}\n'),
+        ("rows.yaml", "- id: 1\n---\nid: 2\n"),
+    ],
+)
+def test_iter_records(tmp_path, file_name: str, content: str):
+    file_path = tmp_path / file_name
+    file_path.write_text(content)
+
+    assert list(io.iter_records(file_path)) == [{"id": 1}, {"id": 2}]
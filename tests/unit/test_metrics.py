@@ -0,0 +1,139 @@
+import threading
+import urllib.request
+
+import pytest
+
+from utils import configuration, metrics
+from utils.security import MemoryRevocationStore
+
+
+@pytest.fixture
+def registry():
+    return metrics.MetricsRegistry()
+
+
+def test_counter_threads(registry):
+    counter = registry.counter("requests_total", "Handled requests")
+
+    def work():
+        for _ in range(10_000):
+            counter.inc()
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert counter.get() == 80_000
+    with pytest.raises(ValueError):
+        counter.inc(-1)
+
+
+def test_get_or_create(registry):
+    counter = registry.counter("jobs_total", labelnames=["queue"])
+
+    assert registry.counter("jobs_total", labelnames=["queue"]) is counter
+    assert counter.labels(queue="a") is counter.labels("a")
+    with pytest.raises(ValueError):
+        registry.gauge("jobs_total")
+    with pytest.raises(ValueError):
+        counter.labels("a", "b")
+    with pytest.raises(ValueError):
+        registry.counter("invalid-name")
+
+
+def test_gauge(registry):
+    gauge = registry.gauge("queue_size")
+    gauge.set(5)
+    gauge.inc(2)
+    gauge.dec()
+    assert gauge.get() == 6
+
+    gauge.set_function(lambda: 42)
+    assert gauge.get() == 42
+
+
+def test_histogram(registry):
+    histogram = registry.histogram("duration_seconds", buckets=[0.1, 1.0])
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value)
+
+    cumulative, total, count = histogram.get()
+    assert cumulative == [2, 3, 4]
+    assert total == pytest.approx(2.65)
+    assert count == 4
+
+
+def test_expose(registry):
+    registry.counter("requests_total", "Handled requests", ["route"]).labels(
+        route='/a"b'
+    ).inc(3)
+    registry.histogram("duration_seconds", buckets=[1.0]).observe(0.5)
+
+    assert registry.expose() == (
+        "# TYPE duration_seconds histogram\n"
+        'duration_seconds_bucket{le="1.0"} 1.0\n'
+        'duration_seconds_bucket{le="+Inf"} 1.0\n'
+        "duration_seconds_sum 0.5\n"
+        "duration_seconds_count 1.0\n"
+        "# HELP requests_total Handled requests\n"
+        "# TYPE requests_total counter\n"
+        'requests_total{route="/a\\"b"} 3.0\n'
+    )
+
+
+def test_write(registry, tmp_path):
+    registry.gauge("up").set(1)
+    path = tmp_path / "service.prom"
+
+    registry.write(str(path))
+
+    assert path.read_text() == "# TYPE up gauge\nup 1.0\n"
+    assert [item.name for item in tmp_path.iterdir()] == ["service.prom"]
+
+
+def test_serve(registry):
+    registry.gauge("up").set(1)
+    server = registry.serve(port=0)
+    try:
+        host, port = server.address
+        with urllib.request.urlopen(
+            f"http://{host}:{port}/metrics", timeout=5
+        ) as response:
+            assert response.headers["Content-Type"].startswith("text/plain")
+            assert response.read().decode() == registry.expose()
+    finally:
+        server.stop()
+
+
+def test_start_exporters(registry, tmp_path):
+    path = tmp_path / "service.prom"
+    exporters = metrics.start_exporters(
+        {"file": {"path": str(path), "interval": 60}, "http": {"port": 0}},
+        registry,
+    )
+    assert [type(exporter) for exporter in exporters] == [
+        metrics.FileExporter,
+        metrics.MetricsServer,
+    ]
+    for exporter in exporters:
+        exporter.stop()
+
+    assert path.exists()
+    assert metrics.start_exporters({}, registry) == []
+
+
+def test_published_stats():
+    registry = metrics.get_registry()
+    loads = registry.get("utils_config_loads_total")
+    checks = registry.get("utils_revocation_checks_total")
+    before = loads.get(), checks.labels(result="bloom_miss").get()
+
+    configuration.load_config()
+    store = MemoryRevocationStore()
+    store.is_revoked("unknown")
+
+    assert loads.get() == before[0] + 1
+    assert checks.labels(result="bloom_miss").get() == before[1] + 1
+    assert "utils_log_records_dropped_total" in registry.expose()
@@ -0,0 +1,134 @@
+import os
+import sqlite3
+
+import pytest
+import sqlalchemy
+
+from utils.test.fixtures.databases import (
+    drop_worker_schema,
+    get_worker_id,
+    get_worker_sql_database_uri,
+    isolate_worker_schema,
+)
+
+
+@pytest.mark.parametrize(
+    "uri, worker_id, expected",
+    [
+        ("sqlite:////tmp/test.db", "gw1", "sqlite:////tmp/test_gw1.db"),
+        ("sqlite:///test.db", "master", "sqlite:///test.db"),
+        ("sqlite://", "gw0", "sqlite://"),
+        ("postgresql://u:p@host/db", "gw0", "postgresql://u:p@host/db"),
+    ],
+)
+def test_worker_sql_database_uri(uri: str, worker_id: str, expected: str):
+    assert get_worker_sql_database_uri(uri, worker_id) == expected
+
+
+def test_worker_id(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("PYTEST_XDIST_WORKER", "gw3")
+    assert get_worker_id() == "gw3"
+    monkeypatch.delenv("PYTEST_XDIST_WORKER")
+    assert get_worker_id() == "master"
+
+
+def test_session_config_is_loaded_once(pytester: pytest.Pytester, config_path: str):
+    pytester.makeconftest(
+        """
+        import pytest
+        from utils import configuration
+
+        calls = []
+        load_config = configuration.load_config
+
+        def counting_load_config(*args, **kwargs):
+            calls.append(args or kwargs)
+            return load_config(*args, **kwargs)
+
+        configuration.load_config = counting_load_config
+
+        @pytest.fixture
+        def load_calls():
+            return calls
+        """
+    )
+    pytester.makepyfile(
+        """
+        def test_first(session_config, load_calls):
+            assert "database" in session_config
+
+        def test_second(session_config, load_calls):
+            assert "database" in session_config
+            assert len(load_calls) == 1
+        """
+    )
+    result = pytester.runpytest_inprocess(
+        "-p", "no:cacheprovider", "--utils-config-path", config_path
+    )
+    result.assert_outcomes(passed=2)
+
+
+def test_worker_database_copy_is_dropped(
+    pytester: pytest.Pytester, monkeypatch: pytest.MonkeyPatch, tmp_path
+):
+    database = tmp_path / "test.db"
+    sqlite3.connect(database).close()
+    pytester.makepyfile(
+        f"""
+        import os
+
+        def test_engine(sql_engine):
+            assert os.path.exists({str(tmp_path / "test_gw0.db")!r})
+        """
+    )
+    pytester.makefile(
+        ".yaml", database=f"database:\n  connection:\n    uri: sqlite:///{database}\n"
+    )
+    monkeypatch.setenv("PYTEST_XDIST_WORKER", "gw0")
+    result = pytester.runpytest_inprocess(
+        "-p", "no:cacheprovider", "--utils-config-path", str(pytester.path)
+    )
+    result.assert_outcomes(passed=1)
+    assert not (tmp_path / "test_gw0.db").exists()
+    assert database.exists()
+
+
+def test_sql_engine_is_skipped_without_uri(
+    pytester: pytest.Pytester, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.delenv("DATABASE_URI", raising=False)
+    pytester.makepyfile("def test_engine(sql_engine): pass")
+    result = pytester.runpytest_inprocess(
+        "-p", "no:cacheprovider", "--utils-config-path", str(pytester.path)
+    )
+    result.assert_outcomes(skipped=1)
+
+
+def test_plugin_only_registers_its_session_fixtures(pytester: pytest.Pytester):
+    pytester.makepyfile(
+        """
+        def test_fixtures(request):
+            for name in ["session_config", "sql_engine", "transactional_sql_database"]:
+                assert request._fixturemanager.getfixturedefs(name, request.node)
+            for name in ["config", "load_config", "sql_database", "sql_database_uri"]:
+                assert not request._fixturemanager.getfixturedefs(name, request.node)
+        """
+    )
+    result = pytester.runpytest_inprocess("-p", "no:cacheprovider")
+    result.assert_outcomes(passed=1)
+
+
+def test_worker_schema_survives_connection_reset():
+    uri = os.environ.get("DATABASE_URI")
+    if not uri or sqlalchemy.engine.make_url(uri).get_backend_name() != "postgresql":
+        pytest.skip("requires a PostgreSQL DATABASE_URI")
+    engine = sqlalchemy.create_engine(uri, pool_size=1, max_overflow=0)
+    schema = isolate_worker_schema(engine, "gw99")
+    try:
+        for _ in range(2):
+            with engine.connect() as conn:
+                search_path = conn.exec_driver_sql("SHOW search_path").scalar_one()
+            assert search_path.startswith(schema)
+    finally:
+        drop_worker_schema(engine, schema)
+        engine.dispose()
@@ -0,0 +1,164 @@
+import json
+import os
+import pstats
+import signal
+import threading
+import time
+
+import pytest
+
+from utils import logs, profiling
+
+
+@pytest.fixture
+def settings(tmp_path):
+    settings = profiling.configure(
+        sample_rate=1.0,
+        directory=str(tmp_path),
+        dump_every=0,
+        logger="test.profiling",
+    )
+    yield settings
+    profiling.stop_profiling()
+    profiling.configure(
+        sample_rate=settings["sample_rate"],
+        directory=profiling.DEFAULT_PROFILING_CONFIG["directory"],
+        dump_every=profiling.DEFAULT_PROFILING_CONFIG["dump_every"],
+        logger=profiling.DEFAULT_PROFILING_CONFIG["logger"],
+    )
+
+
+def fibonacci(n):
+    return n if n < 2 else fibonacci(n - 1) + fibonacci(n - 2)
+
+
+def test_disabled_profiles_nothing(settings, tmp_path):
+    @profiling.profiled("disabled")
+    def work():
+        return fibonacci(10)
+
+    assert work() == 55
+    assert profiling.dump_profiles() == []
+    assert not os.listdir(tmp_path)
+
+
+def test_sampled_calls_are_dumped(settings, tmp_path):
+    log_file = str(tmp_path / "profiling.log")
+    logs.get_logger("test.profiling").handlers = [logs.get_persistent_handler(log_file)]
+
+    @profiling.profiled("fib")
+    def work():
+        return fibonacci(15)
+
+    profiling.start_profiling()
+    for _ in range(3):
+        work()
+    paths = profiling.stop_profiling()
+    logs.close_handlers()
+
+    assert len(paths) == 2
+    profile_path, memory_path = paths
+    assert os.path.basename(profile_path).startswith(f"fib.{os.getpid()}.")
+    stats = pstats.Stats(profile_path)
+    assert any(function[2] == "fibonacci" for function in stats.stats)
+    with open(memory_path) as file:
+        assert file.readline().startswith("Total allocated size:")
+
+    with open(log_file) as file:
+        records = [json.loads(line) for line in file]
+    assert [record["data"]["kind"] for record in records] == ["cpu", "memory"]
+    assert records[0]["data"]["calls"] == 3
+    assert records[0]["data"]["path"] == profile_path
+
+
+def test_dump_every(settings, tmp_path):
+    profiling.configure(enabled=True, dump_every=2)
+
+    @profiling.profiled("batched")
+    def work():
+        return fibonacci(5)
+
+    for _ in range(5):
+        work()
+
+    deadline = time.monotonic() + 5
+    while len(os.listdir(tmp_path)) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len([name for name in os.listdir(tmp_path) if name.endswith(".pstats")]) == 2
+    assert len(profiling.dump_profiles()) == 1
+
+
+def test_nested_calls_are_not_sampled(settings):
+    @profiling.profiled("inner")
+    def inner():
+        return 1
+
+    @profiling.profiled("outer")
+    def outer():
+        return inner()
+
+    profiling.configure(enabled=True)
+    assert outer() == 1
+    paths = profiling.dump_profiles()
+    assert [os.path.basename(path).split(".")[0] for path in paths] == ["outer"]
+
+
+def test_coroutine_functions_are_rejected():
+    with pytest.raises(TypeError):
+
+        @profiling.profiled()
+        async def work():
+            pass
+
+
+def test_signal_toggles_profiling(settings, tmp_path):
+    previous = signal.getsignal(signal.SIGUSR2)
+    profiling.install_profiling_signal("SIGUSR2")
+    try:
+        os.kill(os.getpid(), signal.SIGUSR2)
+        deadline = time.monotonic() + 5
+        while not profiling._enabled and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert profiling._enabled
+
+        os.kill(os.getpid(), signal.SIGUSR2)
+        while profiling._enabled and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert not profiling._enabled
+    finally:
+        signal.signal(signal.SIGUSR2, previous)
+
+    while not os.listdir(tmp_path) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert [name for name in os.listdir(tmp_path) if name.startswith("memory.")]
+
+
+def test_profiles_only_hold_the_sampled_thread(settings):
+    def spin(stop):
+        while not stop.is_set():
+            fibonacci(10)
+
+    @profiling.profiled("sampled")
+    def work():
+        time.sleep(0.05)
+        return sum(range(100))
+
+    stop = threading.Event()
+    thread = threading.Thread(target=spin, args=(stop,))
+    thread.start()
+    profiling.configure(enabled=True)
+    try:
+        work()
+    finally:
+        stop.set()
+        thread.join()
+
+    (path,) = profiling.dump_profiles()
+    stats = pstats.Stats(path)
+    functions = {function[2] for function in stats.stats}
+    assert "work" in functions
+    assert "fibonacci" not in functions
+    assert "spin" not in functions
+    (work_stats,) = [value for key, value in stats.stats.items() if key[2] == "work"]
+    assert work_stats[:2] == (1, 1)
+    assert work_stats[3] >= 0.05
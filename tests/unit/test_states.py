@@ -1,3 +1,5 @@
+import json
+
 from utils.test import UnitTestState
 
 
@@ -78,3 +80,49 @@ def test_iadd_state_with_none():
     )
     x += y
     assert expected == x
+
+
+def test_accumulated_state_keeps_snapshots():
+    state = UnitTestState()
+    snapshots = []
+    for i in range(1000):
+        state += UnitTestState(responses={f"step-{i}": i, "last": i})
+        snapshots.append(state.snapshot())
+
+    assert len(state.responses) == 1001
+    assert snapshots[10].responses["last"] == 10
+    assert "step-11" not in snapshots[10].responses
+    assert snapshots[-1] == state
+
+
+def test_state_diff():
+    before = UnitTestState(data={"a": 1, "b": 2}, responses={"r": 1})
+    after = before + UnitTestState(data={"a": 3, "c": 4})
+    del after.data["b"]
+
+    diff = before.diff(after)
+
+    assert diff["data"] == {
+        "added": {"c": 4},
+        "removed": {"b": 2},
+        "changed": {"a": (1, 3)},
+    }
+    assert diff["responses"] == {"added": {}, "removed": {}, "changed": {}}
+    assert before.data == {"a": 1, "b": 2}
+
+
+def test_sections_support_the_dict_api():
+    state = UnitTestState(data={"a": 1})
+    state += UnitTestState(data={"b": 2})
+
+    assert json.loads(json.dumps(state.data.to_dict())) == {"a": 1, "b": 2}
+    assert type(state.data.to_dict()) is dict
+    assert {"x": 0} | state.data == {"x": 0, "a": 1, "b": 2}
+    assert type({"x": 0} | state.data) is dict
+    assert state.data | {"c": 3} == {"a": 1, "b": 2, "c": 3}
+    assert state.data == {"a": 1, "b": 2}
+
+    copy = state.data.copy()
+    copy["a"] = 10
+    assert copy == {"a": 10, "b": 2}
+    assert state.data["a"] == 1
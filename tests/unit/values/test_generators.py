@@ -0,0 +1,33 @@
+import string
+
+import pytest
+
+from utils import values
+
+
+@pytest.mark.parametrize("secure", [False, True])
+def test_generate_random_strings(secure: bool):
+    result = values.generate_random_strings(1000, 12, numeric=True, secure=secure)
+
+    assert len(result) == 1000
+    assert all(len(item) == 12 for item in result)
+    assert set("".join(result)) <= set(string.ascii_lowercase + string.digits)
+    assert len(set(result)) == 1000
+
+
+@pytest.mark.parametrize("secure", [False, True])
+def test_generate_empty_strings(secure: bool):
+    assert values.generate_random_strings(3, 0, secure=secure) == ["", "", ""]
+
+
+def test_secure_strings_cover_alphabet():
+    alphabet = values.get_alphabet(upper_case=True, numeric=True, special_symbols=True)
+    result = values.generate_random_string(
+        20000, secure=True, upper_case=True, numeric=True, special_symbols=True
+    )
+
+    assert set(result) == set(alphabet)
+
+
+def test_alphabet_is_cached():
+    assert values.get_alphabet(numeric=True) is values.get_alphabet(numeric=True)
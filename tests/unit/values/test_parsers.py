@@ -47,3 +47,33 @@ def test_string_converter():
     s = "MainThread"
     result = parsers.string_to_snake_case(s)
     logger.info(result)
+
+
+def test_timestamp_formatter_matches_strftime():
+    formats = [
+        "%Y-%m-%dT%H:%M:%S",
+        "%Y-%m-%d %H:%M:%S.%f",
+        "%d/%m/%Y %H:%M:%S,%f %%f",
+        "%H",
+    ]
+    values = [
+        datetime(2023, 8, 10, 10, 30, 0, microsecond)
+        for microsecond in (0, 1, 999_999, 5_000, 5_000)
+    ] + [datetime(2023, 8, 10, 10, 30, 1), datetime(999, 1, 1, 0, 0, 0, 7)]
+
+    for datetime_format in formats:
+        formatter = parsers.TimestampFormatter(datetime_format)
+        for value in values:
+            assert formatter.format(value) == value.strftime(datetime_format)
+        assert parsers.jsonify_datetimes(values, datetime_format) == [
+            value.strftime(datetime_format) for value in values
+        ]
+
+
+def test_timestamp_formatter_formats_timestamps():
+    formatter = parsers.TimestampFormatter("%Y-%m-%d %H:%M:%S.%f")
+    timestamp = 1_700_000_000.25
+
+    expected = datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S.%f")
+    assert formatter.format_timestamp(timestamp) == expected
+    assert formatter.format_timestamp(timestamp + 1).endswith(".250000")